@@ -28,10 +28,69 @@ def create_app(config_class='config.Config'):
     login_manager.init_app(app)
     mail.init_app(app)
 
+    # Bounded executor for password hashing
+    from services.auth_service import init_password_hasher
+    init_password_hasher(app)
+
+    # Cached user loader for flask_login
+    from services.user_service import init_identity_cache
+    init_identity_cache(app)
+
+    # Write-behind buffer for last-login timestamps
+    if app.config.get('LOGIN_WRITE_BEHIND', True):
+        from services.user_service import init_login_buffer
+        init_login_buffer(app)
+
+    # Incremental vendor revenue rollups
+    from services.revenue_service import init_revenue_rollups
+    init_revenue_rollups(app)
+
+    # Per-user dashboard fragment cache
+    from services.dashboard_service import init_dashboard_cache
+    init_dashboard_cache(app)
+
+    # Disk cache for rendered invoice PDFs
+    from services.invoice_pdf_cache import init_pdf_cache
+    init_pdf_cache(app)
+
+    # Pooled, rate-limited Stripe and Plaid clients
+    from services.gateway import init_gateways
+    init_gateways(app)
+
+    # Thread pool for concurrent Plaid lookups
+    from services.plaid_service import init_plaid_service
+    init_plaid_service(app)
+
+    # Bulk Stripe customer provisioning command
+    from services.stripe_provisioning import init_stripe_provisioning
+    init_stripe_provisioning(app)
+
+    # Tombstones for delta exports
+    from services.export_service import init_export_tracking
+    init_export_tracking(app)
+
+    # Sampled per-request phase timings and N+1 detection
+    from services.request_profiler import init_request_profiler
+    init_request_profiler(app, db)
+
+    # Opt-in query shape recording for the index advisor
+    if app.config.get('QUERY_RECORDER_ENABLED'):
+        from query_advisor import register_query_recorder
+        register_query_recorder(app, db)
+
     # Import and register blueprints
     from auth.routes import auth
     from billing.billing import billing
+    from billing.subscription_routes import subscriptions
+    from billing.payment_routes import payment
+    from customer_portal.routes import customer_portal
     app.register_blueprint(auth)
     app.register_blueprint(billing)
+    app.register_blueprint(subscriptions)
+    app.register_blueprint(payment)
+    app.register_blueprint(customer_portal)
+
+    from dashboard import register_dashboard
+    register_dashboard(app)
 
     return app
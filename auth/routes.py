@@ -1,11 +1,25 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, jsonify, abort
 from flask_login import login_user, logout_user, current_user, login_required
-from flask_mail import Message
 from models.user import User
-from app import db, mail
+from app import db
+from services.email_service import enqueue_email
+from services.auth_service import HashingOverloaded
 
 auth = Blueprint('auth', __name__)
 
+@auth.errorhandler(HashingOverloaded)
+def handle_hashing_overloaded(error):
+    """Fail fast with 503 when the password hashing queue is saturated."""
+    current_app.logger.warning(f"Rejected auth request: {str(error)}")
+    response = jsonify({
+        'error': 'Service Unavailable',
+        'description': 'Too many sign-in requests right now. Please try again shortly.',
+        'status_code': 503
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = str(current_app.config.get('PASSWORD_HASHING_RETRY_AFTER', 1))
+    return response
+
 ### LOGIN ROUTE ###
 @auth.route('/login', methods=['GET', 'POST'])
 def login():
@@ -61,6 +75,9 @@ def register():
             login_user(new_user)  # Log the user in automatically after registration
             flash('Registration successful! Welcome, ' + username, 'success')
             return redirect(url_for('dashboard'))
+        except HashingOverloaded:
+            db.session.rollback()
+            raise
         except Exception as e:
             db.session.rollback()
             current_app.logger.error(f"Error during registration for {email}: {str(e)}")
@@ -111,6 +128,9 @@ def reset_password(token):
             db.session.commit()
             flash('Your password has been updated! Please log in.', 'success')
             return redirect(url_for('auth.login'))
+        except HashingOverloaded:
+            db.session.rollback()
+            raise
         except Exception as e:
             db.session.rollback()
             current_app.logger.error(f"Error updating password for {user.email}: {str(e)}")
@@ -136,12 +156,7 @@ def send_reset_email(user):
     reset_link = url_for('auth.reset_password', token=token, _external=True)
 
     # Step 3: Compose the email
-    msg = Message(
-        'Password Reset Request',
-        sender=current_app.config['MAIL_DEFAULT_SENDER'],
-        recipients=[user.email]
-    )
-    msg.body = f'''Dear {user.username},
+    body = f'''Dear {user.username},
 
 We received a request to reset your password. If you made this request, you can reset your password by clicking the link below:
 
@@ -155,12 +170,19 @@ Thank you,
 The Support Team
 '''
 
-    # Step 4: Send the email
+    # Step 4: Queue the email; the outbox workers deliver it outside the request
     try:
-        mail.send(msg)
-        current_app.logger.info(f"Password reset email sent to {user.email}.")
+        enqueue_email(
+            'Password Reset Request',
+            recipients=[user.email],
+            body=body,
+            sender=current_app.config['MAIL_DEFAULT_SENDER']
+        )
+        db.session.commit()
+        current_app.logger.info(f"Password reset email queued for {user.email}.")
     except Exception as e:
-        current_app.logger.error(f"Failed to send password reset email to {user.email}: {str(e)}")
+        db.session.rollback()
+        current_app.logger.error(f"Failed to queue password reset email for {user.email}: {str(e)}")
 
 def admin_required(f):
     """Decorator to ensure user has admin role."""
@@ -176,4 +198,19 @@ def admin_required(f):
 @admin_required
 def admin_only_route():
     """Example of a route restricted to admins."""
-    return jsonify({'message': 'Welcome, Admin!'})
\ No newline at end of file
+    return jsonify({'message': 'Welcome, Admin!'})
+
+@auth.route('/admin/hashing-metrics', methods=['GET'])
+@login_required
+@admin_required
+def hashing_metrics():
+    """Password hashing queue metrics."""
+    return jsonify(current_app.extensions['password_hasher'].metrics())
+
+@auth.route('/admin/login-buffer-metrics', methods=['GET'])
+@login_required
+@admin_required
+def login_buffer_metrics():
+    """Last-login write-behind buffer metrics."""
+    buffer = current_app.extensions.get('login_buffer')
+    return jsonify(buffer.metrics() if buffer else {})
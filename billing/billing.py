@@ -1,7 +1,12 @@
 # billing.py
-from flask import Blueprint, render_template, request, redirect, url_for, flash
-from models import Invoice, Customer, User  # Import models
+from flask import Blueprint, render_template, request, redirect, url_for, flash, abort, send_file, Response, stream_with_context
+from models import db, Invoice, Customer, User  # Import models
 from services.payment_service import PaymentService  # Payment processing service (e.g., Stripe, PayPal)
+from services.invoice_service import get_invoice_page, parse_date_filter
+from services.pagination import InvalidCursor
+from services.createinvoice import invoice_pdf_data
+from services.invoice_pdf_cache import get_pdf_cache
+from services.export_service import EXPORT_DATASETS, iter_csv
 from flask_login import login_required, current_user
 from datetime import datetime
 
@@ -20,6 +25,9 @@ BILLING_MODELS = {
     'custom': 'Custom Billing'
 }
 
+# Invoice statuses that can still be paid; create_invoice uses 'unpaid', the overdue job 'Pending' and 'Overdue'
+PAYABLE_STATUSES = ('unpaid', 'Pending', 'Overdue')
+
 # Route: Create a new invoice for the customer
 @billing.route('/invoices/create', methods=['GET', 'POST'])
 @login_required
@@ -51,13 +59,75 @@ def create_invoice():
     return render_template('create_invoice.html', customers=customers, billing_models=BILLING_MODELS)
 
 
-# Route: Manage all invoices for the current user
+# Query-string filters of the invoice listings; page links carry them, since a cursor only holds the position
+LISTING_FILTERS = ('status', 'due_from', 'due_to')
+
+
+def _listing_filters():
+    """The listing filters present in the request, for building page links."""
+    return {name: request.args[name] for name in LISTING_FILTERS if request.args.get(name)}
+
+
+def _invoice_page_from_request(**filters):
+    """Load the invoice page described by the request's cursor, page size and filter arguments."""
+    try:
+        return get_invoice_page(
+            current_user.id,
+            cursor=request.args.get('cursor'),
+            page_size=request.args.get('page_size', type=int),
+            status=request.args.get('status'),
+            due_from=parse_date_filter(request.args.get('due_from')),
+            due_to=parse_date_filter(request.args.get('due_to')),
+            **filters
+        )
+    except (InvalidCursor, ValueError):
+        abort(400)
+
+
+# Route: Manage invoices for the current user, one keyset page at a time
 @billing.route('/invoices/manage')
 @login_required
 def manage_invoices():
-    # Fetch all invoices for the logged-in user
-    invoices = Invoice.query.filter_by(user_id=current_user.id).all()
-    return render_template('manage_invoices.html', invoices=invoices)
+    # Fetch one page of invoices for the logged-in user
+    page = _invoice_page_from_request()
+    return render_template('manage_invoices.html', invoices=page.items, page=page, filters=_listing_filters(),
+                           payable_statuses=PAYABLE_STATUSES)
+
+
+# Route: Download an invoice as PDF, served from the PDF cache
+@billing.route('/invoices/<int:invoice_id>/pdf')
+@login_required
+def download_invoice_pdf(invoice_id):
+    invoice = Invoice.query.filter_by(id=invoice_id, user_id=current_user.id).first_or_404()
+    path, etag = get_pdf_cache().get_or_render(invoice.id, invoice_pdf_data(invoice))
+    # conditional=True answers a matching If-None-Match with 304 Not Modified
+    return send_file(path, mimetype='application/pdf', download_name=f'{invoice.invoice_number}.pdf',
+                     etag=etag, conditional=True)
+
+
+# Route: Stream a CSV export; vendors get their own invoices and customers, admins any vendor or all rows
+@billing.route('/export/<dataset>.csv')
+@login_required
+def export_csv(dataset):
+    if dataset not in EXPORT_DATASETS:
+        abort(404)
+    is_admin = current_user.role is not None and current_user.role.name == 'admin'
+    if is_admin:
+        vendor_id = request.args.get('vendor_id', type=int)
+    elif dataset == 'users':
+        abort(403)
+    else:
+        vendor_id = current_user.id
+    try:
+        date_from = parse_date_filter(request.args.get('date_from'))
+        date_to = parse_date_filter(request.args.get('date_to'))
+    except ValueError:
+        abort(400)
+
+    # Rows are written to the response as they are fetched, so memory stays flat for any export size
+    rows = iter_csv(dataset, vendor_id=vendor_id, date_from=date_from, date_to=date_to)
+    return Response(stream_with_context(rows), mimetype='text/csv',
+                    headers={'Content-Disposition': f'attachment; filename={dataset}.csv'})
 
 
 # Route: Pay an invoice
@@ -67,13 +137,13 @@ def pay_invoice(invoice_id):
     invoice = Invoice.query.get_or_404(invoice_id)
     
     # Check if the invoice is unpaid
-    if invoice.status == 'unpaid':
+    if invoice.status in PAYABLE_STATUSES:
         # Call payment service to process payment
         success = payment_service.process_payment(invoice)
         
         if success:
             # Update invoice status
-            invoice.status = 'paid'
+            invoice.status = 'Paid'
             db.session.commit()
             flash('Invoice paid successfully!', 'success')
         else:
@@ -86,9 +156,10 @@ def pay_invoice(invoice_id):
 @billing.route('/subscriptions/manage')
 @login_required
 def manage_subscriptions():
-    # Fetch all recurring subscriptions for the logged-in user
-    subscriptions = Invoice.query.filter_by(user_id=current_user.id, billing_method='subscription').all()
-    return render_template('manage_subscriptions.html', subscriptions=subscriptions)
+    # Fetch one page of recurring subscriptions for the logged-in user
+    page = _invoice_page_from_request(billing_method='subscription')
+    return render_template('manage_subscriptions.html', subscriptions=page.items, page=page,
+                           filters=_listing_filters())
 
 
 # Route: Handle different billing models for an invoice (e.g., one-time, recurring)
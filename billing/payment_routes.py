@@ -2,10 +2,13 @@
 
 from flask import Blueprint, request, jsonify, current_app
 import stripe
-from plaid import Client
 from models import db, Customer, User  # Import your models
-from services.stripe_service import create_stripe_bank_account  # Import the Stripe service function
-from flask_login import current_user  # To manage session and user data
+from services.stripe_service import create_stripe_customer_for, create_stripe_bank_account  # Import the Stripe service functions
+from services.gateway import GatewayError, gateway_metrics
+from services import plaid_service
+from services.webhook_service import store_event, inbox_metrics
+from flask_login import current_user, login_required  # To manage session and user data
+from auth.routes import admin_required
 
 # Create a blueprint for payment-related routes
 payment = Blueprint('payment', __name__)
@@ -24,11 +27,9 @@ def create_stripe_customer():
         return jsonify({'error': 'Customer has not linked a bank account via Plaid'}), 400
 
     try:
-        # Create a Stripe customer
-        stripe_customer = stripe.Customer.create(
-            email=customer.email,
-            name=customer.name,
-        )
+        # Create a Stripe customer; the key makes a retried creation (or one the bulk
+        # provisioning command already made) return the same customer
+        stripe_customer = create_stripe_customer_for(customer)
 
         # Save Stripe customer ID to the customer in the database
         customer.stripe_customer_id = stripe_customer['id']
@@ -41,7 +42,8 @@ def create_stripe_customer():
                 'name': customer.bank_account_name,
                 'routing_number': 'your_routing_number',  # Replace with routing number retrieved from Plaid
                 'account_number': 'your_account_number',  # Replace with account number retrieved from Plaid
-            }
+            },
+            idempotency_key=f"bank-account-create-{customer.id}"
         )
 
         return jsonify({
@@ -50,23 +52,18 @@ def create_stripe_customer():
             'stripe_bank_account': bank_account
         }), 200
 
+    except GatewayError as e:
+        # Provider throttling or outages are temporary; tell the client to retry
+        return jsonify({'error': str(e)}), 503 if e.retryable else 400
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
 @payment.route('/create-link-token', methods=['POST'])
+@login_required
 def create_link_token():
     """Create a Plaid link token for the frontend."""
     try:
-        client = current_app.plaid_client
-        response = client.LinkToken.create({
-            'user': {'client_user_id': current_user.id},  # Assuming the user is logged in and current_user is available
-            'client_name': 'Your App Name',
-            'products': ['auth', 'transactions'],
-            'country_codes': ['US'],
-            'language': 'en',
-            'webhook': 'https://your-app.com/webhook',
-            'link_customization_name': 'default',
-        })
+        response = plaid_service.create_link_token(current_user.id)
         return jsonify(response)
     except Exception as e:
         return jsonify({'error': str(e)}), 400
@@ -83,23 +80,8 @@ def exchange_public_token():
         return jsonify({'error': 'Customer not found'}), 404
 
     try:
-        client = current_app.plaid_client
-        # Exchange the public token for an access token and item ID
-        exchange_response = client.Item.public_token.exchange(public_token)
-        access_token = exchange_response['access_token']
-        item_id = exchange_response['item_id']
-
-        # Get bank account details
-        accounts_response = client.Auth.get(access_token)
-        account = accounts_response['accounts'][0]  # Assuming the first account is the one we want
-
-        # Save account information to the customer in your database
-        customer.plaid_access_token = access_token
-        customer.plaid_item_id = item_id
-        customer.bank_account_id = account['account_id']
-        customer.bank_account_last4 = account['mask']
-        customer.bank_account_name = account['name']
-        db.session.commit()
+        # One exchange, then the item and account lookups run concurrently; saved in one commit
+        plaid_service.link_bank_account(customer, public_token, data.get('account_id'))
 
         return jsonify({
             'message': 'Bank account information saved',
@@ -112,7 +94,7 @@ def exchange_public_token():
 
 @payment.route('/stripe-webhook', methods=['POST'])
 def stripe_webhook():
-    """Handle Stripe webhook events."""
+    """Verify a Stripe webhook event and store it in the webhook inbox for asynchronous processing."""
     payload = request.get_data(as_text=True)
     sig_header = request.headers.get('Stripe-Signature')
     webhook_secret = current_app.config['STRIPE_WEBHOOK_SECRET']
@@ -122,12 +104,22 @@ def stripe_webhook():
     except stripe.error.SignatureVerificationError as e:
         return jsonify({'error': 'Webhook signature verification failed'}), 400
 
-    # Handle different event types
-    if event['type'] == 'payment_intent.succeeded':
-        payment_intent = event['data']['object']
-        # Update your database with the payment status
-        # e.g., mark invoice as paid
-
-    # Handle other event types as needed
+    # Store the verified event and acknowledge at once; the webhook workers process it in order
+    if not store_event(event, payload):
+        return jsonify({'status': 'duplicate'}), 200
 
     return jsonify({'status': 'success'}), 200
+
+@payment.route('/admin/webhook-metrics', methods=['GET'])
+@login_required
+@admin_required
+def webhook_metrics():
+    """Stripe webhook inbox depth and processing lag."""
+    return jsonify(inbox_metrics())
+
+@payment.route('/admin/gateway-metrics', methods=['GET'])
+@login_required
+@admin_required
+def payment_gateway_metrics():
+    """Stripe and Plaid call latency, retry and error metrics."""
+    return jsonify(gateway_metrics())
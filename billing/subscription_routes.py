@@ -0,0 +1,30 @@
+# billing/subscription_routes.py
+
+from flask import Blueprint, render_template, request, make_response, redirect, url_for, flash, abort
+from flask_login import login_required, current_user
+from services.subscription_service import get_all_subscription_plans, plan_catalog, subscribe_user
+
+subscriptions = Blueprint('subscriptions', __name__)
+
+@subscriptions.route('/subscriptions', methods=['GET'])
+def list_plans():
+    """Show the subscription plan catalog, revalidated by catalog version ETag."""
+    etag = f"plans-v{plan_catalog.current_version()}"
+    if request.if_none_match.contains(etag):
+        return '', 304, {'ETag': f'"{etag}"', 'Cache-Control': 'no-cache'}
+
+    response = make_response(render_template('subscriptions.html', plans=get_all_subscription_plans()))
+    response.set_etag(etag)
+    # Caches may store the page but must revalidate; a 304 costs one version lookup and no rendering
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@subscriptions.route('/subscriptions/<int:plan_id>/subscribe', methods=['POST'])
+@login_required
+def subscribe(plan_id):
+    """Subscribe the logged-in user to a plan, replacing their current subscription."""
+    subscription = subscribe_user(current_user.id, plan_id)
+    if subscription is None:
+        abort(404)
+    flash('Subscription started successfully!', 'success')
+    return redirect(url_for('dashboard'))
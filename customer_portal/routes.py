@@ -1,8 +1,11 @@
 # customer_portal/routes.py
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, send_file
 from flask_login import login_required, current_user
+from models import Invoice
 from services.manage_customer import get_customer_by_id, get_invoices_for_customer
+from services.createinvoice import invoice_pdf_data
+from services.invoice_pdf_cache import get_pdf_cache
 
 customer_portal = Blueprint('customer_portal', __name__)
 
@@ -21,6 +24,21 @@ def my_invoices():
         'due_date': inv.due_date.isoformat()
     } for inv in invoices])
 
+@customer_portal.route('/my-invoices/<int:invoice_id>/pdf', methods=['GET'])
+@login_required
+def my_invoice_pdf(invoice_id):
+    """Download one of the logged-in customer's invoices as PDF, served from the PDF cache."""
+    if not current_user.customer:
+        return jsonify({'error': 'Customer not found'}), 404
+
+    invoice = Invoice.query.filter_by(id=invoice_id, customer_id=current_user.customer.id).first()
+    if not invoice:
+        return jsonify({'error': 'Invoice not found'}), 404
+
+    path, etag = get_pdf_cache().get_or_render(invoice.id, invoice_pdf_data(invoice))
+    return send_file(path, mimetype='application/pdf', download_name=f'{invoice.invoice_number}.pdf',
+                     etag=etag, conditional=True)
+
 @customer_portal.route('/my-subscription', methods=['GET'])
 @login_required
 def my_subscription():
@@ -0,0 +1,16 @@
+# dashboard.py
+
+from flask import render_template
+from flask_login import login_required, current_user
+from services.dashboard_service import render_dashboard_fragments
+from services.revenue_service import get_vendor_kpis
+
+def register_dashboard(app):
+    """Register the dashboard view on the app itself, as url_for('dashboard') expects."""
+
+    @app.route('/dashboard')
+    @login_required
+    def dashboard():
+        """Show the logged-in user's subscription, payment history and this month's revenue KPIs."""
+        fragments = render_dashboard_fragments(current_user.id)
+        return render_template('dashboard.html', fragments=fragments, kpis=get_vendor_kpis(current_user.id))
@@ -0,0 +1,14 @@
+# models/__init__.py
+
+from app import db
+from models.role import Role
+from models.user import User
+from models.customer import Customer
+from models.invoice import Invoice
+from models.job_checkpoint import JobCheckpoint
+from models.outbox_email import OutboxEmail
+from models.subscription_plan import SubscriptionPlan, CatalogVersion
+from models.revenue_rollup import VendorRevenueDaily, VendorRevenueMonthly
+from models.subscription import Subscription
+from models.webhook_event import WebhookEvent
+from models.export_tombstone import ExportTombstone
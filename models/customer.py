@@ -14,16 +14,23 @@ class Customer(db.Model):
     address = db.Column(db.String(200), nullable=True)  # Customer's address
     created_at = db.Column(db.DateTime, default=datetime.utcnow)  # Customer creation timestamp
     active = db.Column(db.Boolean, default=True)  # Status (active/inactive)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow,
+                           index=True)  # Last change; drives delta exports
+    stripe_customer_id = db.Column(db.String(255), unique=True, nullable=True)  # Stripe customer ID, once provisioned
+    plaid_access_token = db.Column(db.String(255), nullable=True)  # Plaid access token of the linked item
+    plaid_item_id = db.Column(db.String(255), nullable=True)  # Plaid item ID
+    bank_institution_id = db.Column(db.String(50), nullable=True)  # Plaid institution of the linked bank
+    bank_account_id = db.Column(db.String(255), nullable=True)  # Plaid account ID of the linked bank account
+    bank_account_last4 = db.Column(db.String(4), nullable=True)  # Last four digits of the account number
+    bank_account_name = db.Column(db.String(100), nullable=True)  # Account name as reported by the bank
 
     # Establishes relationship to Invoice model, links it with customer relationship defined in Invoice
     invoices = db.relationship('Invoice', back_populates='customer', cascade='all, delete-orphan')
 
     def deactivate(self):
-        """Deactivates the customer and related invoices."""
-        self.active = False
-        for invoice in self.invoices:
-            invoice.status = 'Cancelled'
-        db.session.commit()
+        """Deactivates the customer and related invoices without loading the invoices."""
+        from services.manage_customer import deactivate_customers
+        return deactivate_customers([self.id])[0]
 
     def __repr__(self):
         return f"<Customer {self.name} ({self.email})>"
\ No newline at end of file
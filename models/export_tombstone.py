@@ -0,0 +1,19 @@
+# models/export_tombstone.py
+
+from datetime import datetime
+from app import db
+
+class ExportTombstone(db.Model):
+    """Records a deleted user, customer or invoice so delta exports can emit the deletion."""
+    __tablename__ = 'export_tombstones'
+    __table_args__ = (
+        db.Index('ix_export_tombstones_dataset_deleted_at_id', 'dataset', 'deleted_at', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    dataset = db.Column(db.String(50), nullable=False)  # 'users', 'customers' or 'invoices'
+    row_id = db.Column(db.Integer, nullable=False)  # Primary key of the deleted row
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ExportTombstone {self.dataset} {self.row_id}>"
@@ -6,6 +6,14 @@ from app import db
 class Invoice(db.Model):
     """Represents an invoice for a customer."""
     __tablename__ = 'invoices'
+    __table_args__ = (
+        # Backs keyset pagination of a vendor's invoices ordered by (due_date, id)
+        db.Index('ix_invoices_user_id_due_date_id', 'user_id', 'due_date', 'id'),
+        # Drives the set-based overdue transition job
+        db.Index('ix_invoices_status_due_date', 'status', 'due_date'),
+        # Lets per-customer lookups and bulk updates avoid a table scan
+        db.Index('ix_invoices_customer_id', 'customer_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)  # Unique identifier for the invoice
     invoice_number = db.Column(db.String(50), unique=True, nullable=False)  # Invoice number, must be unique
@@ -14,6 +22,9 @@ class Invoice(db.Model):
     issue_date = db.Column(db.DateTime, default=datetime.utcnow)  # Date when the invoice was issued
     due_date = db.Column(db.DateTime, nullable=False)  # Date when the invoice is due
     description = db.Column(db.Text, nullable=True)  # Optional description of the invoice
+    billing_method = db.Column(db.String(20), default='one-time')  # Billing model (e.g., 'one-time', 'subscription')
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow,
+                           index=True)  # Last change; drives delta exports
 
     # Foreign keys linking invoice to a customer and user (vendor)
     customer_id = db.Column(db.Integer, db.ForeignKey('customers.id'), nullable=False)
@@ -34,6 +45,7 @@ class Invoice(db.Model):
     def is_overdue(self):
         """
         Checks if the invoice is overdue.
+        Bulk transitions are done by services.invoice_service.transition_overdue_invoices.
         """
         return datetime.utcnow() > self.due_date and self.status == "Pending"
     
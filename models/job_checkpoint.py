@@ -0,0 +1,35 @@
+# models/job_checkpoint.py
+
+from datetime import datetime
+from app import db
+
+class JobCheckpoint(db.Model):
+    """Stores the progress of a resumable batch job so an interrupted run can pick up where it stopped."""
+    __tablename__ = 'job_checkpoints'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)  # Job name, e.g. 'overdue_transition'
+    state = db.Column(db.JSON, nullable=False, default=dict)  # Job-specific progress (cursor position, counters)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @staticmethod
+    def load(name):
+        """Returns the checkpoint for a job, creating an empty (unsaved) one if none exists."""
+        checkpoint = JobCheckpoint.query.filter_by(name=name).first()
+        if checkpoint is None:
+            checkpoint = JobCheckpoint(name=name, state={})
+        return checkpoint
+
+    def save(self, state):
+        """Stores the job state in the current transaction; the caller commits it with the work it describes."""
+        self.state = dict(state)
+        self.updated_at = datetime.utcnow()
+        db.session.add(self)
+
+    def clear(self):
+        """Removes the checkpoint once the job has finished."""
+        if self.id is not None:
+            db.session.delete(self)
+
+    def __repr__(self):
+        return f"<JobCheckpoint {self.name}>"
@@ -0,0 +1,28 @@
+# models/outbox_email.py
+
+from datetime import datetime
+from app import db
+
+class OutboxEmail(db.Model):
+    """An email waiting to be delivered by the outbox workers."""
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        # Lets workers find due messages without scanning delivered ones
+        db.Index('ix_email_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(255), nullable=False)
+    sender = db.Column(db.String(120), nullable=True)  # Falls back to MAIL_DEFAULT_SENDER when empty
+    recipients = db.Column(db.JSON, nullable=False)  # List of recipient addresses
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), default='pending', nullable=False)  # 'pending', 'sending', 'sent' or 'dead'
+    attempts = db.Column(db.Integer, default=0, nullable=False)  # Delivery attempts so far
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)  # Earliest time of the next attempt
+    claimed_at = db.Column(db.DateTime, nullable=True)  # When a worker took the message, to recover from crashed workers
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<OutboxEmail {self.id} - {self.subject} - {self.status}>"
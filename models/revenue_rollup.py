@@ -0,0 +1,41 @@
+# models/revenue_rollup.py
+
+from app import db
+
+class VendorRevenueDaily(db.Model):
+    """Per-vendor revenue totals for one day of invoice issue dates, in integer cents."""
+    __tablename__ = 'vendor_revenue_daily'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'day', name='uq_vendor_revenue_daily_user_id_day'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)  # Vendor
+    day = db.Column(db.Date, nullable=False)
+    billed_cents = db.Column(db.BigInteger, nullable=False, default=0)  # All invoices issued
+    paid_cents = db.Column(db.BigInteger, nullable=False, default=0)  # Issued invoices that are paid
+    outstanding_cents = db.Column(db.BigInteger, nullable=False, default=0)  # Issued invoices still unpaid
+    mrr_cents = db.Column(db.BigInteger, nullable=False, default=0)  # Subscription invoices issued (not cancelled)
+
+    def __repr__(self):
+        return f"<VendorRevenueDaily {self.user_id} {self.day}>"
+
+
+class VendorRevenueMonthly(db.Model):
+    """Per-vendor revenue totals for one month of invoice issue dates, in integer cents."""
+    __tablename__ = 'vendor_revenue_monthly'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'month', name='uq_vendor_revenue_monthly_user_id_month'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)  # Vendor
+    month = db.Column(db.Date, nullable=False)  # First day of the month
+    billed_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    paid_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    outstanding_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    mrr_cents = db.Column(db.BigInteger, nullable=False, default=0)  # Monthly recurring revenue
+    arr_cents = db.Column(db.BigInteger, nullable=False, default=0)  # Annual run rate, 12 x MRR
+
+    def __repr__(self):
+        return f"<VendorRevenueMonthly {self.user_id} {self.month}>"
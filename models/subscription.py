@@ -0,0 +1,23 @@
+# models/subscription.py
+
+from datetime import datetime
+from app import db
+
+class Subscription(db.Model):
+    """A user's subscription to a subscription plan."""
+    __tablename__ = 'subscriptions'
+    __table_args__ = (
+        db.Index('ix_subscriptions_user_id_status', 'user_id', 'status'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    plan_id = db.Column(db.Integer, db.ForeignKey('subscription_plans.id'), nullable=False)
+    status = db.Column(db.String(20), default='active', nullable=False)  # 'active' or 'cancelled'
+    start_date = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    end_date = db.Column(db.DateTime, nullable=False)  # End of the current billing cycle; next billing date
+
+    plan = db.relationship('SubscriptionPlan')
+
+    def __repr__(self):
+        return f"<Subscription {self.user_id} - plan {self.plan_id} - {self.status}>"
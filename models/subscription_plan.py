@@ -0,0 +1,64 @@
+# models/subscription_plan.py
+
+from datetime import datetime
+from sqlalchemy import event, insert, select, update
+from app import db
+
+class SubscriptionPlan(db.Model):
+    """Represents a subscription plan offered to customers."""
+    __tablename__ = 'subscription_plans'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)  # Plan name shown to customers
+    description = db.Column(db.Text, nullable=True)
+    price = db.Column(db.Float, nullable=False)  # Price per billing cycle
+    billing_cycle = db.Column(db.String(20), nullable=False)  # e.g., 'monthly', 'yearly'
+    duration_days = db.Column(db.Integer, default=30)  # Length of one billing cycle in days
+    features = db.Column(db.JSON, nullable=True)  # List of feature descriptions
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<SubscriptionPlan {self.name} - {self.price}/{self.billing_cycle}>"
+
+
+class CatalogVersion(db.Model):
+    """A version counter bumped whenever a cached catalog (e.g. subscription plans) changes."""
+    __tablename__ = 'catalog_versions'
+
+    name = db.Column(db.String(50), primary_key=True)  # Catalog name, e.g. 'subscription_plans'
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @staticmethod
+    def current(name):
+        """Returns the current version of a catalog (0 if it was never bumped)."""
+        return db.session.execute(
+            select(CatalogVersion.version).where(CatalogVersion.name == name)
+        ).scalar() or 0
+
+    @staticmethod
+    def bump(connection, name):
+        """Increments a catalog version inside the transaction of the given connection."""
+        table = CatalogVersion.__table__
+        result = connection.execute(
+            update(table)
+            .where(table.c.name == name)
+            .values(version=table.c.version + 1, updated_at=datetime.utcnow())
+        )
+        if not result.rowcount:
+            connection.execute(insert(table).values(name=name, version=1, updated_at=datetime.utcnow()))
+
+    def __repr__(self):
+        return f"<CatalogVersion {self.name} v{self.version}>"
+
+
+PLAN_CATALOG = 'subscription_plans'
+
+
+# Any plan insert, edit or delete bumps the catalog version in the same transaction,
+# so every process reloads its in-memory plan catalog once the change commits.
+@event.listens_for(SubscriptionPlan, 'after_insert')
+@event.listens_for(SubscriptionPlan, 'after_update')
+@event.listens_for(SubscriptionPlan, 'after_delete')
+def bump_plan_catalog_version(mapper, connection, target):
+    CatalogVersion.bump(connection, PLAN_CATALOG)
@@ -2,11 +2,12 @@ from datetime import datetime
 from flask import current_app
 from app import db
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
 from itsdangerous import TimedJSONWebSignatureSerializer as Serializer
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import set_committed_value
 import re
 from models.role import Role  # Import the Role model
+from services.auth_service import hash_password, verify_password, HashingOverloaded
 
 class User(db.Model, UserMixin):
     """Represents a user in the system with enhanced functionality."""
@@ -20,10 +21,16 @@ class User(db.Model, UserMixin):
     last_login = db.Column(db.DateTime)  # Stores the last login timestamp
     role = db.Column(db.String(50), default='user')  # Role (admin, user, etc.)
     active = db.Column(db.Boolean, default=True)  # Account status (active/inactive)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow,
+                           index=True)  # Last change; drives delta exports
     
     # Relationship to invoices
     invoices = db.relationship('Invoice', back_populates='user', cascade='all, delete-orphan')
 
+    # Customer record of a customer-portal user, matched by email address
+    customer = db.relationship('Customer', primaryjoin='User.email == foreign(Customer.email)', viewonly=True,
+                               uselist=False)
+
     # Other methods (set_password, check_password, etc.) remain the same as provided earlier
 
     def __repr__(self):
@@ -37,14 +44,14 @@ class User(db.Model, UserMixin):
         if not self.validate_password(password):
             current_app.logger.error(f"Password does not meet complexity requirements for user {self.email}")
             raise ValueError("Password does not meet complexity requirements.")
-        # Ensures password is stored securely using hashing algorithm
-        self.password_hash = generate_password_hash(password)
+        # Ensures password is stored securely using hashing algorithm, off the request thread
+        self.password_hash = hash_password(password)
         current_app.logger.info(f"Password set for user {self.email}")
 
     def check_password(self, password):
         """Checks if the provided password matches the stored hash."""
         # You can add a delay here if you want to protect against brute-force attacks
-        if not check_password_hash(self.password_hash, password):
+        if not verify_password(self.password_hash, password):
             current_app.logger.warning(f"Failed login attempt for user {self.email}")
             return False
         current_app.logger.info(f"Successful password check for user {self.email}")
@@ -80,8 +87,15 @@ class User(db.Model, UserMixin):
     def mark_login(self):
         """Updates the user's last login timestamp and logs the activity."""
         # Track the login activity, possibly storing IP address, browser information, etc.
-        self.last_login = datetime.utcnow()
-        db.session.commit()
+        now = datetime.utcnow()
+        buffer = current_app.extensions.get('login_buffer')
+        if buffer is not None:
+            # Written later by the batched write-behind flush; don't mark the attribute dirty
+            set_committed_value(self, 'last_login', now)
+            buffer.record(self.id, now)
+        else:
+            self.last_login = now
+            db.session.commit()
         current_app.logger.info(f"User {self.email} logged in at {self.last_login}")
 
 
@@ -151,17 +165,23 @@ class User(db.Model, UserMixin):
 
     def is_admin(self):
         """Checks if the user has admin privileges."""
-        return self.role == 'admin'
+        return self.role is not None and self.role.name == 'admin'
 
     def promote_to_admin(self):
         """Promotes the user to admin."""
-        self.role = 'admin'
+        admin_role = Role.query.filter_by(name='admin').first()
+        if not admin_role:
+            raise Exception("Admin role not found.")
+        self.role = admin_role
         db.session.commit()
 
     def demote_to_user(self):
         """Demotes an admin user to a regular user."""
-        if self.role == 'admin':
-            self.role = 'user'
+        if self.is_admin():
+            user_role = Role.query.filter_by(name='user').first()
+            if not user_role:
+                raise Exception("User role not found.")
+            self.role = user_role
             db.session.commit()
 
     ### Static Methods
@@ -211,6 +231,8 @@ class User(db.Model, UserMixin):
             db.session.rollback()
             current_app.logger.error(f"Database error while creating user {email}: {str(e)}")
             raise ValueError("There was an error creating the user, please try again.")
+        except HashingOverloaded:
+            raise
         except Exception as e:
             current_app.logger.error(f"General error while creating user {email}: {str(e)}")
             raise ValueError(f"Unexpected error: {str(e)}")
@@ -0,0 +1,27 @@
+# models/webhook_event.py
+
+from datetime import datetime
+from app import db
+
+class WebhookEvent(db.Model):
+    """A received Stripe webhook event, stored before it is processed."""
+    __tablename__ = 'webhook_events'
+    __table_args__ = (
+        db.Index('ix_webhook_events_status_partition_created', 'status', 'partition', 'created'),
+        db.Index('ix_webhook_events_object_id_created', 'object_id', 'created'),
+    )
+
+    id = db.Column(db.String(255), primary_key=True)  # Stripe event id; makes redelivery idempotent
+    type = db.Column(db.String(100), nullable=False)  # e.g. 'payment_intent.succeeded'
+    object_id = db.Column(db.String(255), nullable=True)  # Id of the object the event is about; ordering key
+    partition = db.Column(db.Integer, nullable=False, default=0)  # Hash of object_id; one worker owns a partition
+    created = db.Column(db.Integer, nullable=False)  # Stripe's event creation time (unix seconds)
+    payload = db.Column(db.Text, nullable=False)  # Raw event JSON as received
+    status = db.Column(db.String(20), nullable=False, default='pending')  # 'pending', 'processed', 'skipped' or 'failed'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+    received_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<WebhookEvent {self.id} {self.type} - {self.status}>"
@@ -0,0 +1,447 @@
+# query_advisor.py
+
+"""
+Opt-in query-pattern recorder and index advisor.
+
+When QUERY_RECORDER_ENABLED is set, create_app() attaches a QueryRecorder to the
+SQLAlchemy engine. The recorder groups every statement by its normalized shape and
+tracks counts and latencies, and snapshots them to QUERY_RECORDER_SNAPSHOT_PATH at
+exit. The `flask advise-indexes` command then EXPLAINs the slowest recorded shapes,
+recommends composite indexes for them, and writes a report comparing query plans
+before and after. The indexes are written as an Alembic migration when an Alembic
+head is known, and otherwise as a plain SQL script of CREATE INDEX statements.
+"""
+
+import atexit
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import Column, Index, MetaData, Table, event, inspect, text
+from sqlalchemy.schema import CreateIndex
+
+# Matches bound parameters and literals so statements that only differ in values share a shape
+_PARAM_PATTERNS = [
+    (re.compile(r"%\(\w+\)s"), '?'),  # psycopg2 pyformat
+    (re.compile(r"(?<![:\w]):\w+"), '?'),  # named
+    (re.compile(r"\$\d+"), '?'),  # numeric
+    (re.compile(r"'(?:[^']|'')*'"), '?'),  # string literals
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), '?'),  # number literals
+]
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+_CLAUSE_END = r"(?=\bGROUP BY\b|\bORDER BY\b|\bLIMIT\b|\bOFFSET\b|\bFOR UPDATE\b|$)"
+_WHERE = re.compile(r"\bWHERE\b(.*?)" + _CLAUSE_END, re.IGNORECASE | re.DOTALL)
+_ORDER_BY = re.compile(r"\bORDER BY\b(.*?)(?=\bLIMIT\b|\bOFFSET\b|\bFOR UPDATE\b|$)", re.IGNORECASE | re.DOTALL)
+_EQUALITY = re.compile(r"\b(\w+)\.(\w+)\s*(?:=|\bIN\b|\bIS\b)", re.IGNORECASE)
+_COLUMN = re.compile(r"\b(\w+)\.(\w+)\b")
+
+MAX_INDEX_COLUMNS = 4  # Wider indexes rarely pay for their write cost
+
+
+def normalize_statement(statement):
+    """
+    Reduce a SQL statement to its shape by replacing parameters and literals with '?'.
+
+    Args:
+        statement (str): SQL as sent to the DBAPI cursor.
+
+    Returns:
+        str: Normalized statement shape.
+    """
+    shape = statement
+    for pattern, replacement in _PARAM_PATTERNS:
+        shape = pattern.sub(replacement, shape)
+    shape = _IN_LIST.sub('(?)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+class ShapeStats:
+    """Aggregated timings for one normalized statement shape."""
+
+    def __init__(self, shape):
+        self.shape = shape
+        self.count = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.sample_statement = None  # Last raw statement seen, used for EXPLAIN
+        self.sample_parameters = None
+
+    @property
+    def mean_time(self):
+        return self.total_time / self.count if self.count else 0.0
+
+    def to_dict(self):
+        return {
+            'shape': self.shape,
+            'count': self.count,
+            'total_ms': round(self.total_time * 1000, 3),
+            'mean_ms': round(self.mean_time * 1000, 3),
+            'max_ms': round(self.max_time * 1000, 3),
+        }
+
+
+class QueryRecorder:
+    """Records normalized statement shapes executed on an engine with their counts and latencies."""
+
+    def __init__(self, engine, max_shapes=1000):
+        self.engine = engine
+        self.max_shapes = max_shapes  # Bound on distinct shapes kept, so ad-hoc SQL cannot grow memory forever
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.enabled = False
+
+    def start(self):
+        """Attach the cursor execution listeners to the engine."""
+        if not self.enabled:
+            event.listen(self.engine, 'before_cursor_execute', self._before_execute)
+            event.listen(self.engine, 'after_cursor_execute', self._after_execute)
+            self.enabled = True
+
+    def stop(self):
+        """Detach the listeners; recorded statistics are kept."""
+        if self.enabled:
+            event.remove(self.engine, 'before_cursor_execute', self._before_execute)
+            event.remove(self.engine, 'after_cursor_execute', self._after_execute)
+            self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self.stats = {}
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self._local.started = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(self._local, 'started', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        self._local.started = None
+        shape = normalize_statement(statement)
+        with self._lock:
+            stats = self.stats.get(shape)
+            if stats is None:
+                if len(self.stats) >= self.max_shapes:
+                    return
+                stats = self.stats[shape] = ShapeStats(shape)
+            stats.count += 1
+            stats.total_time += elapsed
+            stats.max_time = max(stats.max_time, elapsed)
+            if not executemany:
+                stats.sample_statement = statement
+                stats.sample_parameters = parameters
+
+    def save(self, path):
+        """Merge the recorded statistics into a JSON snapshot file so the CLI can read them from another process."""
+        snapshot = {}
+        if os.path.exists(path):
+            with open(path) as file:
+                snapshot = json.load(file)
+        with self._lock:
+            for shape, stats in self.stats.items():
+                entry = snapshot.setdefault(shape, {'count': 0, 'total_time': 0.0, 'max_time': 0.0})
+                entry['count'] += stats.count
+                entry['total_time'] += stats.total_time
+                entry['max_time'] = max(entry['max_time'], stats.max_time)
+                if stats.sample_statement:
+                    entry['sample_statement'] = stats.sample_statement
+                    entry['sample_parameters'] = stats.sample_parameters
+        with open(path, 'w') as file:
+            json.dump(snapshot, file, default=str)
+
+    def load(self, path):
+        """Add the statistics from a snapshot written by save()."""
+        with open(path) as file:
+            snapshot = json.load(file)
+        with self._lock:
+            for shape, entry in snapshot.items():
+                stats = self.stats.setdefault(shape, ShapeStats(shape))
+                stats.count += entry['count']
+                stats.total_time += entry['total_time']
+                stats.max_time = max(stats.max_time, entry['max_time'])
+                stats.sample_statement = entry.get('sample_statement') or stats.sample_statement
+                parameters = entry.get('sample_parameters')
+                stats.sample_parameters = tuple(parameters) if isinstance(parameters, list) else parameters
+
+    def slowest(self, limit=10):
+        """Return the shapes with the highest total time, i.e. where tuning pays off most."""
+        with self._lock:
+            shapes = list(self.stats.values())
+        shapes.sort(key=lambda s: s.total_time, reverse=True)
+        return shapes[:limit]
+
+
+def explain(connection, statement, parameters=None):
+    """
+    Return the query plan for a statement as a list of text lines.
+
+    Uses EXPLAIN QUERY PLAN on SQLite and EXPLAIN everywhere else.
+    """
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.dialect.name == 'sqlite' else 'EXPLAIN '
+    result = connection.exec_driver_sql(prefix + statement, parameters or ())
+    return [' | '.join(str(value) for value in row) for row in result]
+
+
+class IndexRecommendation:
+    """A composite index suggested for one table."""
+
+    def __init__(self, table, columns, shapes):
+        self.table = table
+        self.columns = columns
+        self.shapes = shapes  # Statement shapes that motivated the recommendation
+
+    @property
+    def name(self):
+        return f"ix_{self.table}_{'_'.join(self.columns)}"
+
+    def __repr__(self):
+        return f"<IndexRecommendation {self.name}>"
+
+
+def _candidate_columns(shape, table):
+    """Return the index columns a shape would benefit from on the given table: equality first, then range/sort."""
+    where = _WHERE.search(shape)
+    order = _ORDER_BY.search(shape)
+    equality, trailing = [], []
+    if where:
+        clause = where.group(1)
+        equality = [col for tbl, col in _EQUALITY.findall(clause) if tbl == table]
+        trailing = [col for tbl, col in _COLUMN.findall(clause) if tbl == table and col not in equality]
+    if order:
+        trailing += [col for tbl, col in _COLUMN.findall(order.group(1)) if tbl == table]
+    columns = []
+    for col in equality + trailing:
+        if col not in columns:
+            columns.append(col)
+    return columns[:MAX_INDEX_COLUMNS]
+
+
+def _existing_prefixes(engine, table):
+    """Column lists of the primary key and every index on a table."""
+    inspector = inspect(engine)
+    prefixes = [inspector.get_pk_constraint(table).get('constrained_columns') or []]
+    prefixes += [index['column_names'] for index in inspector.get_indexes(table)]
+    prefixes += [constraint['column_names'] for constraint in inspector.get_unique_constraints(table)]
+    return prefixes
+
+
+def recommend_indexes(engine, shapes):
+    """
+    Recommend composite indexes for the given statement shapes.
+
+    A recommendation is dropped when an existing index already starts with the
+    same columns, or when it is a prefix of another recommendation for the table.
+
+    Args:
+        engine (Engine): Engine whose schema is inspected for existing indexes.
+        shapes (list): ShapeStats to analyse, typically QueryRecorder.slowest().
+
+    Returns:
+        list: IndexRecommendation objects.
+    """
+    tables = set(inspect(engine).get_table_names())
+    wanted = {}
+    for stats in shapes:
+        if not stats.shape.upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+            continue
+        for table in {tbl for tbl, _ in _COLUMN.findall(stats.shape)} & tables:
+            columns = tuple(_candidate_columns(stats.shape, table))
+            if columns:
+                wanted.setdefault((table, columns), []).append(stats.shape)
+
+    recommendations = []
+    for (table, columns), motivating in wanted.items():
+        covered = any(tuple(existing[:len(columns)]) == columns for existing in _existing_prefixes(engine, table))
+        subsumed = any(other_table == table and other != columns and other[:len(columns)] == columns
+                       for other_table, other in wanted)
+        if not covered and not subsumed:
+            recommendations.append(IndexRecommendation(table, list(columns), motivating))
+    return recommendations
+
+
+def create_index_ddl(dialect, recommendation):
+    """CREATE INDEX statement for a recommendation, quoted for the given SQL dialect."""
+    table = Table(recommendation.table, MetaData(), *[Column(column) for column in recommendation.columns])
+    index = Index(recommendation.name, *[table.c[column] for column in recommendation.columns])
+    return str(CreateIndex(index).compile(dialect=dialect)).strip()
+
+
+def render_sql(recommendations, dialect):
+    """
+    Render a SQL script that creates the recommended indexes.
+
+    Used when there is no Alembic environment to add a migration to.
+
+    Args:
+        recommendations (list): IndexRecommendation objects.
+        dialect (Dialect): Dialect of the target database, e.g. engine.dialect.
+
+    Returns:
+        str: One CREATE INDEX statement per recommendation.
+    """
+    lines = [f"-- Indexes recommended by the query advisor ({dialect.name})",
+             f"-- Generated: {datetime.utcnow().isoformat()}", '']
+    lines += [f"{create_index_ddl(dialect, rec)};" for rec in recommendations] or ['-- No indexes recommended']
+    return '\n'.join(lines) + '\n'
+
+
+def render_migration(recommendations, down_revision, revision=None):
+    """
+    Render an Alembic migration script that creates the recommended indexes.
+
+    Args:
+        recommendations (list): IndexRecommendation objects.
+        down_revision (str): Current Alembic head the migration revises.
+        revision (str): Revision id; defaults to a timestamp.
+
+    Returns:
+        str: Python source of the migration.
+    """
+    revision = revision or datetime.utcnow().strftime('%Y%m%d%H%M%S')
+
+    upgrade = '\n'.join(
+        f"    op.create_index({rec.name!r}, {rec.table!r}, {rec.columns!r})" for rec in recommendations
+    ) or '    pass'
+    downgrade = '\n'.join(
+        f"    op.drop_index({rec.name!r}, table_name={rec.table!r})" for rec in reversed(recommendations)
+    ) or '    pass'
+    return f'''"""Add indexes recommended by the query advisor
+
+Revision ID: {revision}
+Revises: {down_revision}
+Create Date: {datetime.utcnow().isoformat()}
+"""
+
+from alembic import op
+
+revision = {revision!r}
+down_revision = {down_revision!r}
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+{upgrade}
+
+
+def downgrade():
+{downgrade}
+'''
+
+
+def alembic_head(migrations_dir):
+    """
+    Current head revision of an Alembic migrations directory.
+
+    Returns:
+        str: The head revision, or None when Alembic is not installed, the directory
+        is not an Alembic environment, or it has no single head.
+    """
+    try:
+        from alembic.script import ScriptDirectory
+        return ScriptDirectory(migrations_dir).get_current_head()
+    except Exception:
+        return None
+
+
+def compare_plans(engine, shapes, recommendations):
+    """
+    EXPLAIN each shape before and after creating the recommended indexes.
+
+    The indexes are created inside a transaction that is always rolled back, so
+    this is only meaningful on databases with transactional DDL (PostgreSQL, SQLite).
+
+    Returns:
+        list: Dicts with 'shape', 'before' and 'after' plan lines.
+    """
+    explainable = [s for s in shapes if s.sample_statement and s.shape.upper().startswith('SELECT')]
+    comparisons = []
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            before = [explain(connection, s.sample_statement, s.sample_parameters) for s in explainable]
+            for rec in recommendations:
+                connection.execute(text(create_index_ddl(engine.dialect, rec)))
+            after = [explain(connection, s.sample_statement, s.sample_parameters) for s in explainable]
+        finally:
+            transaction.rollback()
+    for stats, plan_before, plan_after in zip(explainable, before, after):
+        comparisons.append({'shape': stats.shape, 'before': plan_before, 'after': plan_after})
+    return comparisons
+
+
+def render_report(shapes, recommendations, comparisons):
+    """Render a plain-text report of the slowest shapes, recommended indexes and plan changes."""
+    lines = ['Query advisor report', f"Generated: {datetime.utcnow().isoformat()}", '', 'Slowest statement shapes:']
+    for stats in shapes:
+        d = stats.to_dict()
+        lines.append(f"  {d['total_ms']:>10} ms total  {d['count']:>8} calls  {d['mean_ms']:>8} ms mean  {d['shape']}")
+    lines += ['', 'Recommended indexes:']
+    lines += [f"  {rec.name} ON {rec.table} ({', '.join(rec.columns)})" for rec in recommendations] or ['  none']
+    for comparison in comparisons:
+        lines += ['', f"Plan for: {comparison['shape']}", '  Before:']
+        lines += [f"    {line}" for line in comparison['before']]
+        lines += ['  After:']
+        lines += [f"    {line}" for line in comparison['after']]
+    return '\n'.join(lines) + '\n'
+
+
+def register_query_recorder(app, db):
+    """
+    Attach a QueryRecorder to the app's engine and register the `advise-indexes` CLI command.
+
+    The recorder is stored in app.extensions['query_recorder'].
+
+    The indexes go into an Alembic migration at QUERY_ADVISOR_MIGRATION_PATH revising
+    QUERY_ADVISOR_DOWN_REVISION, or else the head of the Alembic environment in
+    QUERY_ADVISOR_MIGRATIONS_DIR (default 'migrations'). Without either, they are
+    written as CREATE INDEX statements to QUERY_ADVISOR_SQL_PATH instead.
+    """
+    with app.app_context():
+        recorder = QueryRecorder(db.engine, max_shapes=app.config.get('QUERY_RECORDER_MAX_SHAPES', 1000))
+    recorder.start()
+    app.extensions['query_recorder'] = recorder
+
+    # Statistics are snapshotted at exit so `flask advise-indexes` can analyse a previous run
+    snapshot_path = app.config.get('QUERY_RECORDER_SNAPSHOT_PATH', 'query_shapes.json')
+    atexit.register(recorder.save, snapshot_path)
+
+    @app.cli.command('advise-indexes')
+    def advise_indexes():
+        """Write the recommended indexes and a plan comparison report from the recorded query shapes."""
+        recorder.stop()
+        # This process only reads the snapshot; saving it again at exit would double every count
+        atexit.unregister(recorder.save)
+        recorder.reset()
+        if os.path.exists(snapshot_path):
+            recorder.load(snapshot_path)
+        shapes = recorder.slowest(app.config.get('QUERY_ADVISOR_TOP_SHAPES', 10))
+        recommendations = recommend_indexes(db.engine, shapes)
+        comparisons = compare_plans(db.engine, shapes, recommendations)
+
+        report_path = app.config.get('QUERY_ADVISOR_REPORT_PATH', 'query_advisor_report.txt')
+        down_revision = app.config.get('QUERY_ADVISOR_DOWN_REVISION') or alembic_head(
+            app.config.get('QUERY_ADVISOR_MIGRATIONS_DIR', 'migrations'))
+        if down_revision:
+            output_path = app.config.get('QUERY_ADVISOR_MIGRATION_PATH', 'advisor_indexes_migration.py')
+            output = render_migration(recommendations, down_revision)
+        else:
+            # No Alembic environment to add a migration to; write DDL that applies as is
+            output_path = app.config.get('QUERY_ADVISOR_SQL_PATH', 'advisor_indexes.sql')
+            output = render_sql(recommendations, db.engine.dialect)
+        for path in (output_path, report_path):
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(output_path, 'w') as file:
+            file.write(output)
+        with open(report_path, 'w') as file:
+            file.write(render_report(shapes, recommendations, comparisons))
+        print(f"{len(recommendations)} index(es) recommended. "
+              f"{'Migration' if down_revision else 'SQL'}: {output_path}. Report: {report_path}.")
+
+    return recorder
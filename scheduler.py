@@ -2,19 +2,38 @@
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from services.invoice_reminder_service import send_reminders_for_unpaid_invoices
+from services.invoice_service import transition_overdue_invoices
+from services.email_service import start_outbox_workers
+from services.webhook_service import start_webhook_workers
 from app import create_app
 
+def run_in_app_context(app, func, *args, **kwargs):
+    """Run a scheduled job inside the application context it needs for database access."""
+    with app.app_context():
+        return func(*args, **kwargs)
+
 def start_scheduler():
     """Start the background scheduler for sending reminders."""
     app = create_app()
     scheduler = BackgroundScheduler()
     
     # Schedule the reminder function to run every day at midnight
-    scheduler.add_job(send_reminders_for_unpaid_invoices, 'interval', days=1, id='send_reminders', replace_existing=True)
+    scheduler.add_job(run_in_app_context, 'interval', days=1, args=[app, send_reminders_for_unpaid_invoices],
+                      id='send_reminders', replace_existing=True)
+
+    # Flip past-due pending invoices to Overdue every hour
+    scheduler.add_job(run_in_app_context, 'interval', hours=1, args=[app, transition_overdue_invoices],
+                      id='transition_overdue_invoices', replace_existing=True, max_instances=1)
     
     # Start the scheduler
     scheduler.start()
 
+    # Deliver queued emails in the background
+    outbox_workers = start_outbox_workers(app)
+
+    # Process stored Stripe webhook events; run this in one process only, it owns every partition
+    webhook_workers = start_webhook_workers(app)
+
     # Keep the application running to listen for the scheduled tasks
     try:
         print("Scheduler started, running with application...")
@@ -22,3 +41,5 @@ def start_scheduler():
     except KeyboardInterrupt:
         print("Scheduler shut down!")
         scheduler.shutdown()
+        outbox_workers.stop()
+        webhook_workers.stop()
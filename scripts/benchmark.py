@@ -0,0 +1,379 @@
+# scripts/benchmark.py
+
+"""
+End-to-end HTTP benchmark of the main endpoints.
+
+Boots create_app against a database seeded at a chosen scale (see
+generate_test_data.py). It serves the app on a local threaded WSGI server and
+drives each endpoint in turn with concurrent logged-in clients. It reports
+throughput and p50/p95/p99 latency per endpoint, writes the results as JSON, and
+compares them with a stored baseline.
+
+The run fails (exit code 1) in any of these cases:
+- an endpoint's error rate exceeds --max-error-rate;
+- a requested endpoint is not registered (leave it out with --exclude instead);
+- an endpoint's p95 latency, throughput or error rate is worse than the baseline
+  by more than the threshold.
+A failing run is never saved as a baseline.
+
+billing.pay_invoice pays a different unpaid invoice with every request. Afterwards
+it checks that they were all marked paid. customer_portal.my_invoices clients log
+in as portal users created for the customers with the most invoices.
+
+    python scripts/benchmark.py --scale small --clients 8 --duration 20 \\
+        --output bench.json --baseline bench-baseline.json --threshold 0.15
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from datetime import datetime
+import requests
+from sqlalchemy import func, select
+from sqlalchemy.engine import make_url
+from werkzeug.security import generate_password_hash
+from werkzeug.serving import WSGIRequestHandler, make_server
+from app import create_app
+from models import db, User, Customer, Invoice, Role
+from billing.billing import PAYABLE_STATUSES
+from generate_test_data import generate_data, TEST_PASSWORD
+
+DEFAULT_ENDPOINTS = ['auth.login', 'billing.manage_invoices', 'billing.pay_invoice', 'customer_portal.my_invoices']
+VENDOR_POOL = 20  # Most active vendors (and most invoiced customers) the clients log in as
+MAX_ERROR_RATE = 0.01  # Error rate above which an endpoint fails the run
+
+
+class BenchmarkConfig:
+    SECRET_KEY = 'benchmark'
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    MAIL_DEFAULT_SENDER = 'benchmark@example.com'
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    """Skips the per-request access log, which would otherwise dominate the output."""
+
+    def log_request(self, code='-', size='-'):
+        pass
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class EndpointRun:
+    """Latencies and status codes recorded for one endpoint."""
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.latencies = []
+        self.statuses = {}
+        self.errors = 0
+        self.elapsed = 0.0
+        self.last_finished = None
+        self.exhausted = False  # Ran out of unpaid invoices before the duration ended
+        self.unpaid_after_request = 0  # Invoices still unpaid after a pay request
+        self._lock = threading.Lock()
+
+    def record(self, latency, status, finished):
+        with self._lock:
+            self.last_finished = max(finished, self.last_finished or finished)
+            self.latencies.append(latency)
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            if status >= 400 or status == 0:
+                self.errors += 1
+
+    def summary(self):
+        latencies = sorted(self.latencies)
+        return {
+            'requests': len(latencies),
+            'errors': self.errors,
+            'error_rate': round(self.errors / len(latencies), 4) if latencies else 0.0,
+            'throughput_rps': round(len(latencies) / self.elapsed, 2) if self.elapsed else 0.0,
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+            'statuses': {str(status): count for status, count in sorted(self.statuses.items())},
+            'exhausted': self.exhausted,
+            'unpaid_after_request': self.unpaid_after_request,
+        }
+
+
+class PayableInvoicesExhausted(Exception):
+    """Raised when every unpaid invoice has already been paid by the benchmark."""
+
+
+class Fixtures:
+    """Seeded accounts and invoices the clients use."""
+
+    def __init__(self, app):
+        with app.app_context():
+            vendor_ids = [row[0] for row in db.session.execute(
+                select(Invoice.user_id).group_by(Invoice.user_id)
+                .order_by(func.count().desc()).limit(VENDOR_POOL)
+            )]
+            users = db.session.execute(select(User.id, User.email).where(User.id.in_(vendor_ids))).all()
+            self.vendors = [(user_id, email) for user_id, email in users]
+            self.portal_users = self._ensure_portal_users()
+            # Shared by all clients; deque pops are atomic, so every pay request gets its own invoice
+            self.payable = deque(row[0] for row in db.session.execute(
+                select(Invoice.id).where(Invoice.status.in_(PAYABLE_STATUSES)).order_by(Invoice.id)))
+        self.requested = deque()  # Invoices a pay request was sent for
+        if not self.vendors:
+            raise SystemExit("The benchmark database has no invoices; seed it with --scale.")
+
+    @staticmethod
+    def _ensure_portal_users():
+        """Create (once) portal users sharing TEST_PASSWORD for the most invoiced customers."""
+        customers = db.session.execute(
+            select(Customer.id, Customer.email).join(Invoice, Invoice.customer_id == Customer.id)
+            .group_by(Customer.id, Customer.email).order_by(func.count().desc()).limit(VENDOR_POOL)
+        ).all()
+        emails = [email for _, email in customers]
+        existing = set(db.session.execute(select(User.email).where(User.email.in_(emails))).scalars())
+        missing = [(customer_id, email) for customer_id, email in customers if email not in existing]
+        if missing:
+            role_id = db.session.execute(select(Role.id).where(Role.name == 'user')).scalar()
+            password_hash = generate_password_hash(TEST_PASSWORD)
+            db.session.add_all([
+                User(username=f"portal{customer_id}", email=email, password_hash=password_hash, confirmed=True,
+                     active=True, role_id=role_id)
+                for customer_id, email in missing
+            ])
+            db.session.commit()
+        return [tuple(row) for row in db.session.execute(select(User.id, User.email).where(User.email.in_(emails)))]
+
+    def accounts(self, endpoint):
+        return self.portal_users if endpoint.startswith('customer_portal.') else self.vendors
+
+    def unpaid(self, invoice_ids):
+        """Number of the given invoices that are still unpaid."""
+        invoice_ids = list(invoice_ids)
+        return sum(
+            db.session.execute(select(func.count()).select_from(Invoice).where(
+                Invoice.id.in_(invoice_ids[start:start + 500]), Invoice.status.in_(PAYABLE_STATUSES))).scalar()
+            for start in range(0, len(invoice_ids), 500)
+        )
+
+
+def _login(session, base_url, email):
+    return session.post(f"{base_url}/login", data={'email': email, 'password': TEST_PASSWORD},
+                        allow_redirects=False)
+
+
+def make_request(endpoint, session, base_url, account, fixtures):
+    """Issue one request for an endpoint; returns the response."""
+    email = account[1]
+    if endpoint == 'auth.login':
+        return _login(requests.Session(), base_url, email)
+    if endpoint == 'billing.manage_invoices':
+        return session.get(f"{base_url}/invoices/manage", allow_redirects=False)
+    if endpoint == 'billing.pay_invoice':
+        try:
+            invoice_id = fixtures.payable.popleft()
+        except IndexError:
+            raise PayableInvoicesExhausted()
+        fixtures.requested.append(invoice_id)
+        return session.post(f"{base_url}/invoices/pay/{invoice_id}", allow_redirects=False)
+    if endpoint == 'customer_portal.my_invoices':
+        return session.get(f"{base_url}/my-invoices", allow_redirects=False)
+    raise ValueError(f"No request defined for endpoint {endpoint}")
+
+
+def drive(app, endpoint, base_url, fixtures, clients, duration, warmup):
+    """Run `clients` concurrent clients against one endpoint for `duration` seconds after a warmup."""
+    run = EndpointRun(endpoint)
+    start = threading.Barrier(clients + 1)
+    state = {'measure_from': 0.0, 'stop_at': 0.0}
+
+    accounts = fixtures.accounts(endpoint)
+    fixtures.requested.clear()
+
+    def client(index):
+        account = accounts[index % len(accounts)]
+        session = requests.Session()
+        if endpoint != 'auth.login':
+            _login(session, base_url, account[1])
+        start.wait()
+        while True:
+            started = time.perf_counter()
+            if started >= state['stop_at']:
+                break
+            try:
+                status = make_request(endpoint, session, base_url, account, fixtures).status_code
+            except PayableInvoicesExhausted:
+                run.exhausted = True
+                break
+            except requests.RequestException:
+                status = 0
+            finished = time.perf_counter()
+            if started >= state['measure_from']:
+                run.record(finished - started, status, finished)
+
+    threads = [threading.Thread(target=client, args=(index,), daemon=True) for index in range(clients)]
+    for thread in threads:
+        thread.start()
+    now = time.perf_counter()
+    state['measure_from'] = now + warmup
+    state['stop_at'] = now + warmup + duration
+    start.wait()
+    for thread in threads:
+        thread.join()
+    # Throughput over the measured window, which ends early if the unpaid invoices ran out
+    run.elapsed = max(0.0, (run.last_finished or state['measure_from']) - state['measure_from'])
+    if endpoint == 'billing.pay_invoice':
+        with app.app_context():
+            run.unpaid_after_request = fixtures.unpaid(fixtures.requested)
+    return run
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results with a baseline.
+
+    Returns:
+        list: Regression messages; empty when every endpoint is within the threshold.
+    """
+    regressions = []
+    for endpoint, current in results['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(endpoint)
+        if not previous or current.get('skipped') or previous.get('skipped'):
+            continue
+        if previous['p95_ms'] and current['p95_ms'] > previous['p95_ms'] * (1 + threshold):
+            regressions.append(f"{endpoint}: p95 {current['p95_ms']}ms vs baseline {previous['p95_ms']}ms")
+        if previous['throughput_rps'] and current['throughput_rps'] < previous['throughput_rps'] * (1 - threshold):
+            regressions.append(f"{endpoint}: throughput {current['throughput_rps']} rps vs baseline "
+                               f"{previous['throughput_rps']} rps")
+        if current['error_rate'] > previous['error_rate'] + threshold:
+            regressions.append(f"{endpoint}: error rate {current['error_rate']} vs baseline {previous['error_rate']}")
+    return regressions
+
+
+def check(results, max_error_rate=MAX_ERROR_RATE):
+    """
+    Check that every benchmarked endpoint was measured and succeeded.
+
+    Returns:
+        list: Failure messages; empty when the run is usable as results or as a baseline.
+    """
+    failures = []
+    for endpoint, summary in results['endpoints'].items():
+        if summary.get('skipped'):
+            failures.append(f"{endpoint}: not registered by create_app (use --exclude to leave it out)")
+            continue
+        if not summary['requests']:
+            failures.append(f"{endpoint}: no requests measured")
+        elif summary['error_rate'] > max_error_rate:
+            failures.append(f"{endpoint}: error rate {summary['error_rate']} above {max_error_rate} "
+                            f"(statuses {summary['statuses']})")
+        if summary['unpaid_after_request']:
+            failures.append(f"{endpoint}: {summary['unpaid_after_request']} invoices still unpaid after a pay request")
+        if summary['exhausted']:
+            print(f"{endpoint}: ran out of unpaid invoices; measured {summary['requests']} requests")
+    return failures
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_benchmark(database_url, scale, endpoints, clients, duration, warmup, seed, excluded=()):
+    BenchmarkConfig.SQLALCHEMY_DATABASE_URI = database_url
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        db.create_all()
+        if scale and not db.session.execute(select(func.count()).select_from(Invoice)).scalar():
+            generate_data(scale, seed=seed)
+    fixtures = Fixtures(app)
+
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    results = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'scale': scale,
+            'database': make_url(database_url).render_as_string(hide_password=True),
+            'clients': clients,
+            'duration_s': duration,
+            'python': platform.python_version(),
+            'excluded': list(excluded),
+        },
+        'endpoints': {},
+    }
+    try:
+        for endpoint in [endpoint for endpoint in endpoints if endpoint not in excluded]:
+            if endpoint not in app.view_functions:
+                print(f"{endpoint}: not registered by create_app, skipped")
+                results['endpoints'][endpoint] = {'skipped': True}
+                continue
+            summary = drive(app, endpoint, base_url, fixtures, clients, duration, warmup).summary()
+            results['endpoints'][endpoint] = summary
+            print(f"{endpoint:32} {summary['throughput_rps']:8.1f} rps  p50 {summary['p50_ms']:7.1f}ms  "
+                  f"p95 {summary['p95_ms']:7.1f}ms  p99 {summary['p99_ms']:7.1f}ms  errors {summary['errors']}")
+    finally:
+        server.shutdown()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='HTTP benchmark of the main endpoints.')
+    parser.add_argument('--database', help='Database URL; defaults to a fresh SQLite file.')
+    parser.add_argument('--scale', choices=['small', 'medium', 'large'], default='small',
+                        help='Data profile to seed when the database has no invoices.')
+    parser.add_argument('--endpoints', nargs='+', default=DEFAULT_ENDPOINTS)
+    parser.add_argument('--exclude', nargs='+', default=[], help='Endpoints deliberately left out of the run.')
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent clients per endpoint.')
+    parser.add_argument('--duration', type=float, default=20, help='Measured seconds per endpoint.')
+    parser.add_argument('--warmup', type=float, default=3, help='Unmeasured seconds per endpoint.')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--baseline', help='Baseline results JSON to compare against.')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Allowed relative regression, e.g. 0.10.')
+    parser.add_argument('--max-error-rate', type=float, default=MAX_ERROR_RATE,
+                        help='Error rate above which an endpoint fails the run.')
+    parser.add_argument('--save-baseline', action='store_true', help='Also write the results to --baseline.')
+    args = parser.parse_args()
+
+    database_url = args.database or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'benchmark.db')}"
+    results = run_benchmark(database_url, args.scale, args.endpoints, args.clients, args.duration, args.warmup,
+                            args.seed, excluded=args.exclude)
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=2)
+    print(f"Results written to {args.output}.")
+
+    failures = check(results, args.max_error_rate)
+    for message in failures:
+        print(f"FAILED {message}")
+    if failures:
+        if args.save_baseline:
+            print("Not saving a baseline from a failing run.")
+        sys.exit(1)
+
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump(results, file, indent=2)
+        print(f"Baseline written to {args.baseline}.")
+    elif args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}.")
@@ -1,76 +1,103 @@
 # scripts/export_data.py
 
-import csv
+import argparse
+import os
+from datetime import datetime
 from app import create_app
-from models import db, User, Customer
+from services.export_service import export_to_csv, export_delta_csv, EXPORT_DATASETS
 
 def export_users_to_csv(file_path='exported_users.csv'):
     """
-    Export user data to a CSV file.
-    
+    Export user data to a CSV file, streaming rows instead of loading the table.
+
     Args:
         file_path (str): Path to the CSV file where the user data will be saved.
     """
-    users = User.query.all()
+    rows = export_to_csv('users', file_path)
+    print(f"User data has been exported to {file_path} ({rows} rows).")
 
-    # Define the header
-    fieldnames = ['id', 'username', 'email', 'role', 'confirmed', 'active', 'created_at']
 
-    # Open the file and write data
-    with open(file_path, mode='w', newline='') as file:
-        writer = csv.DictWriter(file, fieldnames=fieldnames)
-        writer.writeheader()
+def export_customers_to_csv(file_path='exported_customers.csv'):
+    """
+    Export customer data to a CSV file, streaming rows instead of loading the table.
 
-        for user in users:
-            writer.writerow({
-                'id': user.id,
-                'username': user.username,
-                'email': user.email,
-                'role': user.role,
-                'confirmed': user.confirmed,
-                'active': user.active,
-                'created_at': user.created_at
-            })
+    Args:
+        file_path (str): Path to the CSV file where the customer data will be saved.
+    """
+    rows = export_to_csv('customers', file_path)
+    print(f"Customer data has been exported to {file_path} ({rows} rows).")
 
-    print(f"User data has been exported to {file_path}.")
 
+def export_invoices_to_csv(file_path='exported_invoices.csv', vendor_id=None, date_from=None, date_to=None):
+    """
+    Export invoice data to a CSV file, streaming rows instead of loading the table.
 
-def export_customers_to_csv(file_path='exported_customers.csv'):
+    Args:
+        file_path (str): Path to the CSV file where the invoice data will be saved.
+        vendor_id (int): Only export this vendor's invoices.
+        date_from (datetime): Only export invoices issued on or after this date.
+        date_to (datetime): Only export invoices issued on or before this date.
     """
-    Export customer data to a CSV file.
-    
+    rows = export_to_csv('invoices', file_path, vendor_id=vendor_id, date_from=date_from, date_to=date_to)
+    print(f"Invoice data has been exported to {file_path} ({rows} rows).")
+
+
+def export_columnar_data(output_dir='exports', file_format='parquet'):
+    """
+    Export users, customers and invoices as typed Parquet or Arrow IPC files.
+
+    Invoices are partitioned by vendor and issue month under output_dir/invoices/.
+
     Args:
-        file_path (str): Path to the CSV file where the customer data will be saved.
+        output_dir (str): Directory the files are written under.
+        file_format (str): 'parquet' or 'arrow'.
     """
-    customers = Customer.query.all()
+    from services.columnar_export import export_columnar  # Needs pyarrow, only required for this mode
+
+    for dataset in ('users', 'customers', 'invoices'):
+        written = export_columnar(dataset, output_dir, file_format=file_format)
+        print(f"{dataset.capitalize()} data has been exported to {len(written)} {file_format} files under "
+              f"{output_dir} ({sum(written.values())} rows).")
 
-    # Define the header
-    fieldnames = ['id', 'name', 'email', 'phone', 'address', 'created_at']
 
-    # Open the file and write data
-    with open(file_path, mode='w', newline='') as file:
-        writer = csv.DictWriter(file, fieldnames=fieldnames)
-        writer.writeheader()
+def export_deltas_to_csv(output_dir='.'):
+    """
+    Export the users, customers and invoices changed or deleted since the previous delta run.
 
-        for customer in customers:
-            writer.writerow({
-                'id': customer.id,
-                'name': customer.name,
-                'email': customer.email,
-                'phone': customer.phone,
-                'address': customer.address,
-                'created_at': customer.created_at
-            })
+    Each dataset is written to exported_<dataset>_delta_<cutoff>.csv, and its watermark
+    advances only once the file is complete.
 
-    print(f"Customer data has been exported to {file_path}.")
+    Args:
+        output_dir (str): Directory the delta files are written to.
+    """
+    for dataset in EXPORT_DATASETS:
+        path = os.path.join(output_dir, f"exported_{dataset}_delta_{datetime.utcnow():%Y%m%dT%H%M%S}.csv")
+        result = export_delta_csv(dataset, path)
+        print(f"{dataset.capitalize()} delta has been exported to {path} "
+              f"({result['upserts']} changed, {result['deletes']} deleted).")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Export users, customers and invoices.')
+    parser.add_argument('--format', choices=['csv', 'parquet', 'arrow'], default='csv')
+    parser.add_argument('--output-dir', default='exports', help='Output directory for parquet and arrow exports.')
+    parser.add_argument('--delta', action='store_true',
+                        help='CSV only: export rows changed since the last delta run, with tombstones.')
+    args = parser.parse_args()
+
     # Create the Flask app and context
     app = create_app()
     with app.app_context():
-        # Export user data
-        export_users_to_csv()
+        if args.format != 'csv':
+            export_columnar_data(args.output_dir, args.format)
+        elif args.delta:
+            export_deltas_to_csv()
+        else:
+            # Export user data
+            export_users_to_csv()
+
+            # Export customer data
+            export_customers_to_csv()
 
-        # Export customer data
-        export_customers_to_csv()
+            # Export invoice data
+            export_invoices_to_csv()
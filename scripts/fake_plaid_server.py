@@ -0,0 +1,158 @@
+# scripts/fake_plaid_server.py
+
+"""
+Local stand-in for the Plaid API, for tests and latency benchmarks.
+
+Implements the endpoints services/plaid_service.py uses with canned sandbox-style
+responses and a configurable per-request latency. Point the app at it with
+PLAID_BASE_URL, e.g.:
+
+    python scripts/fake_plaid_server.py --port 8765 --latency 0.15
+    PLAID_BASE_URL=http://127.0.0.1:8765 flask run
+
+or benchmark the bank-linking flow against it in-process:
+
+    python scripts/fake_plaid_server.py --benchmark 50 --latency 0.15
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakePlaidHandler(BaseHTTPRequestHandler):
+    """Serves canned Plaid responses after the server's configured latency."""
+
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like the real API
+    disable_nagle_algorithm = True  # Headers and body are separate writes; don't let Nagle delay the body
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        time.sleep(self.server.latency)
+        self.server.requests += 1
+
+        routes = {
+            '/link/token/create': self.link_token_create,
+            '/item/public_token/exchange': self.public_token_exchange,
+            '/item/get': self.item_get,
+            '/auth/get': self.auth_get,
+            '/accounts/get': self.auth_get,
+        }
+        handler = routes.get(self.path)
+        if handler is None:
+            return self.reply(404, self.error('INVALID_REQUEST', 'UNKNOWN_ENDPOINT', f"unknown endpoint {self.path}"))
+        if not self.headers.get('PLAID-CLIENT-ID'):
+            return self.reply(400, self.error('INVALID_REQUEST', 'MISSING_FIELDS', 'client_id must be provided'))
+        status, payload = handler(body)
+        self.reply(status, payload)
+
+    def error(self, error_type, error_code, message):
+        return {'error_type': error_type, 'error_code': error_code, 'error_message': message,
+                'request_id': uuid.uuid4().hex}
+
+    def link_token_create(self, body):
+        return 200, {'link_token': f"link-sandbox-{uuid.uuid4()}", 'expiration': '2099-01-01T00:00:00Z',
+                     'request_id': uuid.uuid4().hex}
+
+    def public_token_exchange(self, body):
+        public_token = body.get('public_token') or ''
+        if not public_token.startswith('public-'):
+            return 400, self.error('INVALID_INPUT', 'INVALID_PUBLIC_TOKEN', 'provided public token is in an invalid format')
+        suffix = public_token[len('public-'):]
+        return 200, {'access_token': f"access-{suffix}", 'item_id': f"item-{suffix}", 'request_id': uuid.uuid4().hex}
+
+    def item_get(self, body):
+        item_id = body.get('access_token', '').replace('access-', 'item-', 1)
+        return 200, {'item': {'item_id': item_id, 'institution_id': 'ins_109508', 'products': ['auth']},
+                     'request_id': uuid.uuid4().hex}
+
+    def auth_get(self, body):
+        account_id = f"acct-{body.get('access_token', '')[-8:]}"
+        return 200, {
+            'accounts': [{'account_id': account_id, 'mask': '0000', 'name': 'Plaid Checking',
+                          'type': 'depository', 'subtype': 'checking'}],
+            'numbers': {'ach': [{'account_id': account_id, 'account': '1111222233330000',
+                                 'routing': '011401533', 'wire_routing': '021000021'}]},
+            'request_id': uuid.uuid4().hex,
+        }
+
+    def reply(self, status, payload):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_fake_plaid(host='127.0.0.1', port=0, latency=0.0):
+    """
+    Start the fake Plaid server on a background thread.
+
+    Returns:
+        tuple: (server, base_url). Call server.shutdown() to stop it.
+    """
+    ThreadingHTTPServer.daemon_threads = True
+    server = ThreadingHTTPServer((host, port), FakePlaidHandler)
+    server.latency = latency
+    server.requests = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+def benchmark_bank_linking(iterations, latency):
+    """Time fetch_bank_account against the fake server and print latency percentiles."""
+    from app import create_app
+    from services.plaid_service import fetch_bank_account
+
+    server, base_url = start_fake_plaid(latency=latency)
+
+    class BenchmarkConfig:
+        SQLALCHEMY_DATABASE_URI = 'sqlite://'  # The Plaid calls need no database
+        PLAID_BASE_URL = base_url
+        PLAID_CLIENT_ID = 'fake-client'
+        GATEWAY_PLAID_RATE = (1000, 1000)  # Measure latency, not the client-side rate limit
+
+    app = create_app(BenchmarkConfig)
+
+    timings = []
+    with app.app_context():
+        for index in range(iterations):
+            started = time.perf_counter()
+            fetch_bank_account(f"public-bench-{index:08d}")
+            timings.append(time.perf_counter() - started)
+    server.shutdown()
+
+    timings.sort()
+    print(f"{iterations} bank links, {latency * 1000:.0f}ms simulated Plaid latency:")
+    print(f"  p50 {statistics.median(timings) * 1000:.1f}ms, "
+          f"p95 {timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000:.1f}ms, "
+          f"sequential floor {3 * latency * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Local fake Plaid API server.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response.')
+    parser.add_argument('--benchmark', type=int, default=0, metavar='N',
+                        help='Instead of serving, time N bank links against an in-process server.')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark_bank_linking(args.benchmark, args.latency)
+    else:
+        server, base_url = start_fake_plaid(args.host, args.port, args.latency)
+        print(f"Fake Plaid listening on {base_url}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
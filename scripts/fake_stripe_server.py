@@ -0,0 +1,172 @@
+# scripts/fake_stripe_server.py
+
+"""
+Local stand-in for the Stripe API, for tests and provisioning benchmarks.
+
+Implements the endpoints services/stripe_service.py uses, with a configurable
+per-request latency. Like Stripe, it replays the stored response for a repeated
+Idempotency-Key and rejects a reused key whose parameters differ with an
+idempotency_error. Point the app at it with STRIPE_API_BASE, e.g.:
+
+    python scripts/fake_stripe_server.py --port 8766 --latency 0.2
+    STRIPE_API_BASE=http://127.0.0.1:8766 flask provision-stripe-customers
+
+or benchmark bulk provisioning against it in-process:
+
+    python scripts/fake_stripe_server.py --benchmark 2000 --latency 0.2 --workers 16
+"""
+
+import argparse
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+_SOURCES_PATH = re.compile(r"^/v1/customers/(?P<customer>[^/]+)/sources$")
+
+
+class FakeStripeHandler(BaseHTTPRequestHandler):
+    """Serves Stripe-shaped responses after the server's configured latency."""
+
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like the real API
+    disable_nagle_algorithm = True  # Headers and body are separate writes; don't let Nagle delay the body
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        params = sorted(parse_qsl(self.rfile.read(length).decode('utf-8'), keep_blank_values=True))
+        time.sleep(self.server.latency)
+
+        if not self.headers.get('Authorization', '').startswith('Bearer '):
+            return self.reply(401, self.error('invalid_request_error', 'You did not provide an API key.'))
+        if self.path == '/v1/customers':
+            handler = self.create_customer
+        elif _SOURCES_PATH.match(self.path):
+            handler = self.create_source
+        else:
+            return self.reply(404, self.error('invalid_request_error', f"Unrecognized request URL (POST: {self.path})."))
+
+        key = self.headers.get('Idempotency-Key')
+        with self.server.lock:
+            self.server.requests += 1
+            stored = self.server.idempotency.get(key) if key else None
+            if stored is not None:
+                if stored[0] != (self.path, params):
+                    return self.reply(400, self.error(
+                        'idempotency_error',
+                        "Keys for idempotent requests can only be used with the same parameters they were first "
+                        f"used with. Try using a key other than '{key}' if you meant to execute a different request."))
+                self.server.replays += 1
+                return self.reply(*stored[1], replayed=True)
+            status, payload = handler(dict(params))
+            if key:
+                self.server.idempotency[key] = ((self.path, params), (status, payload))
+        self.reply(status, payload)
+
+    def error(self, error_type, message):
+        return {'error': {'type': error_type, 'message': message}}
+
+    def create_customer(self, params):
+        self.server.customers += 1
+        metadata = {name[len('metadata['):-1]: value for name, value in params.items() if name.startswith('metadata[')}
+        return 200, {'id': f"cus_{uuid.uuid4().hex[:14]}", 'object': 'customer', 'email': params.get('email'),
+                     'name': params.get('name'), 'metadata': metadata, 'livemode': False}
+
+    def create_source(self, params):
+        customer = _SOURCES_PATH.match(self.path).group('customer')
+        return 200, {'id': f"ba_{uuid.uuid4().hex[:14]}", 'object': 'bank_account', 'customer': customer,
+                     'last4': (params.get('source[account_number]') or '')[-4:], 'status': 'new',
+                     'account_holder_name': params.get('source[account_holder_name]')}
+
+    def reply(self, status, payload, replayed=False):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Request-Id', f"req_{uuid.uuid4().hex[:14]}")
+        if replayed:
+            self.send_header('Idempotent-Replayed', 'true')
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_fake_stripe(host='127.0.0.1', port=0, latency=0.0):
+    """
+    Start the fake Stripe server on a background thread.
+
+    The server counts requests, customers created and idempotent replays in its
+    requests, customers and replays attributes.
+
+    Returns:
+        tuple: (server, base_url). Call server.shutdown() to stop it.
+    """
+    ThreadingHTTPServer.daemon_threads = True
+    server = ThreadingHTTPServer((host, port), FakeStripeHandler)
+    server.latency = latency
+    server.lock = threading.Lock()
+    server.idempotency = {}  # Idempotency key -> ((path, params), (status, payload))
+    server.requests = 0
+    server.customers = 0
+    server.replays = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+def benchmark_provisioning(customers, latency, workers):
+    """Provision Stripe customers for a fresh database against the fake server and print the throughput."""
+    from sqlalchemy import insert
+    from app import create_app, db
+    from models import Customer
+    from services.stripe_provisioning import provision_stripe_customers
+
+    server, base_url = start_fake_stripe(latency=latency)
+    database_path = os.path.join(tempfile.mkdtemp(), 'provisioning.db')
+
+    class BenchmarkConfig:
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{database_path}"  # Worker threads need a shared database
+        STRIPE_SECRET_KEY = 'sk_test_fake'
+        STRIPE_API_BASE = base_url
+        GATEWAY_STRIPE_RATE = (100000, 100000)  # Measure the pipeline, not the client-side rate limit
+        GATEWAY_POOL_SIZE = workers
+
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(Customer), [
+            {'name': f"Customer {index}", 'email': f"customer{index}@example.com"} for index in range(customers)
+        ])
+        db.session.commit()
+        stats = provision_stripe_customers(app, workers=workers)
+    server.shutdown()
+
+    print(f"{stats.created} Stripe customers in {stats.elapsed:.1f}s with {workers} workers and "
+          f"{latency * 1000:.0f}ms simulated Stripe latency: {stats.per_hour:,}/hour "
+          f"({stats.failed} failed, {server.customers} created by the fake).")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Local fake Stripe API server.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response.')
+    parser.add_argument('--benchmark', type=int, default=0, metavar='N',
+                        help='Instead of serving, provision N customers against an in-process server.')
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent Stripe calls for --benchmark.')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark_provisioning(args.benchmark, args.latency, args.workers)
+    else:
+        server, base_url = start_fake_stripe(args.host, args.port, args.latency)
+        print(f"Fake Stripe listening on {base_url}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
@@ -1,97 +1,258 @@
 # scripts/generate_test_data.py
 
+"""
+High-volume synthetic data for load testing.
+
+Rows are built in batches on a process pool and written with Core bulk INSERTs.
+No ORM objects are created, and every user shares one precomputed password hash,
+so no PBKDF2 runs per user. Each batch owns a fixed id range and is seeded from
+(--seed, table, batch number). The same seed and profile therefore always produce
+the same data, whatever the worker count.
+
+Use a file-based or server database; workers open their own connections.
+
+    python scripts/generate_test_data.py --profile medium --workers 8 --seed 42
+"""
+
+import argparse
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
 from faker import Faker
+from sqlalchemy import create_engine, func, insert, select, text
+from werkzeug.security import generate_password_hash
 from app import create_app
-from models import db, User, Customer, Invoice
-from datetime import datetime, timedelta
-import random
+from models import db, User, Customer, Invoice, Role
 
-def generate_users(num_users=10):
-    """
-    Generate a specified number of test users and add them to the database.
-    
-    Args:
-        num_users (int): Number of test users to generate.
-    """
-    fake = Faker()
-    roles = ['user', 'admin']  # Different user roles
+# Rows per table for each scale profile
+PROFILES = {
+    'small': {'users': 100, 'customers': 2000, 'invoices': 10000},
+    'medium': {'users': 2000, 'customers': 100000, 'invoices': 1000000},
+    'large': {'users': 10000, 'customers': 1000000, 'invoices': 10000000},
+}
 
-    for _ in range(num_users):
-        username = fake.user_name()
-        email = fake.email()
-        role = random.choice(roles)
+BATCH_SIZE = 10000  # Rows per INSERT batch (one task, one transaction)
+TEST_PASSWORD = "testpassword123"
+HISTORY_DAYS = 730  # Invoices are issued over the last two years
+PAYMENT_TERMS = [15, 30, 30, 30, 45, 60]  # Net days; 30 is the most common
+BILLING_METHODS = [('one-time', 0.70), ('subscription', 0.25), ('usage-based', 0.05)]
+TABLE_SEEDS = {'users': 1, 'customers': 2, 'invoices': 3}
 
-        user = User(username=username, email=email, role=role)
-        user.set_password("testpassword123")  # Set a default test password
+_engine = None  # Per-worker engine
 
-        db.session.add(user)
-    
-    db.session.commit()
-    print(f"Generated {num_users} users.")
 
-def generate_customers(num_customers=20):
-    """
-    Generate a specified number of test customers and add them to the database.
-    
-    Args:
-        num_customers (int): Number of test customers to generate.
-    """
+def _init_worker(database_url):
+    global _engine
+    _engine = create_engine(database_url)
+
+
+def _rng(seed, table, batch):
+    """Deterministic generators for one batch."""
+    batch_seed = (seed * 1000003 + TABLE_SEEDS[table]) * 1000003 + batch
     fake = Faker()
+    fake.seed_instance(batch_seed)
+    return random.Random(batch_seed), fake
+
+
+def _weighted(rng, choices):
+    point = rng.random()
+    for value, weight in choices:
+        point -= weight
+        if point < 0:
+            return value
+    return choices[-1][0]
+
 
-    for _ in range(num_customers):
-        name = fake.name()
-        email = fake.email()
-        phone = fake.phone_number()
-        address = fake.address()
+def build_users(seed, batch, start_id, count, context):
+    rng, fake = _rng(seed, 'users', batch)
+    now = context['now']
+    rows = []
+    for user_id in range(start_id, start_id + count):
+        created_at = now - timedelta(days=rng.randint(0, HISTORY_DAYS), seconds=rng.randint(0, 86399))
+        rows.append({
+            'id': user_id,
+            'username': f"{fake.user_name()[:36]}{user_id}",
+            'email': f"user{user_id}@{fake.free_email_domain()}",
+            'password_hash': context['password_hash'],
+            'confirmed': rng.random() < 0.9,
+            'created_at': created_at,
+            'updated_at': created_at,
+            'role_id': context['admin_role_id'] if rng.random() < 0.02 else context['user_role_id'],
+            'active': rng.random() < 0.97,
+        })
+    return rows
 
-        customer = Customer(name=name, email=email, phone=phone, address=address)
 
-        db.session.add(customer)
-    
+def build_customers(seed, batch, start_id, count, context):
+    rng, fake = _rng(seed, 'customers', batch)
+    now = context['now']
+    # Faker is slow per call; draw small pools once per batch and combine them
+    first_names = [fake.first_name() for _ in range(200)]
+    last_names = [fake.last_name() for _ in range(200)]
+    streets = [fake.street_address() for _ in range(200)]
+    cities = [f"{fake.city()}, {fake.state_abbr()} {fake.zipcode()}" for _ in range(100)]
+    rows = []
+    for customer_id in range(start_id, start_id + count):
+        first, last = rng.choice(first_names), rng.choice(last_names)
+        created_at = now - timedelta(days=rng.randint(0, HISTORY_DAYS), seconds=rng.randint(0, 86399))
+        rows.append({
+            'id': customer_id,
+            'name': f"{first} {last}",
+            'email': f"{first.lower()}.{last.lower()}.{customer_id}@example.com",
+            'phone': f"{rng.randint(200, 999)}-{rng.randint(200, 999)}-{rng.randint(0, 9999):04d}",
+            'address': f"{rng.choice(streets)}, {rng.choice(cities)}",
+            'created_at': created_at,
+            'updated_at': created_at,
+            'active': rng.random() < 0.95,
+        })
+    return rows
+
+
+def build_invoices(seed, batch, start_id, count, context):
+    rng, fake = _rng(seed, 'invoices', batch)
+    now = context['now']
+    first_user, users = context['first_user_id'], context['users']
+    first_customer, customers = context['first_customer_id'], context['customers']
+    descriptions = [fake.sentence(nb_words=6) for _ in range(100)]
+    rows = []
+    for invoice_id in range(start_id, start_id + count):
+        # Volume grows over time: the square root skews issue dates toward the present
+        issue_date = now - timedelta(days=int(HISTORY_DAYS * (1 - math.sqrt(rng.random()))),
+                                     seconds=rng.randint(0, 86399))
+        due_date = issue_date + timedelta(days=rng.choice(PAYMENT_TERMS))
+        if due_date > now:
+            status = 'Paid' if rng.random() < 0.25 else 'Pending'
+        else:
+            status = _weighted(rng, [('Paid', 0.85), ('Overdue', 0.10), ('Cancelled', 0.05)])
+        # Log-normal amounts: median around $250 with a long tail of large invoices
+        amount = round(min(50000.0, max(5.0, rng.lognormvariate(5.5, 1.0))), 2)
+        rows.append({
+            'id': invoice_id,
+            'invoice_number': f"INV-{invoice_id:010d}",
+            'amount': amount,
+            'status': status,
+            'issue_date': issue_date,
+            'due_date': due_date,
+            'description': rng.choice(descriptions),
+            'billing_method': _weighted(rng, BILLING_METHODS),
+            'updated_at': max(issue_date, min(due_date, now)) if status != 'Pending' else issue_date,
+            # A few large vendors issue most invoices: cubing skews toward the first vendors
+            'user_id': first_user + int(users * rng.random() ** 3),
+            'customer_id': first_customer + rng.randrange(customers),
+        })
+    return rows
+
+
+BUILDERS = {
+    'users': (build_users, User),
+    'customers': (build_customers, Customer),
+    'invoices': (build_invoices, Invoice),
+}
+
+
+def _insert_batch(table, seed, batch, start_id, count, context):
+    """Build and insert one batch in a worker process; returns the row count."""
+    build, model = BUILDERS[table]
+    rows = build(seed, batch, start_id, count, context)
+    with _engine.begin() as connection:
+        connection.execute(insert(model.__table__), rows)
+    return len(rows)
+
+
+def _next_id(model):
+    return (db.session.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def _ensure_roles():
+    roles = {}
+    for name in ('user', 'admin'):
+        role = Role.query.filter_by(name=name).first()
+        if role is None:
+            role = Role(name=name)
+            db.session.add(role)
+            db.session.flush()
+        roles[name] = role.id
     db.session.commit()
-    print(f"Generated {num_customers} customers.")
+    return roles
 
-def generate_invoices(num_invoices=50):
+
+def generate_data(profile='small', workers=4, seed=42, batch_size=BATCH_SIZE):
     """
-    Generate a specified number of test invoices and add them to the database.
-    
+    Generate a scale profile of users, customers and invoices with Core bulk inserts on a process pool.
+
+    Must run inside an app context. Tables are generated in foreign-key order, and
+    each table's rows per second are printed.
+
     Args:
-        num_invoices (int): Number of test invoices to generate.
+        profile (str or dict): 'small' (10k invoices), 'medium' (1M), 'large' (10M), or a dict of
+            row counts per table.
+        workers (int): Worker processes building and inserting batches.
+        seed (int): Base seed; the same seed produces the same data.
+        batch_size (int): Rows per INSERT batch.
+
+    Returns:
+        dict: Table -> (rows, rows per second).
     """
-    fake = Faker()
-    users = User.query.all()
-    customers = Customer.query.all()
-    statuses = ['Pending', 'Paid', 'Overdue']  # Different invoice statuses
-
-    for _ in range(num_invoices):
-        user = random.choice(users)  # Randomly assign a user
-        customer = random.choice(customers)  # Randomly assign a customer
-        amount = round(random.uniform(50, 1000), 2)  # Random invoice amount
-        issue_date = fake.date_between(start_date='-1y', end_date='today')  # Issue date within the last year
-        due_date = issue_date + timedelta(days=30)  # Due date 30 days after issue date
-        status = random.choice(statuses)  # Random status
-
-        invoice = Invoice(
-            invoice_number=fake.unique.bothify(text='INV-####-####'),
-            amount=amount,
-            status=status,
-            issue_date=issue_date,
-            due_date=due_date,
-            description=fake.sentence(),
-            customer=customer,
-            user=user
-        )
-
-        db.session.add(invoice)
-    
-    db.session.commit()
-    print(f"Generated {num_invoices} invoices.")
+    counts = PROFILES[profile] if isinstance(profile, str) else {'users': 0, 'customers': 0, 'invoices': 0, **profile}
+    database_url = db.engine.url.render_as_string(hide_password=False)
+    if database_url in ('sqlite://', 'sqlite:///:memory:'):
+        raise ValueError("Synthetic data generation needs a file-based or server database.")
+    roles = _ensure_roles()
+    context = {
+        'now': datetime.utcnow().replace(microsecond=0),
+        # One hash for every generated user instead of a PBKDF2 run per row
+        'password_hash': generate_password_hash(TEST_PASSWORD),
+        'user_role_id': roles['user'],
+        'admin_role_id': roles['admin'],
+        'first_user_id': _next_id(User),
+        'users': counts['users'],
+        'first_customer_id': _next_id(Customer),
+        'customers': counts['customers'],
+    }
+    first_ids = {'users': context['first_user_id'], 'customers': context['first_customer_id'],
+                 'invoices': _next_id(Invoice)}
+    db.session.remove()
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(database_url,)) as executor:
+        for table in ('users', 'customers', 'invoices'):
+            started = time.perf_counter()
+            futures = [
+                executor.submit(_insert_batch, table, seed, batch, first_ids[table] + offset,
+                                min(batch_size, counts[table] - offset), context)
+                for batch, offset in enumerate(range(0, counts[table], batch_size))
+            ]
+            rows = sum(future.result() for future in futures)
+            elapsed = time.perf_counter() - started
+            results[table] = (rows, rows / elapsed if elapsed else 0.0)
+            print(f"Generated {rows} {table} in {elapsed:.1f}s ({results[table][1]:,.0f} rows/s).")
+
+    if db.engine.dialect.name == 'postgresql':
+        # Explicit ids leave the serial sequences behind
+        for table in ('user', 'customers', 'invoices'):
+            db.session.execute(text(f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), "
+                                    f"(SELECT MAX(id) FROM \"{table}\"))"))
+        db.session.commit()
+    return results
+
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Generate synthetic users, customers and invoices.')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='small',
+                        help='small: 10k invoices, medium: 1M, large: 10M.')
+    parser.add_argument('--workers', type=int, default=4, help='Worker processes.')
+    parser.add_argument('--seed', type=int, default=42, help='Base random seed.')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Rows per INSERT batch.')
+    parser.add_argument('--backfill-rollups', action='store_true',
+                        help='Rebuild the vendor revenue rollups afterwards (bulk inserts bypass them).')
+    args = parser.parse_args()
+
     # Create the Flask app and context
     app = create_app()
     with app.app_context():
-        # Generate test data
-        generate_users(num_users=10)         # Generate 10 test users
-        generate_customers(num_customers=20) # Generate 20 test customers
-        generate_invoices(num_invoices=50)   # Generate 50 test invoices
+        generate_data(args.profile, workers=args.workers, seed=args.seed, batch_size=args.batch_size)
+    if args.backfill_rollups:
+        from services.revenue_service import backfill_revenue_rollups
+        print(f"Rebuilt revenue rollups for {backfill_revenue_rollups(app)} vendors.")
@@ -0,0 +1,133 @@
+# services/auth_service.py
+
+"""
+Password hashing on a dedicated, bounded executor.
+
+PBKDF2 hashing is deliberately slow. Running it directly on request threads lets
+a burst of logins occupy every core and starve unrelated routes. Instead, hashing
+runs on a small thread pool (hashlib releases the GIL while hashing) with a limit
+on queued jobs. When the limit is reached, callers get HashingOverloaded
+immediately, and the auth blueprint turns it into a 503 with Retry-After.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash
+from services.request_profiler import profile_phase
+
+HASHING_MAX_QUEUE = 32  # Hashing jobs allowed to wait for a worker before new ones are rejected
+HASHING_TIMEOUT = 5  # Seconds a caller waits for its result before giving up
+
+
+class HashingOverloaded(Exception):
+    """Raised when the password hashing queue is full or a hash did not finish in time."""
+
+
+class PasswordHasher:
+    """Runs password hashing on a bounded thread pool with admission control and metrics."""
+
+    def __init__(self, workers=None, max_queue=HASHING_MAX_QUEUE, timeout=HASHING_TIMEOUT):
+        self.workers = workers or max(1, (os.cpu_count() or 2) // 2)
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hasher')
+        self._lock = threading.Lock()
+        self._in_flight = 0  # Jobs queued or running
+        self._completed = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._wait_time = 0.0  # Total seconds jobs spent queued
+        self._hash_time = 0.0  # Total seconds spent hashing
+
+    def _run(self, func, args, submitted_at):
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self._in_flight -= 1
+                self._completed += 1
+                self._wait_time += started - submitted_at
+                self._hash_time += finished - started
+
+    def call(self, func, *args):
+        """
+        Run func(*args) on the hashing pool and wait for its result.
+
+        Raises:
+            HashingOverloaded: If the queue is full or the result is not ready within the timeout.
+        """
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_queue:
+                self._rejected += 1
+                raise HashingOverloaded("Password hashing queue is full.")
+            self._in_flight += 1
+        future = self._executor.submit(self._run, func, args, time.perf_counter())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            if future.cancel():
+                # Never started, so _run will not decrement the counter itself
+                with self._lock:
+                    self._in_flight -= 1
+            with self._lock:
+                self._timed_out += 1
+            raise HashingOverloaded("Password hashing timed out.")
+
+    def metrics(self):
+        """Snapshot of the hashing queue metrics."""
+        with self._lock:
+            completed = self._completed
+            return {
+                'workers': self.workers,
+                'max_queue': self.max_queue,
+                'in_flight': self._in_flight,
+                'queued': max(0, self._in_flight - self.workers),
+                'completed': completed,
+                'rejected': self._rejected,
+                'timed_out': self._timed_out,
+                'mean_wait_ms': round(self._wait_time / completed * 1000, 3) if completed else 0.0,
+                'mean_hash_ms': round(self._hash_time / completed * 1000, 3) if completed else 0.0,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+def init_password_hasher(app):
+    """Create the app's PasswordHasher from the PASSWORD_HASHING_* settings."""
+    hasher = PasswordHasher(
+        workers=app.config.get('PASSWORD_HASHING_WORKERS'),
+        max_queue=app.config.get('PASSWORD_HASHING_MAX_QUEUE', HASHING_MAX_QUEUE),
+        timeout=app.config.get('PASSWORD_HASHING_TIMEOUT', HASHING_TIMEOUT)
+    )
+    app.extensions['password_hasher'] = hasher
+    return hasher
+
+
+def _hasher():
+    if has_app_context():
+        return current_app.extensions.get('password_hasher')
+    return None
+
+
+def hash_password(password):
+    """Hash a password on the hashing pool (or inline when no pool is configured, e.g. in scripts)."""
+    hasher = _hasher()
+    with profile_phase('hash'):
+        if hasher is None:
+            return generate_password_hash(password)
+        return hasher.call(generate_password_hash, password)
+
+
+def verify_password(password_hash, password):
+    """Check a password against its hash on the hashing pool (or inline when no pool is configured)."""
+    hasher = _hasher()
+    with profile_phase('hash'):
+        if hasher is None:
+            return check_password_hash(password_hash, password)
+        return hasher.call(check_password_hash, password_hash, password)
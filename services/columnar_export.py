@@ -0,0 +1,174 @@
+# services/columnar_export.py
+
+"""
+Typed, columnar exports (Parquet or Arrow IPC) for analytics.
+
+Rows are streamed from the same column-only selects as the CSV exports. They are
+buffered into Arrow arrays one row group at a time, so peak memory is one row
+group whatever the table size. Amounts are written as decimal(18, 2) from
+integer cents, timestamps as microsecond timestamps, and flags as booleans.
+
+Invoices are partitioned Hive-style by vendor and issue month:
+
+    invoices/vendor_id=<id>/month=<YYYY-MM>/part-0.parquet
+
+so readers such as pyarrow.dataset, Spark or DuckDB can prune to the slices they
+need. Users and customers have no vendor or month of their own, so each is
+written as a single file.
+"""
+
+import os
+from decimal import Decimal
+import pyarrow as pa
+import pyarrow.ipc
+import pyarrow.parquet as pq
+from sqlalchemy import func
+from models import db, Invoice
+from services.export_service import export_columns, export_statement
+
+ROW_GROUP_SIZE = 100000  # Rows per Parquet row group (and per Arrow record batch)
+
+AMOUNT_TYPE = pa.decimal128(18, 2)
+
+SCHEMAS = {
+    'users': pa.schema([
+        ('id', pa.int64()),
+        ('username', pa.string()),
+        ('email', pa.string()),
+        ('role', pa.string()),
+        ('confirmed', pa.bool_()),
+        ('active', pa.bool_()),
+        ('created_at', pa.timestamp('us')),
+        ('updated_at', pa.timestamp('us')),
+    ]),
+    'customers': pa.schema([
+        ('id', pa.int64()),
+        ('name', pa.string()),
+        ('email', pa.string()),
+        ('phone', pa.string()),
+        ('address', pa.string()),
+        ('created_at', pa.timestamp('us')),
+        ('updated_at', pa.timestamp('us')),
+    ]),
+    'invoices': pa.schema([
+        ('id', pa.int64()),
+        ('invoice_number', pa.string()),
+        ('user_id', pa.int64()),
+        ('customer_id', pa.int64()),
+        ('amount', AMOUNT_TYPE),
+        ('status', pa.string()),
+        ('billing_method', pa.string()),
+        ('issue_date', pa.timestamp('us')),
+        ('due_date', pa.timestamp('us')),
+        ('updated_at', pa.timestamp('us')),
+    ]),
+}
+
+EXTENSIONS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+
+class _PartitionWriter:
+    """Writes the row groups of one output file in Parquet or Arrow IPC format."""
+
+    def __init__(self, path, schema, file_format):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        if file_format == 'parquet':
+            self._writer = pq.ParquetWriter(path, schema, compression='zstd')
+        else:
+            self._sink = pa.OSFile(path, 'wb')
+            self._writer = pa.ipc.new_file(self._sink, schema)
+        self.file_format = file_format
+        self.rows = 0
+
+    def write(self, table):
+        if self.file_format == 'parquet':
+            self._writer.write_table(table, row_group_size=table.num_rows)
+        else:
+            for batch in table.to_batches():
+                self._writer.write_batch(batch)
+        self.rows += table.num_rows
+
+    def close(self):
+        self._writer.close()
+        if self.file_format != 'parquet':
+            self._sink.close()
+
+
+def _to_table(rows, schema):
+    """Build an Arrow table from a list of row tuples in schema column order."""
+    columns = list(zip(*rows))
+    arrays = []
+    for index, field in enumerate(schema):
+        values = columns[index]
+        if field.type == AMOUNT_TYPE:
+            # Amounts arrive as integer cents, so the decimals are exact
+            values = [None if cents is None else Decimal(int(cents)).scaleb(-2) for cents in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def _statement(dataset, **filters):
+    statement = export_statement(dataset, **filters)
+    if dataset == 'invoices':
+        # Integer cents keep the decimal amounts exact; order by partition so each file is written once
+        statement = statement.with_only_columns(
+            *[func.round(column * 100).label(name) if name == 'amount' else column.label(name)
+              for name, column in export_columns(dataset)]
+        ).order_by(None).order_by(Invoice.user_id, Invoice.issue_date, Invoice.id)
+    return statement
+
+
+def _partition_of(row):
+    issue_date = row.issue_date
+    month = f"{issue_date.year:04d}-{issue_date.month:02d}" if issue_date else 'unknown'
+    return f"vendor_id={row.user_id}", f"month={month}"
+
+
+def export_columnar(dataset, output_dir, file_format='parquet', row_group_size=ROW_GROUP_SIZE, **filters):
+    """
+    Export a dataset as typed Parquet or Arrow IPC files.
+
+    Args:
+        dataset (str): 'users', 'customers' or 'invoices'.
+        output_dir (str): Directory the dataset's files are written under.
+        file_format (str): 'parquet' or 'arrow'.
+        row_group_size (int): Rows per row group; bounds peak memory.
+        **filters: vendor_id, date_from and date_to, as for the CSV exports.
+
+    Returns:
+        dict: Output file path -> rows written.
+    """
+    if file_format not in EXTENSIONS:
+        raise ValueError(f"Unknown columnar format: {file_format}")
+    schema = SCHEMAS[dataset]
+    statement = _statement(dataset, **filters).execution_options(yield_per=min(row_group_size, 10000))
+    written = {}
+    writer, partition, buffer = None, None, []
+
+    def flush():
+        if buffer:
+            writer.write(_to_table(buffer, schema))
+            buffer.clear()
+
+    try:
+        for row in db.session.execute(statement):
+            row_partition = _partition_of(row) if dataset == 'invoices' else ()
+            if writer is None or row_partition != partition:
+                if writer is not None:
+                    flush()
+                    writer.close()
+                    written[writer.path] = writer.rows
+                partition = row_partition
+                path = os.path.join(output_dir, dataset, *partition, f"part-0{EXTENSIONS[file_format]}")
+                writer = _PartitionWriter(path, schema, file_format)
+            buffer.append(tuple(row))
+            if len(buffer) >= row_group_size:
+                flush()
+        if writer is not None:
+            flush()
+    finally:
+        if writer is not None:
+            writer.close()
+            written[writer.path] = writer.rows
+    return written
@@ -6,6 +6,27 @@ from reportlab.lib import colors
 from io import BytesIO
 from datetime import datetime
 
+def invoice_pdf_data(invoice):
+    """
+    Builds the invoice_data dict for generate_invoice_pdf from an Invoice row.
+
+    Args:
+        invoice (Invoice): Invoice with its customer and user (vendor) relationships.
+
+    Returns:
+        dict: Invoice details in the format generate_invoice_pdf expects.
+    """
+    return {
+        "invoice_number": invoice.invoice_number,
+        "company_name": invoice.user.username,
+        "customer_name": invoice.customer.name,
+        "customer_address": invoice.customer.address or "",
+        "items": [{"description": invoice.description or "Invoice", "amount": invoice.amount}],
+        "total_amount": invoice.amount,
+        "issue_date": invoice.issue_date.strftime('%Y-%m-%d') if invoice.issue_date else None,
+        "due_date": invoice.due_date.strftime('%Y-%m-%d'),
+    }
+
 def generate_invoice_pdf(invoice_data):
     """
     Generates a PDF invoice based on the provided invoice data.
@@ -31,7 +52,25 @@ def generate_invoice_pdf(invoice_data):
     """
     buffer = BytesIO()
     c = canvas.Canvas(buffer, pagesize=letter)
+    draw_invoice(c, invoice_data)
+
+    # Save the PDF
+    c.save()
+
+    buffer.seek(0)
+    return buffer
+
+def draw_invoice(c, invoice_data):
+    """
+    Draws an invoice onto a reportlab canvas and finishes its page.
 
+    Args:
+        c (Canvas): Canvas to draw on.
+        invoice_data (dict): Invoice details, as described in generate_invoice_pdf.
+
+    Returns:
+        int: Number of pages drawn.
+    """
     # Header Section
     c.setFont("Helvetica-Bold", 20)
     c.drawString(30, 750, invoice_data.get("company_name", "Company Name"))
@@ -74,9 +113,6 @@ def generate_invoice_pdf(invoice_data):
     c.setFont("Helvetica-Oblique", 10)
     c.drawString(30, 50, "Thank you for your business!")
 
-    # Save the PDF
+    pages = c.getPageNumber()
     c.showPage()
-    c.save()
-
-    buffer.seek(0)
-    return buffer
+    return pages
@@ -0,0 +1,149 @@
+# services/dashboard_service.py
+
+"""
+Dashboard view-model loaders with per-user fragment caching.
+
+render_dashboard_fragments() renders the subscription and payment-history parts
+of templates/dashboard.html. Each part loads in one query into immutable named
+tuples, so rendering never touches the database. The rendered fragments are
+cached per user under a version counter, 'dashboard:<user_id>' in
+catalog_versions. That counter is bumped in the same transaction as any change
+to the user's invoices or subscriptions. A cached fragment therefore can never
+outlive the data it shows, and on a cache hit its queries are skipped entirely.
+"""
+
+import threading
+from collections import OrderedDict, namedtuple
+from flask import render_template
+from markupsafe import Markup
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import joinedload
+from models import db, Invoice, Subscription, SubscriptionPlan, CatalogVersion
+
+PAYMENT_HISTORY_LIMIT = 20  # Most recent invoices shown on the dashboard
+FRAGMENT_CACHE_SIZE = 5000  # Rendered fragments kept per process
+
+PlanView = namedtuple('PlanView', 'name price')
+SubscriptionView = namedtuple('SubscriptionView', 'plan start_date end_date')
+PaymentView = namedtuple('PaymentView', 'date amount status')
+
+
+def dashboard_version_name(user_id):
+    return f"dashboard:{user_id}"
+
+
+def bump_dashboard_versions(connection, user_ids):
+    """Invalidate the cached dashboard fragments of the given users (within the caller's transaction)."""
+    for user_id in sorted(set(user_ids)):
+        CatalogVersion.bump(connection, dashboard_version_name(user_id))
+
+
+def load_subscription(user_id):
+    """Active subscription with its plan, in one query."""
+    subscription = (
+        Subscription.query
+        .options(joinedload(Subscription.plan))
+        .filter(Subscription.user_id == user_id, Subscription.status == 'active')
+        .order_by(Subscription.start_date.desc())
+        .first()
+    )
+    if subscription is None:
+        return None
+    plan = PlanView(subscription.plan.name, subscription.plan.price)
+    return SubscriptionView(plan, subscription.start_date, subscription.end_date)
+
+
+def load_payments(user_id, limit=PAYMENT_HISTORY_LIMIT):
+    """Most recent invoices as (date, amount, status) rows, in one column-only query."""
+    rows = db.session.execute(
+        select(Invoice.issue_date, Invoice.amount, Invoice.status)
+        .where(Invoice.user_id == user_id)
+        .order_by(Invoice.issue_date.desc(), Invoice.id.desc())
+        .limit(limit)
+    )
+    return tuple(PaymentView(*row) for row in rows)
+
+
+class FragmentCache:
+    """Size-bounded LRU cache of rendered HTML fragments keyed by (user_id, fragment, version)."""
+
+    def __init__(self, max_size=FRAGMENT_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+fragment_cache = FragmentCache()
+
+
+def render_dashboard_fragments(user_id):
+    """
+    Return the rendered dashboard fragments for a user, from the fragment cache when possible.
+
+    Costs one version lookup on a full hit. On a miss, only the queries for the
+    missing fragments are run.
+
+    Returns:
+        dict: 'subscription' and 'payments' HTML fragments (Markup).
+    """
+    version = CatalogVersion.current(dashboard_version_name(user_id))
+    fragments = {}
+
+    key = (user_id, 'subscription', version)
+    html = fragment_cache.get(key)
+    if html is None:
+        subscription = load_subscription(user_id)
+        html = Markup(render_template(
+            '_dashboard_subscription.html',
+            subscription=subscription,
+            next_billing_date=subscription.end_date if subscription else None
+        ))
+        fragment_cache.put(key, html)
+    fragments['subscription'] = html
+
+    key = (user_id, 'payments', version)
+    html = fragment_cache.get(key)
+    if html is None:
+        html = Markup(render_template('_dashboard_payments.html', payments=load_payments(user_id)))
+        fragment_cache.put(key, html)
+    fragments['payments'] = html
+    return fragments
+
+
+def _user_rows_changed(mapper, connection, target):
+    user_ids = [target.user_id]
+    history = inspect(target).attrs.user_id.history
+    user_ids += [user_id for user_id in history.deleted if user_id is not None]
+    bump_dashboard_versions(connection, user_ids)
+
+
+def _plan_changed(mapper, connection, target):
+    # Plan edits change the subscription fragment of every subscriber
+    user_ids = connection.execute(
+        select(Subscription.user_id).where(Subscription.plan_id == target.id).distinct()
+    ).scalars()
+    bump_dashboard_versions(connection, user_ids)
+
+
+def init_dashboard_cache(app):
+    """Bump a user's dashboard version whenever their invoices or subscriptions change."""
+    app.extensions['dashboard_fragment_cache'] = fragment_cache
+    for model, listener in ((Invoice, _user_rows_changed), (Subscription, _user_rows_changed),
+                            (SubscriptionPlan, _plan_changed)):
+        for name in ('after_insert', 'after_update', 'after_delete'):
+            if not event.contains(model, name, listener):
+                event.listen(model, name, listener)
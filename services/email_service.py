@@ -0,0 +1,235 @@
+# services/email_service.py
+
+"""
+Transactional email outbox.
+
+Request handlers call enqueue_email(), which only adds a row to the email_outbox
+table in the current transaction, so the message is committed (or rolled back)
+together with the work that produced it. OutboxWorkerPool threads drain the table
+in the background with retries, exponential backoff and dead-lettering.
+
+To test delivery locally, point MAIL_SERVER/MAIL_PORT at an SMTP sink such as
+`python -m aiosmtpd -n -l localhost:1025` and start a pool with start_outbox_workers().
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from flask_mail import Message
+from sqlalchemy import or_, and_, insert, update
+from models import db, OutboxEmail
+from app import mail
+
+OUTBOX_BATCH_SIZE = 50  # Messages a worker looks at per poll
+OUTBOX_MAX_ATTEMPTS = 8  # Attempts before a message is dead-lettered
+OUTBOX_BACKOFF_BASE = 30  # Seconds before the first retry; doubles per attempt
+OUTBOX_BACKOFF_MAX = 3600  # Upper bound on the retry delay in seconds
+OUTBOX_CLAIM_TIMEOUT = 300  # Seconds after which a 'sending' message from a crashed worker is retried
+OUTBOX_POLL_INTERVAL = 2  # Seconds a worker sleeps when the outbox is empty
+
+
+def enqueue_email(subject, recipients, body, sender=None):
+    """
+    Add an email to the outbox in the current transaction; the caller commits it.
+
+    Args:
+        subject (str): Email subject.
+        recipients (list): Recipient addresses.
+        body (str): Plain-text body.
+        sender (str): Sender address; MAIL_DEFAULT_SENDER is used when omitted.
+
+    Returns:
+        OutboxEmail: The pending outbox row.
+    """
+    email = OutboxEmail(subject=subject, recipients=list(recipients), body=body, sender=sender)
+    db.session.add(email)
+    return email
+
+
+def enqueue_emails(messages):
+    """
+    Add many emails to the outbox in the current transaction with one batched INSERT.
+
+    For batch jobs; the caller commits them. Unlike enqueue_email, no ORM objects are returned.
+
+    Args:
+        messages (list): Dicts with the enqueue_email arguments: subject, recipients, body and optionally sender.
+
+    Returns:
+        int: Number of emails queued.
+    """
+    rows = [{'subject': message['subject'], 'recipients': list(message['recipients']), 'body': message['body'],
+             'sender': message.get('sender')} for message in messages]
+    if rows:
+        db.session.execute(insert(OutboxEmail), rows)
+    return len(rows)
+
+
+def retry_delay(attempts):
+    """Exponential backoff delay in seconds after the given number of failed attempts."""
+    return min(OUTBOX_BACKOFF_BASE * 2 ** (attempts - 1), OUTBOX_BACKOFF_MAX)
+
+
+def due_email_ids(limit=OUTBOX_BATCH_SIZE, now=None):
+    """
+    Ids of up to `limit` messages that are due: pending ones whose retry time has
+    come, and 'sending' ones whose claim has expired because their worker died.
+    """
+    now = now or datetime.utcnow()
+    return [row.id for row in db.session.query(OutboxEmail.id).filter(_due(now))
+            .order_by(OutboxEmail.next_attempt_at).limit(limit)]
+
+
+def _due(now):
+    stale = now - timedelta(seconds=OUTBOX_CLAIM_TIMEOUT)
+    return or_(
+        and_(OutboxEmail.status == 'pending', OutboxEmail.next_attempt_at <= now),
+        and_(OutboxEmail.status == 'sending', OutboxEmail.claimed_at < stale)
+    )
+
+
+def claim_email(email_id, now=None):
+    """
+    Claim one due message just before delivering it.
+
+    The claim is a compare-and-set UPDATE, so only one worker in any process wins
+    it. Claiming counts as a delivery attempt. A message whose worker crashed
+    mid-send therefore still moves towards dead-lettering when it is reclaimed.
+
+    Returns:
+        datetime: The claim token (the stored claimed_at), or None if another worker got the message first.
+    """
+    now = now or datetime.utcnow()
+    # Whole seconds, so the token compares equal on databases that drop fractional seconds
+    claimed_at = now.replace(microsecond=0)
+    result = db.session.execute(
+        update(OutboxEmail)
+        .where(OutboxEmail.id == email_id, _due(now))
+        .values(status='sending', claimed_at=claimed_at, attempts=OutboxEmail.attempts + 1)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return claimed_at if result.rowcount else None
+
+
+def _record_outcome(email_id, claimed_at, **values):
+    """Store a delivery outcome only if this worker still holds the claim; returns whether it did."""
+    result = db.session.execute(
+        update(OutboxEmail)
+        .where(OutboxEmail.id == email_id, OutboxEmail.status == 'sending', OutboxEmail.claimed_at == claimed_at)
+        .values(claimed_at=None, **values)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return bool(result.rowcount)
+
+
+def deliver_email(email_id, claimed_at):
+    """
+    Deliver one message claimed with claim_email() and record the outcome.
+
+    Messages that have used up their attempts (e.g. because they keep killing their
+    worker) are dead-lettered without another send. If the claim expired and
+    another worker took the message over during the send, nothing is recorded and
+    the other worker's outcome stands.
+
+    Returns:
+        str: The message's new status ('sent', 'pending' or 'dead'), or 'lost' if the claim was lost.
+    """
+    email = db.session.get(OutboxEmail, email_id)
+    max_attempts = current_app.config.get('OUTBOX_MAX_ATTEMPTS', OUTBOX_MAX_ATTEMPTS)
+    if email.attempts > max_attempts:
+        current_app.logger.error(f"Dead-lettered email {email.id} to {email.recipients} after {email.attempts - 1} "
+                                 f"attempts.")
+        return 'dead' if _record_outcome(email_id, claimed_at, status='dead') else 'lost'
+
+    try:
+        msg = Message(
+            email.subject,
+            sender=email.sender or current_app.config['MAIL_DEFAULT_SENDER'],
+            recipients=email.recipients
+        )
+        msg.body = email.body
+        mail.send(msg)
+        status, values = 'sent', {'sent_at': datetime.utcnow(), 'last_error': None}
+    except Exception as e:
+        values = {'last_error': str(e)}
+        if email.attempts >= max_attempts:
+            status = 'dead'
+            current_app.logger.error(f"Dead-lettered email {email.id} to {email.recipients}: {str(e)}")
+        else:
+            status = 'pending'
+            values['next_attempt_at'] = datetime.utcnow() + timedelta(seconds=retry_delay(email.attempts))
+            current_app.logger.warning(f"Delivery of email {email.id} failed (attempt {email.attempts}): {str(e)}")
+
+    if not _record_outcome(email_id, claimed_at, status=status, **values):
+        current_app.logger.warning(f"Lost the claim on email {email.id} during delivery; outcome not recorded.")
+        return 'lost'
+    return status
+
+
+def drain_outbox(limit=OUTBOX_BATCH_SIZE):
+    """
+    Deliver one batch of due messages, claiming each one just before it is sent.
+
+    Claims are per message, so a claim only has to outlive a single send, not the
+    whole batch, before OUTBOX_CLAIM_TIMEOUT lets another worker take it over.
+
+    Returns:
+        dict: Counts of messages per resulting status.
+    """
+    counts = {'sent': 0, 'pending': 0, 'dead': 0, 'lost': 0}
+    for email_id in due_email_ids(limit):
+        claimed_at = claim_email(email_id)
+        if claimed_at is not None:
+            counts[deliver_email(email_id, claimed_at)] += 1
+    return counts
+
+
+class OutboxWorkerPool:
+    """A pool of background threads that drain the email outbox."""
+
+    def __init__(self, app, workers=2, batch_size=OUTBOX_BATCH_SIZE, poll_interval=OUTBOX_POLL_INTERVAL):
+        self.app = app
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads = []
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self.app.app_context():
+                try:
+                    counts = drain_outbox(self.batch_size)
+                except Exception as e:
+                    db.session.rollback()
+                    self.app.logger.error(f"Outbox worker error: {str(e)}")
+                    counts = {}
+                finally:
+                    db.session.remove()
+            # Keep draining while there is work; sleep only when the outbox is empty
+            if not sum(counts.values()):
+                self._stop.wait(self.poll_interval)
+
+    def start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"outbox-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=10):
+        """Signal the workers to stop after their current batch and wait for them."""
+        self._stop.set()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0, deadline - time.monotonic()))
+        self._threads = []
+
+
+def start_outbox_workers(app):
+    """Start an OutboxWorkerPool sized by the OUTBOX_WORKERS setting and return it."""
+    pool = OutboxWorkerPool(app, workers=app.config.get('OUTBOX_WORKERS', 2))
+    pool.start()
+    return pool
@@ -0,0 +1,251 @@
+# services/export_service.py
+
+"""
+Streaming CSV exports of users, customers and invoices, full or delta.
+
+Exports select only the exported columns, never ORM objects, and fetch them with
+yield_per. On PostgreSQL and MySQL this uses a server-side cursor, so rows are
+written out as they arrive and memory stays flat however large the table is.
+The same generators back scripts/export_data.py and the /export download route.
+
+Delta exports emit only the rows whose updated_at moved past the dataset's stored
+watermark, plus tombstones for deleted rows, so their cost follows the change rate
+rather than the table size. Deletions are recorded in export_tombstones by mapper
+events. Bulk DELETEs that bypass the ORM must call record_tombstones themselves.
+"""
+
+import csv
+import io
+from datetime import datetime, timedelta
+from sqlalchemy import event, insert, select, tuple_
+from models import db, User, Customer, Invoice, Role, JobCheckpoint, ExportTombstone
+
+EXPORT_CHUNK_SIZE = 2000  # Rows fetched per round-trip and written per CSV chunk
+
+EXPORT_DATASETS = ('users', 'customers', 'invoices')
+EXPORT_MODELS = {'users': User, 'customers': Customer, 'invoices': Invoice}
+
+# Rows changed within this window are left for the next run, so a transaction that
+# commits slightly after a row's updated_at was taken is not skipped by the watermark
+DELTA_SAFETY_LAG = timedelta(minutes=5)
+
+
+def export_columns(dataset):
+    """
+    Exported columns of a dataset.
+
+    Returns:
+        list: (field name, column expression) pairs in export order.
+    """
+    if dataset == 'users':
+        return [
+            ('id', User.id),
+            ('username', User.username),
+            ('email', User.email),
+            ('role', Role.name),
+            ('confirmed', User.confirmed),
+            ('active', User.active),
+            ('created_at', User.created_at),
+            ('updated_at', User.updated_at),
+        ]
+    if dataset == 'customers':
+        return [
+            ('id', Customer.id),
+            ('name', Customer.name),
+            ('email', Customer.email),
+            ('phone', Customer.phone),
+            ('address', Customer.address),
+            ('created_at', Customer.created_at),
+            ('updated_at', Customer.updated_at),
+        ]
+    if dataset == 'invoices':
+        return [
+            ('id', Invoice.id),
+            ('invoice_number', Invoice.invoice_number),
+            ('user_id', Invoice.user_id),
+            ('customer_id', Invoice.customer_id),
+            ('amount', Invoice.amount),
+            ('status', Invoice.status),
+            ('billing_method', Invoice.billing_method),
+            ('issue_date', Invoice.issue_date),
+            ('due_date', Invoice.due_date),
+            ('updated_at', Invoice.updated_at),
+        ]
+    raise ValueError(f"Unknown export dataset: {dataset}")
+
+
+def export_statement(dataset, vendor_id=None, date_from=None, date_to=None):
+    """
+    Column-only SELECT for a dataset, optionally limited to one vendor and a date range.
+
+    The vendor filter keeps a vendor's own user row, the customers they have invoiced
+    and their invoices. The date range applies to created_at, or to issue_date for
+    invoices, and date_to includes the whole day.
+
+    Returns:
+        Select: Statement ordered by id.
+    """
+    columns = export_columns(dataset)
+    statement = select(*[column.label(name) for name, column in columns])
+    if dataset == 'users':
+        model, date_column = User, User.created_at
+        statement = statement.select_from(User).outerjoin(Role, User.role_id == Role.id)
+        if vendor_id is not None:
+            statement = statement.where(User.id == vendor_id)
+    elif dataset == 'customers':
+        model, date_column = Customer, Customer.created_at
+        if vendor_id is not None:
+            statement = statement.where(
+                Customer.id.in_(select(Invoice.customer_id).where(Invoice.user_id == vendor_id))
+            )
+    else:
+        model, date_column = Invoice, Invoice.issue_date
+        if vendor_id is not None:
+            statement = statement.where(Invoice.user_id == vendor_id)
+
+    if date_from:
+        statement = statement.where(date_column >= date_from)
+    if date_to:
+        statement = statement.where(date_column < date_to + timedelta(days=1))
+    return statement.order_by(model.id)
+
+
+def iter_rows(dataset, chunk_size=EXPORT_CHUNK_SIZE, **filters):
+    """
+    Stream a dataset's rows in chunks.
+
+    Yields:
+        list: Up to chunk_size row tuples at a time.
+    """
+    statement = export_statement(dataset, **filters).execution_options(yield_per=chunk_size)
+    result = db.session.execute(statement)
+    for chunk in result.partitions():
+        yield chunk
+
+
+def iter_csv(dataset, chunk_size=EXPORT_CHUNK_SIZE, **filters):
+    """
+    Stream a dataset as CSV text, one chunk of rows per yielded string, header first.
+
+    Yields:
+        str: CSV text.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in export_columns(dataset)])
+    yield buffer.getvalue()
+    for chunk in iter_rows(dataset, chunk_size, **filters):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+
+
+def export_to_csv(dataset, file_path, chunk_size=EXPORT_CHUNK_SIZE, **filters):
+    """
+    Write a dataset to a CSV file with constant memory.
+
+    Returns:
+        int: Number of rows written.
+    """
+    rows = 0
+    with open(file_path, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow([name for name, _ in export_columns(dataset)])
+        for chunk in iter_rows(dataset, chunk_size, **filters):
+            writer.writerows(chunk)
+            rows += len(chunk)
+    return rows
+
+
+### Delta exports ###
+
+def delta_checkpoint_name(dataset):
+    return f"export_delta:{dataset}"
+
+
+def record_tombstones(connection, dataset, row_ids):
+    """Record deleted rows for delta exports (within the caller's transaction)."""
+    row_ids = list(row_ids)
+    if row_ids:
+        connection.execute(insert(ExportTombstone.__table__), [
+            {'dataset': dataset, 'row_id': row_id, 'deleted_at': datetime.utcnow()} for row_id in row_ids
+        ])
+
+
+def _position(state, key):
+    if not state.get(key):
+        return None
+    return datetime.fromisoformat(state[key]), state[f"{key}_id"]
+
+
+def export_delta_csv(dataset, file_path, chunk_size=EXPORT_CHUNK_SIZE, now=None, lag=DELTA_SAFETY_LAG):
+    """
+    Write the rows of a dataset changed since its watermark, then advance the watermark.
+
+    Each CSV row starts with a 'change' column: 'upsert' rows carry every exported
+    column, and 'delete' rows carry only the id. Both sets are read in
+    (timestamp, id) keyset order up to a cutoff of now - lag. The watermark is
+    committed only after the file has been written completely, so a failed run is
+    simply repeated.
+
+    Returns:
+        dict: 'upserts', 'deletes' and the new 'cutoff'.
+    """
+    model = EXPORT_MODELS[dataset]
+    checkpoint = JobCheckpoint.load(delta_checkpoint_name(dataset))
+    state = dict(checkpoint.state or {})  # A copy, so saving it is seen as a change to the JSON column
+    cutoff = (now or datetime.utcnow()) - lag
+    fieldnames = [name for name, _ in export_columns(dataset)]
+    upserts = deletes = 0
+    last_change = _position(state, 'updated_at')
+    last_delete = _position(state, 'deleted_at')
+
+    statement = export_statement(dataset).where(model.updated_at < cutoff)
+    if last_change:
+        statement = statement.where(tuple_(model.updated_at, model.id) > tuple_(*last_change))
+    statement = statement.order_by(None).order_by(model.updated_at, model.id)
+
+    tombstones = select(ExportTombstone.id, ExportTombstone.row_id, ExportTombstone.deleted_at).where(
+        ExportTombstone.dataset == dataset, ExportTombstone.deleted_at < cutoff
+    )
+    if last_delete:
+        tombstones = tombstones.where(tuple_(ExportTombstone.deleted_at, ExportTombstone.id) > tuple_(*last_delete))
+    tombstones = tombstones.order_by(ExportTombstone.deleted_at, ExportTombstone.id)
+
+    id_index = fieldnames.index('id')
+    with open(file_path, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['change'] + fieldnames)
+        for chunk in db.session.execute(statement.execution_options(yield_per=chunk_size)).partitions():
+            writer.writerows(('upsert',) + tuple(row) for row in chunk)
+            upserts += len(chunk)
+            last_change = (chunk[-1].updated_at, chunk[-1].id)
+        blank = [''] * len(fieldnames)
+        for chunk in db.session.execute(tombstones.execution_options(yield_per=chunk_size)).partitions():
+            for tombstone in chunk:
+                row = list(blank)
+                row[id_index] = tombstone.row_id
+                writer.writerow(['delete'] + row)
+            deletes += len(chunk)
+            last_delete = (chunk[-1].deleted_at, chunk[-1].id)
+
+    if last_change:
+        state.update(updated_at=last_change[0].isoformat(), updated_at_id=last_change[1])
+    if last_delete:
+        state.update(deleted_at=last_delete[0].isoformat(), deleted_at_id=last_delete[1])
+    checkpoint.save(state)
+    db.session.commit()
+    return {'upserts': upserts, 'deletes': deletes, 'cutoff': cutoff}
+
+
+def _row_deleted(mapper, connection, target):
+    dataset = next(name for name, model in EXPORT_MODELS.items() if isinstance(target, model))
+    record_tombstones(connection, dataset, [target.id])
+
+
+def init_export_tracking(app):
+    """Record tombstones for deleted users, customers and invoices."""
+    for model in EXPORT_MODELS.values():
+        if not event.contains(model, 'after_delete', _row_deleted):
+            event.listen(model, 'after_delete', _row_deleted)
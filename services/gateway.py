@@ -0,0 +1,355 @@
+# services/gateway.py
+
+"""
+Shared outbound gateway for the Stripe and Plaid APIs.
+
+Every call to a payment provider goes through a Gateway, which adds:
+
+- connection pooling: one keep-alive requests.Session per provider, so
+  concurrent calls reuse TLS connections instead of handshaking each time;
+- client-side rate limiting: a token bucket per provider, shared by all
+  threads of the process. A 429 pauses the whole bucket for the provider's
+  Retry-After, so every thread backs off together;
+- retries with full jitter, for errors that are safe to retry (429s, 5xx
+  responses and connection failures). Mutating Stripe calls must pass an
+  idempotency_key so that a retried request is applied once;
+- per-operation latency and error metrics.
+
+The Stripe SDK is pointed at the pooled session and its own retries are turned
+off. Plaid is called over its REST API through the pooled session. Base URLs come
+from STRIPE_API_BASE and PLAID_BASE_URL, so tests can use a local HTTP stand-in.
+"""
+
+import random
+import threading
+import time
+from collections import defaultdict, deque
+import requests
+import stripe
+from flask import current_app
+from requests.adapters import HTTPAdapter
+from services.request_profiler import profile_phase
+
+PLAID_ENVIRONMENTS = {
+    'sandbox': 'https://sandbox.plaid.com',
+    'development': 'https://development.plaid.com',
+    'production': 'https://production.plaid.com',
+}
+
+GATEWAY_POOL_SIZE = 20  # Keep-alive connections per provider
+GATEWAY_TIMEOUT = 30  # Seconds per HTTP request
+GATEWAY_MAX_RETRIES = 3  # Retries after the first attempt
+GATEWAY_BACKOFF_BASE = 0.25  # Seconds; backoff ceiling doubles per retry
+GATEWAY_BACKOFF_CAP = 8  # Seconds; upper bound of a single backoff
+GATEWAY_RATES = {'stripe': (25, 50), 'plaid': (10, 20)}  # (requests per second, burst) per provider
+LATENCY_WINDOW = 1000  # Recent latencies kept per operation for percentiles
+
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+
+class GatewayError(Exception):
+    """A provider call that failed after all retries or with a non-retryable error."""
+
+    def __init__(self, provider, operation, message, status=None, code=None, retryable=False):
+        super().__init__(f"{provider} {operation} failed: {message}")
+        self.provider = provider
+        self.operation = operation
+        self.status = status
+        self.code = code
+        self.retryable = retryable
+
+
+class RateLimitTimeout(GatewayError):
+    """Raised when no rate limit token became available within the caller's deadline."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at `rate` tokens per second."""
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout=None):
+        """
+        Take one token, waiting for it if necessary.
+
+        Returns:
+            float: Seconds spent waiting, or None if no token was available within timeout.
+        """
+        started = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return now - started
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            if timeout is not None and now - started + wait > timeout:
+                return None
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Stop handing out tokens for `seconds` (e.g. after the provider returned 429)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+class GatewayMetrics:
+    """Per-operation call, retry, error and latency counters."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {'calls': 0, 'errors': 0, 'retries': 0, 'throttled': 0,
+                                           'throttle_wait': 0.0, 'latencies': deque(maxlen=window)})
+
+    def record(self, operation, latency, attempts, error, throttle_wait):
+        with self._lock:
+            stats = self._stats[operation]
+            stats['calls'] += 1
+            stats['retries'] += attempts - 1
+            stats['errors'] += 1 if error else 0
+            stats['throttled'] += 1 if throttle_wait > 0.001 else 0
+            stats['throttle_wait'] += throttle_wait
+            stats['latencies'].append(latency)
+
+    def snapshot(self):
+        with self._lock:
+            result = {}
+            for operation, stats in self._stats.items():
+                latencies = sorted(stats['latencies'])
+                percentile = lambda p: round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 3)
+                result[operation] = {
+                    'calls': stats['calls'],
+                    'errors': stats['errors'],
+                    'retries': stats['retries'],
+                    'throttled': stats['throttled'],
+                    'throttle_wait_s': round(stats['throttle_wait'], 3),
+                    'p50_ms': percentile(0.5) if latencies else 0.0,
+                    'p95_ms': percentile(0.95) if latencies else 0.0,
+                    'max_ms': round(latencies[-1] * 1000, 3) if latencies else 0.0,
+                }
+            return result
+
+
+def pooled_session(pool_size=GATEWAY_POOL_SIZE):
+    """A requests.Session with a keep-alive connection pool of `pool_size` per host."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class Gateway:
+    """Rate-limited, retrying, instrumented client for one provider."""
+
+    provider = None
+
+    def __init__(self, rate, burst, pool_size=GATEWAY_POOL_SIZE, timeout=GATEWAY_TIMEOUT,
+                 max_retries=GATEWAY_MAX_RETRIES, backoff_base=GATEWAY_BACKOFF_BASE, backoff_cap=GATEWAY_BACKOFF_CAP):
+        self.bucket = TokenBucket(rate, burst)
+        self.session = pooled_session(pool_size)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.metrics = GatewayMetrics()
+
+    def classify(self, error):
+        """
+        Decide whether an exception may be retried.
+
+        Returns:
+            tuple: (retryable, retry_after seconds or None).
+        """
+        return False, None
+
+    def wrap_error(self, operation, error):
+        return GatewayError(self.provider, operation, str(error))
+
+    def backoff(self, attempt, retry_after=None):
+        """Full-jitter exponential backoff, never shorter than the provider's Retry-After."""
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+        return max(delay, retry_after or 0)
+
+    def call(self, operation, func, *args, deadline=None, **kwargs):
+        """
+        Call func(*args, **kwargs) under the provider's rate limit and retry policy.
+
+        Args:
+            operation (str): Metric name of the call, e.g. 'customers.create'.
+            func (callable): The SDK or HTTP function performing one attempt.
+            deadline (float): Optional seconds to wait for a rate limit token before giving up.
+
+        Returns:
+            The result of func.
+
+        Raises:
+            RateLimitTimeout: If no token was available before the deadline.
+            GatewayError: If the call failed with a non-retryable error or ran out of retries.
+        """
+        with profile_phase('gateway'):
+            started = time.perf_counter()
+            throttle_wait = 0.0
+            attempt = 0
+            error = None
+            try:
+                while True:
+                    waited = self.bucket.acquire(timeout=deadline)
+                    if waited is None:
+                        error = RateLimitTimeout(self.provider, operation, "rate limit token not available", status=429,
+                                                 retryable=True)
+                        raise error
+                    throttle_wait += waited
+                    attempt += 1
+                    try:
+                        return func(*args, **kwargs)
+                    except GatewayError as e:
+                        error = e
+                        raise
+                    except Exception as e:
+                        retryable, retry_after = self.classify(e)
+                        if retry_after:
+                            self.bucket.pause(retry_after)
+                        if not retryable or attempt > self.max_retries:
+                            error = self.wrap_error(operation, e)
+                            raise error from e
+                        time.sleep(self.backoff(attempt - 1, retry_after))
+            finally:
+                self.metrics.record(operation, time.perf_counter() - started, max(attempt, 1), error, throttle_wait)
+
+
+def _retry_after(headers):
+    try:
+        return float((headers or {}).get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+class StripeGateway(Gateway):
+    """Gateway for Stripe SDK calls; installs the pooled session as the SDK's HTTP client."""
+
+    provider = 'stripe'
+
+    def __init__(self, *args, api_key=None, api_base=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.http_client = stripe.RequestsClient(timeout=self.timeout, session=self.session)
+        stripe.default_http_client = self.http_client
+        stripe.max_network_retries = 0  # Retries are done by the gateway
+        if api_key:
+            stripe.api_key = api_key
+        if api_base:
+            stripe.api_base = api_base
+
+    def classify(self, error):
+        if isinstance(error, stripe.error.RateLimitError):
+            return True, _retry_after(error.headers)
+        if isinstance(error, stripe.error.APIConnectionError):
+            return True, None
+        if isinstance(error, stripe.error.APIError):
+            return error.http_status is None or error.http_status >= 500, None
+        return False, None
+
+    def wrap_error(self, operation, error):
+        retryable, _ = self.classify(error)
+        return GatewayError(self.provider, operation, getattr(error, 'user_message', None) or str(error),
+                            status=getattr(error, 'http_status', None), code=getattr(error, 'code', None),
+                            retryable=retryable)
+
+
+class PlaidHTTPError(Exception):
+    """A non-2xx response from the Plaid API."""
+
+    def __init__(self, response):
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        self.status = response.status_code
+        self.headers = response.headers
+        self.error_code = body.get('error_code')
+        self.error_type = body.get('error_type')
+        super().__init__(body.get('error_message') or f"HTTP {response.status_code}")
+
+
+class PlaidGateway(Gateway):
+    """Gateway for the Plaid REST API over the pooled session."""
+
+    provider = 'plaid'
+
+    def __init__(self, *args, client_id=None, secret=None, base_url=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.base_url = (base_url or PLAID_ENVIRONMENTS['sandbox']).rstrip('/')
+        self.session.headers.update({'PLAID-CLIENT-ID': client_id or '', 'PLAID-SECRET': secret or '',
+                                     'Content-Type': 'application/json'})
+
+    def classify(self, error):
+        if isinstance(error, PlaidHTTPError):
+            return error.status in RETRYABLE_STATUSES, _retry_after(error.headers)
+        if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+            return True, None
+        return False, None
+
+    def wrap_error(self, operation, error):
+        retryable, _ = self.classify(error)
+        return GatewayError(self.provider, operation, str(error), status=getattr(error, 'status', None),
+                            code=getattr(error, 'error_code', None), retryable=retryable)
+
+    def _post(self, path, payload):
+        response = self.session.post(f"{self.base_url}{path}", json=payload, timeout=self.timeout)
+        if response.status_code >= 400:
+            raise PlaidHTTPError(response)
+        return response.json()
+
+    def post(self, path, payload):
+        """
+        POST a JSON payload to a Plaid endpoint, e.g. '/auth/get'.
+
+        Returns:
+            dict: The decoded response body.
+        """
+        return self.call(path.strip('/').replace('/', '.'), self._post, path, payload)
+
+
+def init_gateways(app):
+    """Create the Stripe and Plaid gateways from the STRIPE_*, PLAID_* and GATEWAY_* settings."""
+    common = {
+        'pool_size': app.config.get('GATEWAY_POOL_SIZE', GATEWAY_POOL_SIZE),
+        'timeout': app.config.get('GATEWAY_TIMEOUT', GATEWAY_TIMEOUT),
+        'max_retries': app.config.get('GATEWAY_MAX_RETRIES', GATEWAY_MAX_RETRIES),
+        'backoff_base': app.config.get('GATEWAY_BACKOFF_BASE', GATEWAY_BACKOFF_BASE),
+        'backoff_cap': app.config.get('GATEWAY_BACKOFF_CAP', GATEWAY_BACKOFF_CAP),
+    }
+    stripe_rate, stripe_burst = app.config.get('GATEWAY_STRIPE_RATE', GATEWAY_RATES['stripe'])
+    plaid_rate, plaid_burst = app.config.get('GATEWAY_PLAID_RATE', GATEWAY_RATES['plaid'])
+    gateways = {
+        'stripe': StripeGateway(stripe_rate, stripe_burst, api_key=app.config.get('STRIPE_SECRET_KEY'),
+                                api_base=app.config.get('STRIPE_API_BASE'), **common),
+        'plaid': PlaidGateway(plaid_rate, plaid_burst, client_id=app.config.get('PLAID_CLIENT_ID'),
+                              secret=app.config.get('PLAID_SECRET'),
+                              base_url=app.config.get('PLAID_BASE_URL') or PLAID_ENVIRONMENTS.get(
+                                  app.config.get('PLAID_ENV', 'sandbox')), **common),
+    }
+    app.extensions['gateways'] = gateways
+    return gateways
+
+
+def get_gateway(provider):
+    """The current app's gateway for 'stripe' or 'plaid'."""
+    return current_app.extensions['gateways'][provider]
+
+
+def gateway_metrics():
+    """Metrics of every gateway, keyed by provider and operation."""
+    return {provider: gateway.metrics.snapshot() for provider, gateway in current_app.extensions['gateways'].items()}
@@ -0,0 +1,154 @@
+# services/invoice_pdf_batch.py
+
+"""
+Batch rendering of invoice PDFs across a process pool.
+
+render_invoice_pdfs() fans invoice dicts out to worker processes in chunks and
+streams each finished PDF to a directory or a zip archive as soon as its chunk
+completes, so month-end runs use every core and never hold the whole batch in memory.
+"""
+
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from io import BytesIO
+from itertools import islice
+
+PDF_BATCH_CHUNK_SIZE = 50  # Invoices sent to a worker per task
+_SAFE_FILENAME = re.compile(r"[^A-Za-z0-9._-]+")
+
+# Per-worker state set up once by _init_worker
+_worker_canvas_kwargs = None
+
+
+def _init_worker():
+    """Process pool initializer: load reportlab and the fonts used by draw_invoice once per worker."""
+    global _worker_canvas_kwargs
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfbase import pdfmetrics
+    for font_name in ("Helvetica", "Helvetica-Bold", "Helvetica-Oblique"):
+        pdfmetrics.getFont(font_name)  # Loads and caches the font metrics
+    # Page compression and a fixed creation date keep output small and byte-for-byte reproducible
+    _worker_canvas_kwargs = {'pagesize': letter, 'pageCompression': 1, 'invariant': 1}
+
+
+def _render_chunk(chunk):
+    """Render a chunk of invoices in a worker. Returns (filename, pdf bytes, pages) tuples and the busy time."""
+    from reportlab.pdfgen import canvas
+    from services.createinvoice import draw_invoice
+
+    if _worker_canvas_kwargs is None:
+        _init_worker()
+    started = time.perf_counter()
+    rendered = []
+    for invoice_data in chunk:
+        buffer = BytesIO()
+        c = canvas.Canvas(buffer, **_worker_canvas_kwargs)
+        pages = draw_invoice(c, invoice_data)
+        c.save()
+        rendered.append((pdf_filename(invoice_data), buffer.getvalue(), pages))
+    return rendered, time.perf_counter() - started
+
+
+def pdf_filename(invoice_data):
+    """File name used for an invoice's PDF inside the output directory or archive."""
+    number = str(invoice_data.get('invoice_number') or 'invoice')
+    return _SAFE_FILENAME.sub('_', number) + '.pdf'
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class BatchRenderStats:
+    """Throughput figures for one batch render."""
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.documents = 0
+        self.pages = 0
+        self.busy_time = 0.0  # Seconds workers spent rendering, summed over all workers
+        self.elapsed = 0.0
+
+    @property
+    def pages_per_second(self):
+        return self.pages / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def worker_utilisation(self):
+        """Fraction of available worker time spent rendering (1.0 means every worker was always busy)."""
+        capacity = self.elapsed * self.workers
+        return self.busy_time / capacity if capacity else 0.0
+
+    def to_dict(self):
+        return {
+            'workers': self.workers,
+            'documents': self.documents,
+            'pages': self.pages,
+            'elapsed': round(self.elapsed, 3),
+            'pages_per_second': round(self.pages_per_second, 1),
+            'worker_utilisation': round(self.worker_utilisation, 3),
+        }
+
+
+def render_invoice_pdfs(invoices, output, workers=None, chunk_size=PDF_BATCH_CHUNK_SIZE):
+    """
+    Render many invoices to PDF in parallel.
+
+    Args:
+        invoices (iterable): Invoice dicts as accepted by generate_invoice_pdf. May be a generator;
+                             at most two chunks per worker are read ahead.
+        output (str): Directory to write PDFs into, or a path ending in '.zip' to write one archive.
+        workers (int): Number of worker processes; defaults to the CPU count.
+        chunk_size (int): Invoices per worker task.
+
+    Returns:
+        BatchRenderStats: Documents, pages, pages per second and worker utilisation.
+    """
+    workers = workers or os.cpu_count() or 1
+    stats = BatchRenderStats(workers)
+    archive = None
+    if output.endswith('.zip'):
+        # PDFs are already compressed, so the archive just stores them
+        archive = zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_STORED)
+    else:
+        os.makedirs(output, exist_ok=True)
+
+    def write(filename, data):
+        if archive is not None:
+            archive.writestr(filename, data)
+        else:
+            with open(os.path.join(output, filename), 'wb') as file:
+                file.write(data)
+
+    started = time.perf_counter()
+    chunks = _chunks(invoices, chunk_size)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            in_flight = set()
+            for chunk in islice(chunks, workers * 2):
+                in_flight.add(executor.submit(_render_chunk, chunk))
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    rendered, busy_time = future.result()
+                    for filename, data, pages in rendered:
+                        write(filename, data)
+                        stats.documents += 1
+                        stats.pages += pages
+                    stats.busy_time += busy_time
+                    # Keep the pool fed without reading the whole input up front
+                    for chunk in islice(chunks, 1):
+                        in_flight.add(executor.submit(_render_chunk, chunk))
+    finally:
+        if archive is not None:
+            archive.close()
+    stats.elapsed = time.perf_counter() - started
+    return stats
@@ -0,0 +1,130 @@
+# services/invoice_pdf_cache.py
+
+"""
+Content-addressed disk cache for rendered invoice PDFs.
+
+A PDF is stored under a SHA-256 of the data it was rendered from, so any change
+to the invoice (or its customer) produces a new key and the stale file is never
+served. Files for an invoice are also removed as soon as the Invoice row is
+updated or deleted, and the cache is trimmed least-recently-used first once it
+grows past PDF_CACHE_MAX_BYTES. The key doubles as a strong ETag.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from flask import current_app
+from sqlalchemy import event
+from services.createinvoice import generate_invoice_pdf
+
+PDF_RENDER_VERSION = 1  # Bump when the PDF layout changes so every cached file is re-rendered
+PDF_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+
+def pdf_cache_key(invoice_data):
+    """Stable hash of the invoice data a PDF is rendered from."""
+    canonical = json.dumps({'v': PDF_RENDER_VERSION, 'data': invoice_data}, sort_keys=True,
+                           separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class PdfCache:
+    """Size-bounded LRU cache of rendered PDFs on local disk."""
+
+    def __init__(self, directory, max_bytes=PDF_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(os.path.getsize(path) for path in self._files())
+
+    def _files(self):
+        return glob.glob(os.path.join(self.directory, '*.pdf'))
+
+    def path_for(self, invoice_id, key):
+        return os.path.join(self.directory, f"{invoice_id}-{key}.pdf")
+
+    def get_or_render(self, invoice_id, invoice_data):
+        """
+        Return the cached PDF for an invoice, rendering and storing it on a miss.
+
+        Returns:
+            tuple: (path to the PDF file, cache key usable as a strong ETag)
+        """
+        key = pdf_cache_key(invoice_data)
+        path = self.path_for(invoice_id, key)
+        try:
+            os.utime(path)  # Mark as recently used
+            return path, key
+        except FileNotFoundError:
+            pass
+
+        data = generate_invoice_pdf(invoice_data).getvalue()
+        # Write to a temporary file first so readers never see a partial PDF
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._size += len(data)
+        self._evict()
+        return path, key
+
+    def invalidate(self, invoice_id):
+        """Remove every cached PDF for an invoice."""
+        for path in glob.glob(os.path.join(self.directory, f"{invoice_id}-*.pdf")):
+            self._remove(path)
+
+    def _remove(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._size -= size
+
+    def _evict(self):
+        """Delete least recently used files until the cache fits in max_bytes."""
+        if self._size <= self.max_bytes:
+            return
+        entries = []
+        for path in self._files():
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except FileNotFoundError:
+                continue
+        for _, path in sorted(entries):
+            if self._size <= self.max_bytes:
+                break
+            self._remove(path)
+
+
+def get_pdf_cache():
+    """Return the PdfCache of the current app."""
+    return current_app.extensions['pdf_cache']
+
+
+def _invoice_changed(mapper, connection, target):
+    # Listeners are process-wide; drop the files from the cache of the app doing the write
+    cache = current_app.extensions.get('pdf_cache')
+    if cache is not None:
+        cache.invalidate(target.id)
+
+
+def init_pdf_cache(app):
+    """Create the app's PdfCache and drop cached PDFs whenever an Invoice row changes."""
+    from models import Invoice
+
+    cache = PdfCache(
+        app.config.get('PDF_CACHE_DIR', os.path.join(app.instance_path, 'pdf_cache')),
+        max_bytes=app.config.get('PDF_CACHE_MAX_BYTES', PDF_CACHE_MAX_BYTES)
+    )
+    app.extensions['pdf_cache'] = cache
+    for name in ('after_update', 'after_delete'):
+        if not event.contains(Invoice, name, _invoice_changed):
+            event.listen(Invoice, name, _invoice_changed)
+    return cache
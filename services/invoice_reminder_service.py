@@ -0,0 +1,199 @@
+# services/invoice_reminder_service.py
+
+"""
+Daily payment reminders for unpaid invoices, one email per customer.
+
+Unpaid invoices are read in keyset chunks ordered by (customer_id, id), with
+each chunk's customers loaded by one SELECT ... IN query. Reminders go into
+the email outbox (services/email_service.py) with one batched INSERT per chunk,
+committed in the same transaction as a checkpoint of the run's position, so
+an interrupted run resumes after the last committed chunk instead of
+re-sending its reminders.
+"""
+
+import time
+from flask import current_app
+from sqlalchemy import event, select, tuple_
+from sqlalchemy.orm import selectinload
+from models import db, Invoice, JobCheckpoint
+from services.email_service import enqueue_emails
+
+UNPAID_STATUSES = ('Pending', 'Overdue')  # Invoice statuses that still get reminders
+REMINDER_CHUNK_SIZE = 1000  # Invoices read and committed per chunk
+REMINDER_CHECKPOINT = 'invoice_reminders'
+
+
+class ReminderRunStats:
+    """Statistics collected during one reminder run."""
+
+    def __init__(self):
+        self.rows_scanned = 0  # Unpaid invoices read
+        self.customers_reminded = 0  # Reminders queued (one per customer)
+        self.queries = 0  # SQL statements issued, including the per-chunk customer loads
+        self.chunks = []  # Per-chunk dicts: rows, queries, elapsed seconds
+        self.elapsed = 0.0
+
+    def to_dict(self):
+        return {
+            'rows_scanned': self.rows_scanned,
+            'customers_reminded': self.customers_reminded,
+            'queries': self.queries,
+            'elapsed': round(self.elapsed, 3),
+            'chunks': self.chunks,
+        }
+
+
+def reminder_message(customer, invoices):
+    """
+    Build the reminder email to a customer covering all of their unpaid invoices.
+
+    Args:
+        customer (Customer): Customer receiving the reminder (already loaded).
+        invoices (list): The customer's unpaid invoices.
+
+    Returns:
+        dict: subject, recipients and body for the outbox, or None when the customer has no email address.
+    """
+    if not customer.email:
+        current_app.logger.warning(f"No reminder for customer {customer.id}: no email address on file.")
+        return None
+    lines = [f"- {invoice.invoice_number}: ${invoice.amount:.2f} due {invoice.due_date:%Y-%m-%d} ({invoice.status})"
+             for invoice in invoices]
+    return {
+        'subject': f"Payment reminder: {len(invoices)} unpaid invoice{'s' if len(invoices) != 1 else ''}",
+        'recipients': [customer.email],
+        'body': f"Hello {customer.name},\n\nThe following invoices are still unpaid:\n\n" + '\n'.join(lines),
+    }
+
+
+def iter_unpaid_invoice_chunks(chunk_size=REMINDER_CHUNK_SIZE, position=None):
+    """
+    Read unpaid invoices in fixed-size keyset chunks ordered by customer.
+
+    Each chunk is its own query seeking past the last row of the previous one, so
+    the caller can commit between chunks. Its customers are loaded with a single
+    SELECT ... IN query.
+
+    Args:
+        chunk_size (int): Invoices per chunk.
+        position (tuple): (customer_id, id) to start after, or None to start from the beginning.
+
+    Yields:
+        list: Up to chunk_size Invoice objects with their customer already loaded.
+    """
+    while True:
+        statement = (
+            select(Invoice)
+            .where(Invoice.status.in_(UNPAID_STATUSES))
+            .order_by(Invoice.customer_id, Invoice.id)
+            .options(selectinload(Invoice.customer))
+            .limit(chunk_size)
+        )
+        if position is not None:
+            statement = statement.where(tuple_(Invoice.customer_id, Invoice.id) > tuple_(*position))
+        chunk = db.session.execute(statement).scalars().all()
+        if not chunk:
+            return
+        yield chunk
+        if len(chunk) < chunk_size:
+            return
+        position = (chunk[-1].customer_id, chunk[-1].id)
+
+
+def _load_carried_invoices(invoice_ids):
+    """Reload the invoices of a customer a resumed run had carried past its last committed chunk."""
+    if not invoice_ids:
+        return None, []
+    invoices = (Invoice.query.options(selectinload(Invoice.customer))
+                .filter(Invoice.id.in_(invoice_ids), Invoice.status.in_(UNPAID_STATUSES))
+                .order_by(Invoice.id).all())
+    return (invoices[0].customer if invoices else None), invoices
+
+
+def send_reminders_for_unpaid_invoices(chunk_size=REMINDER_CHUNK_SIZE):
+    """
+    Queue one reminder per customer for all unpaid invoices.
+
+    Work is grouped by customer; because invoices arrive ordered by customer, a
+    customer whose invoices straddle a chunk boundary is carried into the next chunk
+    so they still receive a single reminder. Each chunk's reminders are committed
+    with the run's checkpoint. Query count grows with the number of chunks, not the
+    number of invoices.
+
+    Args:
+        chunk_size (int): Number of invoices read and committed per chunk.
+
+    Returns:
+        ReminderRunStats: Rows scanned, queries issued and per-chunk timings.
+    """
+    stats = ReminderRunStats()
+    checkpoint = JobCheckpoint.load(REMINDER_CHECKPOINT)
+    state = checkpoint.state or {}
+    position = (state['customer_id'], state['id']) if state.get('id') else None
+    pending_customer, pending_invoices = _load_carried_invoices(state.get('carry'))
+    stats.customers_reminded = state.get('customers_reminded', 0)
+
+    def count_query(*args):
+        stats.queries += 1
+
+    messages = []
+
+    def remind(customer, invoices):
+        message = reminder_message(customer, invoices)
+        if message is not None:
+            messages.append(message)
+
+    started = time.perf_counter()
+    chunks = iter_unpaid_invoice_chunks(chunk_size, position)
+    while True:
+        # The session hands out a new connection after every commit, so count per chunk
+        connection = db.session.connection()
+        event.listen(connection, 'after_cursor_execute', count_query)
+        try:
+            chunk_started, queries_before = time.perf_counter(), stats.queries
+            chunk = next(chunks, None)
+            if chunk is None:
+                if pending_customer is not None:
+                    remind(pending_customer, pending_invoices)
+                stats.customers_reminded += enqueue_emails(messages)
+                checkpoint.clear()
+                db.session.flush()
+                break
+            for invoice in chunk:
+                if pending_customer is not None and invoice.customer_id != pending_customer.id:
+                    remind(pending_customer, pending_invoices)
+                    pending_invoices = []
+                pending_customer = invoice.customer
+                pending_invoices.append(invoice)
+            stats.rows_scanned += len(chunk)
+            stats.customers_reminded += enqueue_emails(messages)
+            messages.clear()
+            checkpoint.save({
+                'customer_id': chunk[-1].customer_id,
+                'id': chunk[-1].id,
+                'carry': [invoice.id for invoice in pending_invoices],
+                'customers_reminded': stats.customers_reminded,
+            })
+            db.session.flush()
+            # Detach the chunk from the session so memory stays flat across the run
+            for invoice in chunk:
+                for instance in (invoice, invoice.customer):
+                    if instance in db.session:
+                        db.session.expunge(instance)
+        finally:
+            event.remove(connection, 'after_cursor_execute', count_query)
+        db.session.commit()
+        stats.chunks.append({
+            'rows': len(chunk),
+            'queries': stats.queries - queries_before,
+            'elapsed': round(time.perf_counter() - chunk_started, 3)
+        })
+
+    db.session.commit()
+    stats.elapsed = time.perf_counter() - started
+
+    current_app.logger.info(
+        f"Queued {stats.customers_reminded} reminders for {stats.rows_scanned} unpaid invoices "
+        f"in {len(stats.chunks)} chunks using {stats.queries} queries ({stats.elapsed:.2f}s)."
+    )
+    return stats
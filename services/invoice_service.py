@@ -0,0 +1,125 @@
+# services/invoice_service.py
+
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import tuple_, update
+from models import db, Invoice, JobCheckpoint
+from services.pagination import keyset_paginate
+from services.dashboard_service import bump_dashboard_versions
+
+# Sort key for invoice listings; id breaks ties between invoices due on the same date
+INVOICE_SORT_KEY = [Invoice.due_date, Invoice.id]
+
+OVERDUE_CHUNK_SIZE = 5000  # Rows flipped per UPDATE; each chunk is its own short transaction
+OVERDUE_CHECKPOINT = 'overdue_transition'
+
+
+def parse_date_filter(value):
+    """Parse a 'YYYY-MM-DD' query-string value, returning None when it is empty."""
+    if not value:
+        return None
+    return datetime.strptime(value, '%Y-%m-%d')
+
+
+def filter_invoices(query, status=None, due_from=None, due_to=None, billing_method=None):
+    """
+    Apply the optional listing filters to an invoice query.
+
+    Args:
+        query (Query): Base invoice query.
+        status (str): Only include invoices with this status.
+        due_from (datetime): Only include invoices due on or after this date.
+        due_to (datetime): Only include invoices due on or before this date (inclusive of the whole day).
+        billing_method (str): Only include invoices with this billing method.
+
+    Returns:
+        Query: The filtered query.
+    """
+    if status:
+        query = query.filter(Invoice.status == status)
+    if billing_method:
+        query = query.filter(Invoice.billing_method == billing_method)
+    if due_from:
+        query = query.filter(Invoice.due_date >= due_from)
+    if due_to:
+        query = query.filter(Invoice.due_date < due_to + timedelta(days=1))
+    return query
+
+
+def get_invoice_page(user_id, cursor=None, page_size=None, status=None, due_from=None, due_to=None,
+                     billing_method=None):
+    """
+    Retrieve one keyset-paginated page of a vendor's invoices ordered by (due_date, id).
+
+    Returns:
+        KeysetPage: The page of invoices with next/prev cursors.
+    """
+    query = filter_invoices(
+        Invoice.query.filter(Invoice.user_id == user_id),
+        status=status,
+        due_from=due_from,
+        due_to=due_to,
+        billing_method=billing_method
+    )
+    return keyset_paginate(query, INVOICE_SORT_KEY, cursor=cursor, page_size=page_size)
+
+
+def transition_overdue_invoices(chunk_size=OVERDUE_CHUNK_SIZE, now=None):
+    """
+    Flip 'Pending' invoices whose due date has passed to 'Overdue' with chunked, set-based UPDATEs.
+
+    Each chunk seeks the next batch of ids through the (status, due_date) index, updates
+    them in a single statement and commits together with a checkpoint, so locks stay
+    short and an interrupted run resumes from the last committed chunk with the same cutoff.
+
+    Args:
+        chunk_size (int): Maximum number of invoices updated per transaction.
+        now (datetime): Cutoff for overdue detection; defaults to the current UTC time.
+
+    Returns:
+        dict: 'transitioned' (total rows updated), 'chunks', 'cutoff' and 'resumed'.
+    """
+    checkpoint = JobCheckpoint.load(OVERDUE_CHECKPOINT)
+    state = checkpoint.state or {}
+    resumed = bool(state)
+    cutoff = datetime.fromisoformat(state['cutoff']) if resumed else (now or datetime.utcnow())
+    position = (datetime.fromisoformat(state['due_date']), state['id']) if state.get('id') else None
+    transitioned = state.get('transitioned', 0)
+    chunks = state.get('chunks', 0)
+
+    while True:
+        query = db.session.query(Invoice.id, Invoice.due_date, Invoice.user_id).filter(
+            Invoice.status == 'Pending',
+            Invoice.due_date < cutoff
+        )
+        if position:
+            query = query.filter(tuple_(Invoice.due_date, Invoice.id) > tuple_(*position))
+        rows = query.order_by(Invoice.due_date, Invoice.id).limit(chunk_size).all()
+        if not rows:
+            break
+
+        # Pending and Overdue both count as outstanding, so the revenue rollups need no adjustment
+        result = db.session.execute(
+            update(Invoice)
+            .where(Invoice.id.in_([row.id for row in rows]), Invoice.status == 'Pending')
+            .values(status='Overdue')
+            .execution_options(synchronize_session=False)
+        )
+        # The bulk UPDATE bypasses the ORM events that invalidate cached dashboards
+        bump_dashboard_versions(db.session.connection(), [row.user_id for row in rows])
+        position = (rows[-1].due_date, rows[-1].id)
+        transitioned += result.rowcount
+        chunks += 1
+        checkpoint.save({
+            'cutoff': cutoff.isoformat(),
+            'due_date': position[0].isoformat(),
+            'id': position[1],
+            'transitioned': transitioned,
+            'chunks': chunks
+        })
+        db.session.commit()
+
+    checkpoint.clear()
+    db.session.commit()
+    current_app.logger.info(f"Transitioned {transitioned} invoices to Overdue in {chunks} chunks (cutoff {cutoff}).")
+    return {'transitioned': transitioned, 'chunks': chunks, 'cutoff': cutoff, 'resumed': resumed}
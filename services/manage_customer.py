@@ -0,0 +1,91 @@
+# services/manage_customer.py
+
+from sqlalchemy import select, update
+from models import db, Customer, Invoice
+from services.revenue_service import apply_bulk_status_change
+from services.dashboard_service import bump_dashboard_versions
+
+DEACTIVATION_BATCH_SIZE = 1000  # Customers deactivated per transaction
+
+
+def get_customer_by_id(customer_id):
+    """Retrieve a customer by ID."""
+    return db.session.get(Customer, customer_id)
+
+
+def get_invoices_for_customer(customer_id):
+    """Retrieve all invoices for a customer, most recently due first."""
+    return Invoice.query.filter_by(customer_id=customer_id).order_by(Invoice.due_date.desc()).all()
+
+
+def _id_batches(customer_ids, criteria, batch_size):
+    """Yield lists of customer ids, either from the given ids or by seeking through customers matching criteria."""
+    if customer_ids is not None:
+        customer_ids = sorted(set(customer_ids))
+        for start in range(0, len(customer_ids), batch_size):
+            yield customer_ids[start:start + batch_size]
+        return
+
+    last_id = 0
+    while True:
+        batch = [row.id for row in db.session.query(Customer.id)
+                 .filter(*criteria)
+                 .filter(Customer.id > last_id)
+                 .order_by(Customer.id)
+                 .limit(batch_size)]
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1]
+
+
+def deactivate_customers(customer_ids=None, criteria=None, batch_size=DEACTIVATION_BATCH_SIZE):
+    """
+    Deactivate customers and cancel their invoices with set-based UPDATEs.
+
+    Customers are processed in batches; each batch issues one UPDATE for the
+    customers and one for their invoices and commits, without loading any
+    Customer or Invoice objects.
+
+    Args:
+        customer_ids (list): Ids of the customers to deactivate.
+        criteria (list): SQLAlchemy filter expressions selecting customers instead of ids,
+                         e.g. [Customer.created_at < cutoff].
+        batch_size (int): Customers per batch/transaction.
+
+    Returns:
+        list: One dict per batch with the number of 'customers' and 'invoices' updated.
+
+    Raises:
+        ValueError: If neither customer_ids nor criteria is given.
+    """
+    if customer_ids is None and not criteria:
+        raise ValueError("Either customer_ids or criteria is required.")
+
+    results = []
+    for batch in _id_batches(customer_ids, criteria, batch_size):
+        try:
+            customers = db.session.execute(
+                update(Customer)
+                .where(Customer.id.in_(batch))
+                .values(active=False)
+                .execution_options(synchronize_session=False)
+            )
+            # The bulk UPDATE bypasses the ORM events that maintain the revenue rollups and dashboards
+            apply_bulk_status_change([Invoice.customer_id.in_(batch)], 'Cancelled')
+            vendor_ids = db.session.execute(
+                select(Invoice.user_id).where(Invoice.customer_id.in_(batch)).distinct()
+            ).scalars().all()
+            bump_dashboard_versions(db.session.connection(), vendor_ids)
+            invoices = db.session.execute(
+                update(Invoice)
+                .where(Invoice.customer_id.in_(batch), Invoice.status != 'Cancelled')
+                .values(status='Cancelled')
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        results.append({'customers': customers.rowcount, 'invoices': invoices.rowcount})
+    return results
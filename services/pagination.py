@@ -0,0 +1,159 @@
+# services/pagination.py
+
+import base64
+import json
+from datetime import date, datetime
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 50  # Page size used when the caller does not ask for one
+MAX_PAGE_SIZE = 200  # Upper bound so a single request can never load an unbounded page
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+class KeysetPage:
+    """A single page of results together with the cursors to move around it."""
+
+    def __init__(self, items, page_size, next_cursor=None, prev_cursor=None):
+        self.items = items  # Rows on this page, always in ascending key order
+        self.page_size = page_size  # Page size actually applied after clamping
+        self.next_cursor = next_cursor  # Opaque cursor for the following page, or None on the last page
+        self.prev_cursor = prev_cursor  # Opaque cursor for the preceding page, or None on the first page
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def clamp_page_size(page_size):
+    """Return a page size between 1 and MAX_PAGE_SIZE, falling back to DEFAULT_PAGE_SIZE."""
+    try:
+        page_size = int(page_size)
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(page_size, MAX_PAGE_SIZE))
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if 'dt' in value:
+            return datetime.fromisoformat(value['dt'])
+        if 'd' in value:
+            return date.fromisoformat(value['d'])
+    return value
+
+
+def encode_cursor(direction, values):
+    """
+    Encode a keyset position into an opaque, URL-safe cursor.
+
+    Args:
+        direction (str): 'next' to read rows after the position, 'prev' to read rows before it.
+        values (list): Sort key values of the boundary row, in order_by order.
+
+    Returns:
+        str: URL-safe cursor string.
+    """
+    payload = {'d': direction, 'k': [_encode_value(v) for v in values]}
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Returns:
+        tuple: (direction, values)
+
+    Raises:
+        InvalidCursor: If the cursor is malformed or was tampered with.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        direction = payload['d']
+        values = [_decode_value(v) for v in payload['k']]
+    except Exception as e:
+        raise InvalidCursor(f"Invalid pagination cursor: {str(e)}")
+    if direction not in ('next', 'prev'):
+        raise InvalidCursor("Invalid pagination cursor direction.")
+    return direction, values
+
+
+def keyset_paginate(query, order_by, cursor=None, page_size=None):
+    """
+    Return one page of a query using keyset (seek) pagination.
+
+    Rows are ordered by the given columns ascending; the last column must make the
+    ordering unique (normally the primary key). Instead of OFFSET, each page seeks
+    past the boundary row with a row-value comparison, so with an index on the
+    order_by columns every page costs the same regardless of how deep it is.
+
+    Args:
+        query (Query): Filtered query to paginate. It must not already be ordered or limited.
+        order_by (list): Model columns defining the sort key, e.g. [Invoice.due_date, Invoice.id].
+        cursor (str): Opaque cursor from a previous page, or None for the first page.
+        page_size (int): Requested page size; clamped to MAX_PAGE_SIZE.
+
+    Returns:
+        KeysetPage: The requested page and its next/prev cursors.
+
+    Raises:
+        InvalidCursor: If the cursor cannot be decoded or does not match order_by.
+    """
+    page_size = clamp_page_size(page_size)
+    direction, values = ('next', None) if not cursor else decode_cursor(cursor)
+    if values is not None and len(values) != len(order_by):
+        raise InvalidCursor("Pagination cursor does not match the sort key.")
+
+    key = tuple_(*order_by)
+    if direction == 'next':
+        if values is not None:
+            query = query.filter(key > tuple_(*values))
+        query = query.order_by(*[col.asc() for col in order_by])
+    else:
+        query = query.filter(key < tuple_(*values))
+        query = query.order_by(*[col.desc() for col in order_by])
+
+    # Fetch one extra row to find out whether another page exists in this direction
+    rows = query.limit(page_size + 1).all()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if direction == 'prev':
+        rows.reverse()
+
+    if not rows:
+        return KeysetPage([], page_size)
+
+    def key_of(row):
+        return [getattr(row, col.key) for col in order_by]
+
+    if direction == 'next':
+        next_cursor = encode_cursor('next', key_of(rows[-1])) if has_more else None
+        prev_cursor = encode_cursor('prev', key_of(rows[0])) if values is not None else None
+    else:
+        next_cursor = encode_cursor('next', key_of(rows[-1]))
+        prev_cursor = encode_cursor('prev', key_of(rows[0])) if has_more else None
+
+    return KeysetPage(rows, page_size, next_cursor=next_cursor, prev_cursor=prev_cursor)
@@ -0,0 +1,88 @@
+# services/proration.py
+
+"""
+Vectorized proration engine.
+
+Switching plans mid-cycle credits the unused part of the current plan and charges
+the same fraction of the new plan:
+
+    prorated = (new_price - current_price) * (cycle_days - days_used) / cycle_days
+
+All arithmetic is done in integer cents with NumPy, so one call can quote every
+candidate plan for every subscription at once. Results are rounded half away
+from zero to the cent. Positive amounts are charges and negative amounts are credits.
+"""
+
+import numpy as np
+
+
+def to_cents(amounts):
+    """Convert dollar amounts (scalar or array-like) to an int64 array of cents."""
+    return np.rint(np.asarray(amounts, dtype=np.float64) * 100).astype(np.int64)
+
+
+def proration_matrix(current_prices, cycle_days, days_used, candidate_prices):
+    """
+    Prorated amounts for switching each subscription to each candidate plan.
+
+    Args:
+        current_prices (array-like): Price per cycle of each subscription's current plan, in cents (int).
+        cycle_days (array-like): Length of each current plan's billing cycle in days.
+        days_used (array-like): Days already used in the current cycle; clipped to [0, cycle_days].
+        candidate_prices (array-like): Price per cycle of each candidate plan, in cents (int).
+
+    Returns:
+        numpy.ndarray: int64 matrix of shape (len(current_prices), len(candidate_prices)) in cents.
+
+    Raises:
+        ValueError: If the subscription arrays differ in length or a cycle length is not positive.
+    """
+    current = np.asarray(current_prices, dtype=np.int64).reshape(-1)
+    cycle = np.asarray(cycle_days, dtype=np.int64).reshape(-1)
+    used = np.asarray(days_used, dtype=np.int64).reshape(-1)
+    candidates = np.asarray(candidate_prices, dtype=np.int64).reshape(-1)
+
+    cycle = np.broadcast_to(cycle, current.shape) if cycle.size == 1 else cycle
+    used = np.broadcast_to(used, current.shape) if used.size == 1 else used
+    if not (current.shape == cycle.shape == used.shape):
+        raise ValueError("current_prices, cycle_days and days_used must have the same length.")
+    if np.any(cycle <= 0):
+        raise ValueError("cycle_days must be positive.")
+
+    remaining = cycle - np.clip(used, 0, cycle)
+    # (subscriptions, 1) against (1, candidates) broadcasts to the full quote matrix
+    numerator = (candidates[np.newaxis, :] - current[:, np.newaxis]) * remaining[:, np.newaxis]
+    denominator = cycle[:, np.newaxis]
+    # Integer round half away from zero: sign * floor((2|n| + d) / 2d)
+    return np.sign(numerator) * ((2 * np.abs(numerator) + denominator) // (2 * denominator))
+
+
+def prorate_plans(current_plans, days_used, candidate_plans):
+    """
+    Quote every candidate plan for every current plan.
+
+    Args:
+        current_plans (list): Plans with `price` (dollars) and `duration_days`.
+        days_used (array-like): Days used for each current plan.
+        candidate_plans (list): Plans with `price` (dollars).
+
+    Returns:
+        numpy.ndarray: int64 matrix of prorated amounts in cents.
+    """
+    return proration_matrix(
+        to_cents([plan.price for plan in current_plans]),
+        [plan.duration_days for plan in current_plans],
+        days_used,
+        to_cents([plan.price for plan in candidate_plans])
+    )
+
+
+def calculate_proration_amount(current_plan, new_plan, days_used):
+    """
+    Single-quote convenience wrapper around proration_matrix.
+
+    Returns:
+        float: Prorated amount in dollars (negative for a credit).
+    """
+    cents = prorate_plans([current_plan], [days_used], [new_plan])[0, 0]
+    return int(cents) / 100
@@ -0,0 +1,247 @@
+# services/request_profiler.py
+
+"""
+Sampled per-request profiling.
+
+For a sampled request, the profiler splits wall time into phases: SQL, template
+rendering, password hashing, outbound gateway calls, and 'app' for the rest.
+Each phase records exclusive time. SQL run lazily from inside a template counts
+as 'sql', not 'template', so the phases always add up to the total. It also
+counts statements and their time, and flags SELECT shapes repeated within the
+request (such as lazy invoice.customer loads in a loop) as likely N+1 queries.
+
+Results are returned in a Server-Timing header, which browser dev tools display,
+and optionally written as one JSON log line per request. Unsampled requests cost
+a random() call and one context variable lookup per SQL statement. With
+REQUEST_PROFILER_SAMPLE_RATE at 0 (the default), nothing is installed.
+
+Code that does other slow work can mark it with `with profile_phase('name'):`.
+"""
+
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import g, request, before_render_template, template_rendered
+from sqlalchemy import event
+from query_advisor import normalize_statement
+
+N_PLUS_ONE_THRESHOLD = 5  # Executions of one SELECT shape in a request that count as a likely N+1
+PHASE_ORDER = ('sql', 'template', 'hash', 'gateway', 'app')
+
+_current = ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+    """Phase timings and SQL statements of one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished = None
+        self.phases = defaultdict(float)
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.statements = defaultdict(lambda: [0, 0.0])  # Raw statement -> [executions, seconds]
+        self._stack = []  # Open phases as [name, started, time spent in nested phases]
+
+    def enter(self, name):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def exit(self, name):
+        """Close the innermost open phase called name, and any phase left open inside it."""
+        if not any(frame[0] == name for frame in self._stack):
+            return 0.0
+        now = time.perf_counter()
+        while True:
+            frame_name, started, nested = self._stack.pop()
+            elapsed = now - started
+            self.phases[frame_name] += elapsed - nested
+            if self._stack:
+                self._stack[-1][2] += elapsed
+            if frame_name == name:
+                return elapsed
+
+    def record_statement(self, statement, elapsed):
+        self.sql_count += 1
+        self.sql_time += elapsed
+        entry = self.statements[statement]
+        entry[0] += 1
+        entry[1] += elapsed
+
+    def finish(self):
+        while self._stack:
+            self.exit(self._stack[-1][0])
+        self.finished = time.perf_counter()
+
+    @property
+    def total(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    def phase_times(self):
+        """Exclusive seconds per phase, with the unattributed remainder as 'app'."""
+        phases = {name: seconds for name, seconds in self.phases.items() if seconds > 0}
+        phases['app'] = max(0.0, self.total - sum(phases.values()))
+        return phases
+
+    def repeated_shapes(self, threshold=N_PLUS_ONE_THRESHOLD):
+        """
+        SELECT shapes executed at least threshold times, most frequent first.
+
+        Statements are grouped by raw text while recording. Only the distinct
+        statements are normalized here, which merges statements that differ only
+        in inlined literals.
+
+        Returns:
+            list: Dicts with 'shape', 'count' and 'total_ms'.
+        """
+        shapes = defaultdict(lambda: [0, 0.0])
+        for statement, (count, seconds) in self.statements.items():
+            if statement.lstrip()[:6].upper() == 'SELECT':
+                entry = shapes[normalize_statement(statement)]
+                entry[0] += count
+                entry[1] += seconds
+        repeated = [
+            {'shape': shape, 'count': count, 'total_ms': round(seconds * 1000, 3)}
+            for shape, (count, seconds) in shapes.items() if count >= threshold
+        ]
+        return sorted(repeated, key=lambda entry: entry['count'], reverse=True)
+
+
+def current_profile():
+    """The profile of the request being handled on this thread, or None when it is not sampled."""
+    return _current.get()
+
+
+@contextmanager
+def profile_phase(name):
+    """Attribute the time spent in the block to a named phase of the current request's profile."""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    profile.enter(name)
+    try:
+        yield
+    finally:
+        profile.exit(name)
+
+
+def server_timing(profile, repeated=()):
+    """Render a Server-Timing header value for a finished profile."""
+    phases = profile.phase_times()
+    metrics = [f"total;dur={profile.total * 1000:.1f}"]
+    for name in PHASE_ORDER:
+        if name in phases:
+            metric = f"{name};dur={phases[name] * 1000:.1f}"
+            if name == 'sql':
+                metric += f';desc="{profile.sql_count} queries"'
+            metrics.append(metric)
+    if repeated:
+        metrics.append(f'n_plus_one;desc="{len(repeated)} repeated shapes"')
+    return ', '.join(metrics)
+
+
+class RequestProfiler:
+    """Samples requests and attaches their profile to the response."""
+
+    def __init__(self, app, engine):
+        self.sample_rate = app.config.get('REQUEST_PROFILER_SAMPLE_RATE', 0.0)
+        self.threshold = app.config.get('REQUEST_PROFILER_N_PLUS_ONE_THRESHOLD', N_PLUS_ONE_THRESHOLD)
+        self.log_enabled = app.config.get('REQUEST_PROFILER_LOG', False)
+        self.header_enabled = app.config.get('REQUEST_PROFILER_SERVER_TIMING', True)
+        self.logger = app.logger
+        self.engine = engine
+
+    def install(self, app):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+        if not event.contains(self.engine, 'before_cursor_execute', self._before_execute):
+            event.listen(self.engine, 'before_cursor_execute', self._before_execute)
+            event.listen(self.engine, 'after_cursor_execute', self._after_execute)
+            event.listen(self.engine, 'handle_error', self._execute_failed)
+
+    def _before_request(self):
+        if self.sample_rate >= 1 or random.random() < self.sample_rate:
+            profile = RequestProfile()
+            g._request_profile_token = _current.set(profile)
+
+    def _after_request(self, response):
+        profile = _current.get()
+        if profile is None:
+            return response
+        profile.finish()
+        repeated = profile.repeated_shapes(self.threshold)
+        if self.header_enabled:
+            response.headers['Server-Timing'] = server_timing(profile, repeated)
+        if self.log_enabled or repeated:
+            self._log(profile, repeated, response.status_code)
+        return response
+
+    def _teardown_request(self, exception=None):
+        token = g.pop('_request_profile_token', None)
+        if token is not None:
+            _current.reset(token)
+
+    def _log(self, profile, repeated, status):
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': status,
+            'total_ms': round(profile.total * 1000, 3),
+            'phases_ms': {name: round(seconds * 1000, 3) for name, seconds in profile.phase_times().items()},
+            'sql_count': profile.sql_count,
+            'sql_ms': round(profile.sql_time * 1000, 3),
+            'n_plus_one': repeated,
+        }
+        self.logger.log(logging.WARNING if repeated else logging.INFO, f"request_profile {json.dumps(record)}")
+
+    def _before_render(self, sender, template, context, **extra):
+        profile = _current.get()
+        if profile is not None:
+            profile.enter('template')
+
+    def _after_render(self, sender, template, context, **extra):
+        profile = _current.get()
+        if profile is not None:
+            profile.exit('template')
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        profile = _current.get()
+        if profile is not None:
+            profile.enter('sql')
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        profile = _current.get()
+        if profile is not None:
+            profile.record_statement(statement, profile.exit('sql'))
+
+    def _execute_failed(self, exception_context):
+        profile = _current.get()
+        if profile is not None:
+            profile.exit('sql')
+
+
+def init_request_profiler(app, db):
+    """
+    Install the request profiler when REQUEST_PROFILER_SAMPLE_RATE is above zero.
+
+    Settings: REQUEST_PROFILER_SAMPLE_RATE (fraction of requests profiled),
+    REQUEST_PROFILER_N_PLUS_ONE_THRESHOLD, REQUEST_PROFILER_LOG (a JSON log line
+    for every sampled request; likely N+1 requests are always logged) and
+    REQUEST_PROFILER_SERVER_TIMING. The profiler is stored in
+    app.extensions['request_profiler'].
+    """
+    if not app.config.get('REQUEST_PROFILER_SAMPLE_RATE', 0.0):
+        return None
+    with app.app_context():
+        profiler = RequestProfiler(app, db.engine)
+    profiler.install(app)
+    app.extensions['request_profiler'] = profiler
+    return profiler
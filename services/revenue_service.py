@@ -0,0 +1,256 @@
+# services/revenue_service.py
+
+"""
+Incrementally maintained per-vendor revenue rollups.
+
+Every invoice contributes its amount (in cents) to the daily and monthly rollup
+rows of its vendor and issue date. The contribution goes to paid or outstanding
+depending on status, and also to MRR/ARR for subscription invoices. Cancelled
+invoices contribute nothing. ORM inserts, updates and deletes of invoices apply
+the difference between the old and new contribution in the same transaction.
+Bulk UPDATEs that bypass the ORM call apply_bulk_status_change first. The
+`flask backfill-revenue-rollups` command rebuilds the tables from history.
+"""
+
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+import math
+import click
+from sqlalchemy import delete, event, func, inspect, insert, select, update
+from models import db, Invoice, VendorRevenueDaily, VendorRevenueMonthly
+
+PAID_STATUSES = ('Paid', 'paid')
+CANCELLED_STATUSES = ('Cancelled',)
+BACKFILL_CHUNK_SIZE = 500  # Vendors rebuilt per backfill task
+
+_METRICS = ('billed_cents', 'paid_cents', 'outstanding_cents', 'mrr_cents')
+
+
+def _as_date(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+
+def contribution(cents, status, billing_method):
+    """Rollup metrics (billed, paid, outstanding, mrr) one invoice contributes, in cents."""
+    if status in CANCELLED_STATUSES:
+        return (0, 0, 0, 0)
+    paid = cents if status in PAID_STATUSES else 0
+    mrr = cents if billing_method == 'subscription' else 0
+    return (cents, paid, cents - paid, mrr)
+
+
+def _add(deltas, user_id, issue_date, cents, status, billing_method, sign=1):
+    day = _as_date(issue_date)
+    if user_id is None or day is None:
+        return
+    bucket = deltas[(user_id, day)]
+    for index, value in enumerate(contribution(cents, status, billing_method)):
+        bucket[index] += sign * value
+
+
+def _upsert_add(connection, table, key, values):
+    """Add values to the rollup row identified by key, creating the row if needed."""
+    dialect = connection.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        statement = dialect_insert(table).values(**key, **values)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(key),
+            set_={column: table.c[column] + statement.excluded[column] for column in values}
+        )
+        connection.execute(statement)
+    elif dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+        statement = dialect_insert(table).values(**key, **values)
+        connection.execute(statement.on_duplicate_key_update(
+            {column: table.c[column] + statement.inserted[column] for column in values}
+        ))
+    else:
+        where = [table.c[column] == value for column, value in key.items()]
+        result = connection.execute(
+            update(table).where(*where).values({column: table.c[column] + value for column, value in values.items()})
+        )
+        if not result.rowcount:
+            connection.execute(insert(table).values(**key, **values))
+
+
+def apply_deltas(connection, deltas):
+    """
+    Apply per-(vendor, day) metric deltas to the daily and monthly rollup tables.
+
+    Args:
+        connection (Connection): Connection of the transaction the invoice change is part of.
+        deltas (dict): (user_id, day) -> [billed, paid, outstanding, mrr] deltas in cents.
+    """
+    monthly = defaultdict(lambda: [0, 0, 0, 0])
+    for (user_id, day), values in deltas.items():
+        if not any(values):
+            continue
+        _upsert_add(connection, VendorRevenueDaily.__table__, {'user_id': user_id, 'day': day},
+                    dict(zip(_METRICS, values)))
+        bucket = monthly[(user_id, day.replace(day=1))]
+        for index, value in enumerate(values):
+            bucket[index] += value
+    for (user_id, month), values in monthly.items():
+        metrics = dict(zip(_METRICS, values))
+        metrics['arr_cents'] = metrics['mrr_cents'] * 12
+        _upsert_add(connection, VendorRevenueMonthly.__table__, {'user_id': user_id, 'month': month}, metrics)
+
+
+def _cents(amount):
+    """Dollars to whole cents, half away from zero, the rule SQL round() applies in _sql_cents."""
+    value = (amount or 0) * 100
+    return int(math.copysign(math.floor(abs(value) + 0.5), value))
+
+
+def _sql_cents(amount):
+    """SQL counterpart of _cents, for the set-based paths that sum amounts in the database."""
+    return func.round(amount * 100)
+
+
+def _old_value(state, key):
+    history = state.attrs[key].history
+    return history.deleted[0] if history.deleted else getattr(state.obj(), key)
+
+
+def _invoice_inserted(mapper, connection, target):
+    deltas = defaultdict(lambda: [0, 0, 0, 0])
+    _add(deltas, target.user_id, target.issue_date, _cents(target.amount), target.status, target.billing_method)
+    apply_deltas(connection, deltas)
+
+
+def _invoice_updated(mapper, connection, target):
+    state = inspect(target)
+    keys = ('user_id', 'issue_date', 'amount', 'status', 'billing_method')
+    if not any(state.attrs[key].history.has_changes() for key in keys):
+        return
+    old = {key: _old_value(state, key) for key in keys}
+    deltas = defaultdict(lambda: [0, 0, 0, 0])
+    _add(deltas, old['user_id'], old['issue_date'], _cents(old['amount']), old['status'], old['billing_method'],
+         sign=-1)
+    _add(deltas, target.user_id, target.issue_date, _cents(target.amount), target.status, target.billing_method)
+    apply_deltas(connection, deltas)
+
+
+def _invoice_deleted(mapper, connection, target):
+    deltas = defaultdict(lambda: [0, 0, 0, 0])
+    _add(deltas, target.user_id, target.issue_date, _cents(target.amount), target.status, target.billing_method,
+         sign=-1)
+    apply_deltas(connection, deltas)
+
+
+def apply_bulk_status_change(criteria, new_status):
+    """
+    Update the rollups for a set-based status change that bypasses the ORM.
+
+    Call this in the same transaction, before the bulk UPDATE runs.
+
+    Args:
+        criteria (list): Filter expressions selecting the invoices that will be updated.
+        new_status (str): Status the invoices are being set to.
+    """
+    rows = db.session.execute(
+        select(Invoice.user_id, func.date(Invoice.issue_date), Invoice.status, Invoice.billing_method,
+               func.sum(_sql_cents(Invoice.amount)))
+        .where(*criteria, Invoice.status != new_status)
+        .group_by(Invoice.user_id, func.date(Invoice.issue_date), Invoice.status, Invoice.billing_method)
+    )
+    deltas = defaultdict(lambda: [0, 0, 0, 0])
+    for user_id, day, status, billing_method, cents in rows:
+        _add(deltas, user_id, day, int(cents or 0), status, billing_method, sign=-1)
+        _add(deltas, user_id, day, int(cents or 0), new_status, billing_method)
+    apply_deltas(db.session.connection(), deltas)
+
+
+def _backfill_vendors(app, user_ids):
+    """Rebuild the rollup rows of a group of vendors from their invoices in one transaction."""
+    with app.app_context():
+        daily = defaultdict(lambda: [0, 0, 0, 0])
+        with db.engine.begin() as connection:
+            rows = connection.execute(
+                select(Invoice.user_id, func.date(Invoice.issue_date), Invoice.status, Invoice.billing_method,
+                       func.sum(_sql_cents(Invoice.amount)))
+                .where(Invoice.user_id.in_(user_ids))
+                .group_by(Invoice.user_id, func.date(Invoice.issue_date), Invoice.status, Invoice.billing_method)
+            )
+            for user_id, day, status, billing_method, cents in rows:
+                _add(daily, user_id, day, int(cents or 0), status, billing_method)
+
+            monthly = defaultdict(lambda: [0, 0, 0, 0])
+            for (user_id, day), values in daily.items():
+                bucket = monthly[(user_id, day.replace(day=1))]
+                for index, value in enumerate(values):
+                    bucket[index] += value
+
+            connection.execute(delete(VendorRevenueDaily.__table__).where(VendorRevenueDaily.user_id.in_(user_ids)))
+            connection.execute(delete(VendorRevenueMonthly.__table__).where(VendorRevenueMonthly.user_id.in_(user_ids)))
+            if daily:
+                connection.execute(insert(VendorRevenueDaily.__table__), [
+                    {'user_id': user_id, 'day': day, **dict(zip(_METRICS, values))}
+                    for (user_id, day), values in daily.items()
+                ])
+            if monthly:
+                connection.execute(insert(VendorRevenueMonthly.__table__), [
+                    {'user_id': user_id, 'month': month, **dict(zip(_METRICS, values)), 'arr_cents': values[3] * 12}
+                    for (user_id, month), values in monthly.items()
+                ])
+        return len(user_ids)
+
+
+def backfill_revenue_rollups(app, workers=4, chunk_size=BACKFILL_CHUNK_SIZE):
+    """
+    Rebuild the rollup tables from invoice history, vendor chunks in parallel.
+
+    Each chunk aggregates its vendors' invoices in the database, then replaces
+    their rollup rows in one transaction on its own connection. Run it while
+    invoice writes are paused, or re-run it for vendors written during the backfill.
+
+    Returns:
+        int: Number of vendors rebuilt.
+    """
+    with app.app_context():
+        user_ids = [row[0] for row in db.session.execute(
+            select(Invoice.user_id).distinct().order_by(Invoice.user_id))]
+    chunks = [user_ids[start:start + chunk_size] for start in range(0, len(user_ids), chunk_size)]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(lambda chunk: _backfill_vendors(app, chunk), chunks))
+
+
+def get_vendor_kpis(user_id, month=None):
+    """
+    Revenue KPIs for a vendor and month, read from a single rollup row.
+
+    Returns:
+        dict: billed, paid, outstanding, mrr and arr in dollars.
+    """
+    month = (month or datetime.utcnow().date()).replace(day=1)
+    row = VendorRevenueMonthly.query.filter_by(user_id=user_id, month=month).first()
+    metrics = ('billed_cents', 'paid_cents', 'outstanding_cents', 'mrr_cents', 'arr_cents')
+    return {metric[:-len('_cents')]: (getattr(row, metric) if row else 0) / 100 for metric in metrics}
+
+
+def init_revenue_rollups(app):
+    """Keep the rollups in step with invoice writes and register the backfill CLI command."""
+    for name, listener in (('after_insert', _invoice_inserted),
+                           ('after_update', _invoice_updated),
+                           ('after_delete', _invoice_deleted)):
+        if not event.contains(Invoice, name, listener):
+            event.listen(Invoice, name, listener)
+
+    @app.cli.command('backfill-revenue-rollups')
+    @click.option('--workers', default=4, help='Parallel backfill tasks.')
+    @click.option('--chunk-size', default=BACKFILL_CHUNK_SIZE, help='Vendors per task.')
+    def backfill_command(workers, chunk_size):
+        """Rebuild the vendor revenue rollup tables from invoice history."""
+        vendors = backfill_revenue_rollups(app, workers=workers, chunk_size=chunk_size)
+        print(f"Rebuilt revenue rollups for {vendors} vendors.")
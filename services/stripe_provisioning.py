@@ -0,0 +1,136 @@
+# services/stripe_provisioning.py
+
+"""
+Bulk Stripe customer provisioning.
+
+provision_stripe_customers() walks the customers that have no stripe_customer_id
+in id order, one batch at a time. It creates each batch's Stripe customers
+concurrently on a bounded thread pool, through the Stripe gateway, and so under
+its rate limit. Then it writes the new IDs back with one executemany UPDATE,
+committed together with a checkpoint. Creations go through
+create_stripe_customer_for(), as /create-stripe-customer does, so both send the
+same idempotency key with the same parameters. A batch replayed after a crash
+therefore returns the customers Stripe already created instead of duplicating
+them (Stripe keeps keys for 24 hours). Customers whose
+creation failed keep a NULL stripe_customer_id and are picked up by the next run.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+import click
+from flask import current_app
+from sqlalchemy import select, update
+from models import db, Customer, JobCheckpoint
+from services.gateway import GatewayError
+from services.stripe_service import create_stripe_customer_for
+
+PROVISIONING_CHECKPOINT = 'stripe_customer_provisioning'
+PROVISIONING_BATCH_SIZE = 200  # Customers created and written back per transaction
+PROVISIONING_WORKERS = 8  # Concurrent Stripe calls
+
+
+class ProvisioningStats:
+    """Progress of one provisioning run."""
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.created = 0
+        self.failed = 0
+        self.batches = 0
+        self.resumed = False
+        self.errors = []  # (customer_id, message) of the first failures
+        self.elapsed = 0.0
+
+    @property
+    def per_hour(self):
+        return int(self.created / self.elapsed * 3600) if self.elapsed else 0
+
+    def __repr__(self):
+        return (f"<ProvisioningStats created={self.created} failed={self.failed} batches={self.batches} "
+                f"per_hour={self.per_hour}>")
+
+
+def _create(app, row):
+    """Create the Stripe customer of one customer row; returns (customer_id, stripe_id or None, error)."""
+    with app.app_context():
+        try:
+            stripe_customer = create_stripe_customer_for(row)
+            return row.id, stripe_customer['id'], None
+        except GatewayError as e:
+            return row.id, None, str(e)
+
+
+def provision_stripe_customers(app, workers=PROVISIONING_WORKERS, batch_size=PROVISIONING_BATCH_SIZE, limit=None):
+    """
+    Create Stripe customers for every customer without a stripe_customer_id.
+
+    Args:
+        app (Flask): Application whose context the worker threads use.
+        workers (int): Maximum concurrent Stripe calls.
+        batch_size (int): Customers per batch, UPDATE and commit.
+        limit (int): Optional maximum number of customers to process in this run.
+
+    Returns:
+        ProvisioningStats: Created and failed counts and throughput.
+    """
+    stats = ProvisioningStats(workers)
+    started = time.perf_counter()
+    checkpoint = JobCheckpoint.load(PROVISIONING_CHECKPOINT)
+    state = checkpoint.state or {}
+    stats.resumed = bool(state)
+    last_id = state.get('last_id', 0)
+    processed = 0
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='stripe-provisioning') as executor:
+        while limit is None or processed < limit:
+            size = batch_size if limit is None else min(batch_size, limit - processed)
+            rows = db.session.execute(
+                select(Customer.id, Customer.name, Customer.email)
+                .where(Customer.stripe_customer_id.is_(None), Customer.id > last_id)
+                .order_by(Customer.id)
+                .limit(size)
+            ).all()
+            if not rows:
+                break
+
+            results = list(executor.map(lambda row: _create(app, row), rows))
+            created = [{'id': customer_id, 'stripe_customer_id': stripe_id}
+                       for customer_id, stripe_id, _ in results if stripe_id]
+            if created:
+                # Bulk UPDATE by primary key, executed as a single executemany
+                db.session.execute(update(Customer), created)
+            for customer_id, stripe_id, error in results:
+                if error:
+                    stats.failed += 1
+                    if len(stats.errors) < 20:
+                        stats.errors.append((customer_id, error))
+            stats.created += len(created)
+            stats.batches += 1
+            processed += len(rows)
+            last_id = rows[-1].id
+            checkpoint.save({'last_id': last_id})
+            db.session.commit()
+
+    if limit is None or processed < limit:
+        # Finished the whole table; the next run starts over and retries failures
+        checkpoint.clear()
+        db.session.commit()
+    stats.elapsed = time.perf_counter() - started
+    current_app.logger.info(f"Provisioned {stats.created} Stripe customers ({stats.failed} failed) "
+                            f"in {stats.batches} batches, {stats.per_hour}/hour.")
+    return stats
+
+
+def init_stripe_provisioning(app):
+    """Register the provision-stripe-customers CLI command."""
+
+    @app.cli.command('provision-stripe-customers')
+    @click.option('--workers', default=PROVISIONING_WORKERS, help='Concurrent Stripe calls.')
+    @click.option('--batch-size', default=PROVISIONING_BATCH_SIZE, help='Customers per batch and commit.')
+    @click.option('--limit', default=None, type=int, help='Maximum customers to process in this run.')
+    def provision_command(workers, batch_size, limit):
+        """Create Stripe customers for all customers without a stripe_customer_id."""
+        stats = provision_stripe_customers(app, workers=workers, batch_size=batch_size, limit=limit)
+        print(f"Created {stats.created} Stripe customers, {stats.failed} failed, {stats.per_hour}/hour.")
+        for customer_id, error in stats.errors:
+            print(f"  customer {customer_id}: {error}")
@@ -1,44 +1,73 @@
-# billing/payment_routes.py
-
-@payment.route('/create-stripe-customer', methods=['POST'])
-def create_stripe_customer():
-    """Create a Stripe customer for a verified customer with a linked bank account."""
-    data = request.get_json()
-    customer_id = data.get('customer_id')
-
-    customer = Customer.query.get(customer_id)
-    if not customer:
-        return jsonify({'error': 'Customer not found'}), 404
-
-    if not customer.plaid_access_token:
-        return jsonify({'error': 'Customer has not linked a bank account via Plaid'}), 400
-
-    try:
-        # Create a Stripe customer
-        stripe_customer = stripe.Customer.create(
-            email=customer.email,
-            name=customer.name,
-        )
-
-        # Save Stripe customer ID to the customer in the database
-        customer.stripe_customer_id = stripe_customer['id']
-        db.session.commit()
-
-        # Create the Stripe bank account
-        bank_account = create_stripe_bank_account(
-            stripe_customer_id=stripe_customer['id'],
-            account_data={
-                'name': customer.bank_account_name,
-                'routing_number': 'your_routing_number',  # Replace with routing number retrieved from Plaid
-                'account_number': 'your_account_number',  # Replace with account number retrieved from Plaid
-            }
-        )
-
-        return jsonify({
-            'message': 'Stripe customer created and bank account linked',
-            'stripe_customer_id': stripe_customer['id'],
-            'stripe_bank_account': bank_account
-        }), 200
-
-    except Exception as e:
-        return jsonify({'error': str(e)}), 400
+# services/stripe_service.py
+
+import stripe
+from services.gateway import get_gateway
+
+
+def create_stripe_customer(email, name, idempotency_key=None, metadata=None):
+    """
+    Create a Stripe customer through the Stripe gateway.
+
+    Args:
+        email (str): Customer email.
+        name (str): Customer name.
+        idempotency_key (str): Key that makes retries of this creation safe.
+        metadata (dict): Optional metadata stored on the Stripe customer.
+
+    Returns:
+        stripe.Customer: The created customer.
+    """
+    return get_gateway('stripe').call('customers.create', stripe.Customer.create, email=email, name=name,
+                                      metadata=metadata or {}, idempotency_key=idempotency_key)
+
+
+def create_stripe_customer_for(customer):
+    """
+    Create the Stripe customer of one of our customers, idempotently.
+
+    Both /create-stripe-customer and the bulk provisioning command go through here.
+    They therefore send the same idempotency key ('customer-create-<id>') with the same
+    parameters, so whichever path runs second gets the customer the first one created
+    back. Stripe rejects a reused key whose parameters differ, and it keeps keys for 24 hours.
+
+    Args:
+        customer: A Customer or a row with id, email and name.
+
+    Returns:
+        stripe.Customer: The created (or previously created) customer.
+    """
+    return create_stripe_customer(
+        email=customer.email,
+        name=customer.name,
+        idempotency_key=f"customer-create-{customer.id}",
+        metadata={'customer_id': str(customer.id)}
+    )
+
+
+def create_stripe_bank_account(stripe_customer_id, account_data, idempotency_key=None):
+    """
+    Attach a US bank account to a Stripe customer through the Stripe gateway.
+
+    Args:
+        stripe_customer_id (str): Stripe customer ID.
+        account_data (dict): 'name', 'routing_number' and 'account_number' of the account.
+        idempotency_key (str): Key that makes retries of this creation safe.
+
+    Returns:
+        stripe.BankAccount: The created bank account source.
+    """
+    return get_gateway('stripe').call(
+        'customers.create_source',
+        stripe.Customer.create_source,
+        stripe_customer_id,
+        source={
+            'object': 'bank_account',
+            'country': 'US',
+            'currency': 'usd',
+            'account_holder_name': account_data.get('name'),
+            'account_holder_type': 'individual',
+            'routing_number': account_data.get('routing_number'),
+            'account_number': account_data.get('account_number'),
+        },
+        idempotency_key=idempotency_key
+    )
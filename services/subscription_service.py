@@ -1,6 +1,91 @@
 # services/subscription_service.py
 
-from models import db, SubscriptionPlan
+import threading
+import time
+from datetime import datetime, timedelta
+from types import MappingProxyType
+from models import db, SubscriptionPlan, CatalogVersion, Subscription
+from models.subscription_plan import PLAN_CATALOG
+
+CATALOG_CHECK_INTERVAL = 5  # Seconds between checks of the catalog version row
+
+
+class PlanSnapshot:
+    """Read-only copy of a subscription plan held in the in-memory catalog."""
+
+    __slots__ = ('id', 'name', 'description', 'price', 'billing_cycle', 'duration_days', 'features')
+
+    def __init__(self, plan):
+        for attr in self.__slots__:
+            object.__setattr__(self, attr, getattr(plan, attr))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PlanSnapshot is read-only.")
+
+    def __repr__(self):
+        return f"<PlanSnapshot {self.name} - {self.price}/{self.billing_cycle}>"
+
+
+class PlanCatalog:
+    """
+    Versioned, read-mostly subscription plan catalog held in process memory.
+
+    The catalog is reloaded only when the 'subscription_plans' catalog version row
+    has moved on. That row is bumped in the same transaction as any plan insert,
+    edit or delete. The version row itself is checked at most once every
+    check_interval seconds.
+    """
+
+    def __init__(self, check_interval=CATALOG_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self.version = None
+        self._plans = ()
+        self._by_id = MappingProxyType({})
+        self._by_name = MappingProxyType({})
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self.version is not None and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if self.version is not None and now - self._checked_at < self.check_interval:
+                return
+            version = CatalogVersion.current(PLAN_CATALOG)
+            if version != self.version:
+                plans = tuple(PlanSnapshot(plan) for plan in
+                              SubscriptionPlan.query.order_by(SubscriptionPlan.price, SubscriptionPlan.id))
+                self._by_id = MappingProxyType({plan.id: plan for plan in plans})
+                self._by_name = MappingProxyType({plan.name: plan for plan in plans})
+                self._plans = plans
+                self.version = version
+            self._checked_at = now
+
+    def invalidate(self):
+        """Force a version check on the next access (used after a local plan change commits)."""
+        self._checked_at = 0.0
+
+    def current_version(self):
+        self._refresh()
+        return self.version
+
+    def all(self):
+        self._refresh()
+        return self._plans
+
+    def get(self, plan_id):
+        self._refresh()
+        return self._by_id.get(plan_id)
+
+    def get_by_name(self, name):
+        self._refresh()
+        return self._by_name.get(name)
+
+
+# Process-wide plan catalog
+plan_catalog = PlanCatalog()
+
 
 def create_subscription_plan(name, price, billing_cycle, description=None, features=None):
     """Create a new subscription plan."""
@@ -13,12 +98,44 @@ def create_subscription_plan(name, price, billing_cycle, description=None, featu
             features=features
         )
         db.session.add(plan)
-        db.session.commit()
+        db.session.commit()  # Also bumps the plan catalog version
+        plan_catalog.invalidate()
         return plan
     except Exception as e:
         db.session.rollback()
         raise Exception(f"Failed to create subscription plan: {str(e)}")
 
 def get_all_subscription_plans():
-    """Retrieve all subscription plans."""
-    return SubscriptionPlan.query.all()
+    """Retrieve all subscription plans from the in-memory catalog."""
+    return plan_catalog.all()
+
+def get_subscription_plan(plan_id):
+    """Retrieve a subscription plan by id from the in-memory catalog."""
+    return plan_catalog.get(plan_id)
+
+def get_subscription_plan_by_name(name):
+    """Retrieve a subscription plan by name from the in-memory catalog."""
+    return plan_catalog.get_by_name(name)
+
+def subscribe_user(user_id, plan_id):
+    """
+    Subscribe a user to a plan, cancelling any subscription they currently have.
+
+    Returns:
+        Subscription: The new active subscription, or None if the plan does not exist.
+    """
+    plan = plan_catalog.get(plan_id)
+    if plan is None:
+        return None
+    now = datetime.utcnow()
+    Subscription.query.filter_by(user_id=user_id, status='active').update({'status': 'cancelled'})
+    subscription = Subscription(
+        user_id=user_id,
+        plan_id=plan.id,
+        status='active',
+        start_date=now,
+        end_date=now + timedelta(days=plan.duration_days or 30)
+    )
+    db.session.add(subscription)
+    db.session.commit()
+    return subscription
@@ -0,0 +1,279 @@
+# services/user_service.py
+
+"""
+Per-process user state: the last-login write-behind buffer and the identity cache
+behind the flask_login user loader.
+
+User.mark_login() records the timestamp here instead of committing its own
+transaction. A background thread writes all pending timestamps with one batched
+UPDATE every LOGIN_FLUSH_INTERVAL seconds, or sooner once LOGIN_FLUSH_MAX_PENDING
+users are waiting, so a stored last_login is at most about one interval stale.
+Pending timestamps are flushed at shutdown.
+"""
+
+import atexit
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from sqlalchemy import bindparam, event, inspect, or_, update
+from sqlalchemy.orm import joinedload, make_transient_to_detached
+from app import db
+
+LOGIN_FLUSH_INTERVAL = 5  # Seconds between flushes; bounds how stale last_login can be
+LOGIN_FLUSH_MAX_PENDING = 500  # Pending users that trigger an early flush
+
+
+class LoginTimestampBuffer:
+    """Collects last-login timestamps per process and writes them in batches."""
+
+    def __init__(self, app, interval=LOGIN_FLUSH_INTERVAL, max_pending=LOGIN_FLUSH_MAX_PENDING):
+        self.app = app
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending = {}  # user_id -> latest login timestamp
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.recorded = 0  # Logins recorded
+        self.flushes = 0  # Batched UPDATE transactions committed
+        self.rows_written = 0
+
+    def record(self, user_id, timestamp):
+        """Buffer a login; keeps only the newest timestamp per user."""
+        with self._lock:
+            current = self._pending.get(user_id)
+            if current is None or timestamp > current:
+                self._pending[user_id] = timestamp
+            self.recorded += 1
+            if len(self._pending) >= self.max_pending:
+                self._wake.set()
+
+    def flush(self):
+        """
+        Write all pending timestamps in one transaction.
+
+        Returns:
+            int: Number of users written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+            from models.user import User
+            table = User.__table__
+            statement = (
+                update(table)
+                .where(table.c.id == bindparam('b_id'))
+                # Never move last_login backwards if another process already wrote a newer value
+                .where(or_(table.c.last_login.is_(None), table.c.last_login < bindparam('b_last_login')))
+                # Keep updated_at as is: logins are not changes that delta exports should pick up
+                .values(last_login=bindparam('b_last_login'), updated_at=table.c.updated_at)
+            )
+            rows = [{'b_id': user_id, 'b_last_login': timestamp} for user_id, timestamp in pending.items()]
+            with self.app.app_context():
+                try:
+                    db.session.execute(statement, rows)
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    self.app.logger.error(f"Failed to flush {len(rows)} last-login timestamps: {str(e)}")
+                    # Put the timestamps back so the next flush retries them. They were
+                    # counted when first recorded, so bypass record() and its counter
+                    with self._lock:
+                        for user_id, timestamp in pending.items():
+                            current = self._pending.get(user_id)
+                            if current is None or timestamp > current:
+                                self._pending[user_id] = timestamp
+                    return 0
+                finally:
+                    db.session.remove()
+            self.flushes += 1
+            self.rows_written += len(rows)
+            return len(rows)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='login-timestamp-flusher', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Stop the flusher thread and write whatever is still pending."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(self.interval)
+        self.flush()
+
+    def metrics(self):
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            'recorded': self.recorded,
+            'pending': pending,
+            'flushes': self.flushes,
+            'rows_written': self.rows_written,
+            'commits_saved': max(0, self.recorded - pending - self.flushes),
+        }
+
+
+def init_login_buffer(app):
+    """Create and start the app's LoginTimestampBuffer from the LOGIN_FLUSH_* settings."""
+    buffer = LoginTimestampBuffer(
+        app,
+        interval=app.config.get('LOGIN_FLUSH_INTERVAL', LOGIN_FLUSH_INTERVAL),
+        max_pending=app.config.get('LOGIN_FLUSH_MAX_PENDING', LOGIN_FLUSH_MAX_PENDING)
+    )
+    buffer.start()
+    app.extensions['login_buffer'] = buffer
+    return buffer
+
+
+IDENTITY_CACHE_TTL = 60  # Seconds a cached identity is trusted; bounds staleness across processes
+IDENTITY_CACHE_SIZE = 10000  # Maximum cached identities per process
+
+# User attributes that change who the user is for authorization purposes. The role
+# relationship is listed too: assigning user.role only sets role_id during the flush
+_IDENTITY_ATTRIBUTES = ('role', 'role_id', 'active', 'password_hash', 'email', 'username', 'confirmed')
+
+
+class IdentityCache:
+    """
+    Per-process, size-bounded TTL cache of users for the flask_login user loader.
+
+    Entries are detached User objects with their role already loaded. Each request
+    gets its own copy via Session.merge(load=False), so an authenticated page view
+    (including current_user.role) normally issues no identity queries.
+    """
+
+    def __init__(self, ttl=IDENTITY_CACHE_TTL, max_size=IDENTITY_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()  # user_id -> (expires_at, detached User), oldest first
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(user_id, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, user_id, user):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, user)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self):
+        with self._lock:
+            return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+def load_user_cached(cache, user_id):
+    """Return the user for a session's user id, from the identity cache when possible."""
+    from models.user import User
+
+    user_id = int(user_id)
+    cached = cache.get(user_id)
+    if cached is not None:
+        return db.session.merge(cached, load=False)
+
+    user = db.session.get(User, user_id, options=[joinedload(User.role)])
+    if user is None:
+        return None
+    # Cache a detached copy so later requests never share this request's instance
+    detached = copy_detached(user)
+    cache.put(user_id, detached)
+    return user
+
+
+def copy_detached(user):
+    """Detached snapshot of a loaded user and its role, suitable for merge(load=False)."""
+    from models.user import User
+    from models.role import Role
+
+    snapshot = User(**{column.key: getattr(user, column.key) for column in User.__mapper__.column_attrs})
+    if user.role is not None:
+        snapshot.role = Role(**{column.key: getattr(user.role, column.key) for column in Role.__mapper__.column_attrs})
+        make_transient_to_detached(snapshot.role)
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+def _collect_changed_users(session, flush_context, instances):
+    from models.user import User
+
+    changed = session.info.setdefault('identity_changed', set())
+    for instance in session.dirty:
+        if isinstance(instance, User):
+            state = inspect(instance)
+            if any(state.attrs[key].history.has_changes() for key in _IDENTITY_ATTRIBUTES):
+                changed.add(instance.id)
+    changed.update(instance.id for instance in session.deleted if isinstance(instance, User))
+
+
+def _invalidate_changed_users(session):
+    # Listeners are process-wide; evict from the cache of the app doing the commit
+    changed = session.info.pop('identity_changed', ())
+    cache = current_app.extensions.get('identity_cache')
+    if cache is not None:
+        for user_id in changed:
+            cache.invalidate(user_id)
+
+
+def _forget_changed_users(session, previous_transaction):
+    session.info.pop('identity_changed', None)
+
+
+def init_identity_cache(app):
+    """
+    Register the cached flask_login user loader for the app.
+
+    Users whose identity attributes (role, active flag, password, email, ...) change
+    are evicted when the transaction that changed them commits, which covers
+    promote_to_admin, demote_to_user, deactivate_account, activate_account and
+    password changes.
+    """
+    from app import login_manager
+
+    cache = IdentityCache(
+        ttl=app.config.get('IDENTITY_CACHE_TTL', IDENTITY_CACHE_TTL),
+        max_size=app.config.get('IDENTITY_CACHE_SIZE', IDENTITY_CACHE_SIZE)
+    )
+    app.extensions['identity_cache'] = cache
+
+    @login_manager.user_loader
+    def load_user(user_id):
+        return load_user_cached(current_app.extensions['identity_cache'], user_id)
+
+    for name, listener in (('before_flush', _collect_changed_users),
+                           ('after_commit', _invalidate_changed_users),
+                           ('after_soft_rollback', _forget_changed_users)):
+        if not event.contains(db.session, name, listener):
+            event.listen(db.session, name, listener)
+    return cache
@@ -0,0 +1,218 @@
+# services/webhook_service.py
+
+"""
+Durable Stripe webhook inbox.
+
+The webhook endpoint only verifies the signature and stores the raw event with
+store_event(), keyed by the Stripe event id, so redeliveries are no-ops and
+Stripe gets its 200 immediately. WebhookWorkerPool threads then process stored
+events in batches.
+
+Ordering: every event is assigned a partition from its object id (for example the
+payment intent id), and each partition is owned by exactly one worker thread,
+which processes it in Stripe creation order. A single processor process should
+run the pool. Events that arrive after a newer event for the same object has
+already been processed are marked 'skipped' instead of being applied. Handlers
+work from the event payload alone and never call the Stripe API.
+"""
+
+import json
+import threading
+import time
+import zlib
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from models import db, Invoice, WebhookEvent
+
+WEBHOOK_PARTITIONS = 64  # Fixed number of ordering partitions; workers split them between themselves
+WEBHOOK_BATCH_SIZE = 100  # Events a worker processes per transaction
+WEBHOOK_MAX_ATTEMPTS = 5  # Attempts before an event is marked 'failed'
+WEBHOOK_POLL_INTERVAL = 1  # Seconds a worker sleeps when its partitions are empty
+
+
+def partition_for(object_id):
+    """Stable partition of an object id."""
+    return zlib.crc32((object_id or '').encode('utf-8')) % WEBHOOK_PARTITIONS
+
+
+def store_event(event, payload):
+    """
+    Persist a verified Stripe event to the inbox.
+
+    Args:
+        event (dict): The verified event.
+        payload (str): The raw request body, stored as received.
+
+    Returns:
+        bool: True if the event is new, False if it was a duplicate delivery.
+    """
+    data_object = event.get('data', {}).get('object', {}) or {}
+    object_id = data_object.get('id')
+    db.session.add(WebhookEvent(
+        id=event['id'],
+        type=event['type'],
+        object_id=object_id,
+        partition=partition_for(object_id),
+        created=event.get('created') or int(time.time()),
+        payload=payload
+    ))
+    try:
+        db.session.commit()
+        return True
+    except IntegrityError:
+        db.session.rollback()
+        return False
+
+
+### Event handlers ###
+
+def handle_payment_intent_succeeded(data_object):
+    """Mark the invoice referenced in the payment intent's metadata as paid."""
+    invoice_id = (data_object.get('metadata') or {}).get('invoice_id')
+    if not invoice_id:
+        return
+    invoice = db.session.get(Invoice, int(invoice_id))
+    if invoice and invoice.status != 'Paid':
+        invoice.status = 'Paid'
+
+
+def handle_payment_intent_failed(data_object):
+    """Record a failed payment attempt for the referenced invoice."""
+    invoice_id = (data_object.get('metadata') or {}).get('invoice_id')
+    error = (data_object.get('last_payment_error') or {}).get('message')
+    current_app.logger.warning(f"Payment intent {data_object.get('id')} for invoice {invoice_id} failed: {error}")
+
+
+EVENT_HANDLERS = {
+    'payment_intent.succeeded': handle_payment_intent_succeeded,
+    'payment_intent.payment_failed': handle_payment_intent_failed,
+}
+
+
+### Processing ###
+
+def _latest_processed(object_ids):
+    """Newest processed event creation time per object, in one query."""
+    if not object_ids:
+        return {}
+    rows = db.session.execute(
+        select(WebhookEvent.object_id, func.max(WebhookEvent.created))
+        .where(WebhookEvent.object_id.in_(object_ids), WebhookEvent.status == 'processed')
+        .group_by(WebhookEvent.object_id)
+    )
+    return dict(rows.all())
+
+
+def process_batch(partitions, limit=WEBHOOK_BATCH_SIZE):
+    """
+    Process up to `limit` pending events from the given partitions in one transaction.
+
+    Each event runs in its own savepoint, so a failing handler only rolls back that event.
+
+    Returns:
+        dict: Counts of events per resulting status.
+    """
+    events = (
+        WebhookEvent.query
+        .filter(WebhookEvent.status == 'pending', WebhookEvent.partition.in_(partitions))
+        .order_by(WebhookEvent.created, WebhookEvent.received_at)
+        .limit(limit)
+        .all()
+    )
+    counts = {'processed': 0, 'skipped': 0, 'failed': 0, 'pending': 0}
+    latest = _latest_processed({event.object_id for event in events if event.object_id})
+    blocked = set()  # Objects with a failed event in this batch; later events for them wait
+    max_attempts = current_app.config.get('WEBHOOK_MAX_ATTEMPTS', WEBHOOK_MAX_ATTEMPTS)
+
+    for event in events:
+        if event.object_id in blocked:
+            continue
+        if event.object_id and latest.get(event.object_id, -1) > event.created:
+            # A newer event for this object has already been applied
+            event.status = 'skipped'
+        else:
+            handler = EVENT_HANDLERS.get(event.type)
+            try:
+                with db.session.begin_nested():
+                    if handler:
+                        handler(json.loads(event.payload)['data']['object'])
+                event.status = 'processed'
+                if event.object_id:
+                    latest[event.object_id] = max(latest.get(event.object_id, -1), event.created)
+            except Exception as e:
+                event.attempts += 1
+                event.last_error = str(e)
+                event.status = 'failed' if event.attempts >= max_attempts else 'pending'
+                if event.status == 'pending':
+                    blocked.add(event.object_id)
+                current_app.logger.error(f"Webhook event {event.id} ({event.type}) failed: {str(e)}")
+        if event.status != 'pending':
+            event.processed_at = datetime.utcnow()
+        counts[event.status] += 1
+    db.session.commit()
+    return counts
+
+
+def inbox_metrics():
+    """Inbox depth and lag: pending count, age of the oldest pending event, and counts per status."""
+    by_status = dict(db.session.execute(
+        select(WebhookEvent.status, func.count()).group_by(WebhookEvent.status)
+    ).all())
+    oldest = db.session.execute(
+        select(func.min(WebhookEvent.received_at)).where(WebhookEvent.status == 'pending')
+    ).scalar()
+    return {
+        'pending': by_status.get('pending', 0),
+        'lag_seconds': round((datetime.utcnow() - oldest).total_seconds(), 3) if oldest else 0.0,
+        'by_status': by_status,
+    }
+
+
+class WebhookWorkerPool:
+    """Worker threads that each own a fixed subset of partitions."""
+
+    def __init__(self, app, workers=4, batch_size=WEBHOOK_BATCH_SIZE, poll_interval=WEBHOOK_POLL_INTERVAL):
+        self.app = app
+        self.workers = min(workers, WEBHOOK_PARTITIONS)
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads = []
+
+    def _run(self, partitions):
+        while not self._stop.is_set():
+            with self.app.app_context():
+                try:
+                    counts = process_batch(partitions, self.batch_size)
+                except Exception as e:
+                    db.session.rollback()
+                    self.app.logger.error(f"Webhook worker error: {str(e)}")
+                    counts = {}
+                finally:
+                    db.session.remove()
+            if sum(counts.values()) - counts.get('pending', 0) == 0:
+                self._stop.wait(self.poll_interval)
+
+    def start(self):
+        for index in range(self.workers):
+            partitions = list(range(index, WEBHOOK_PARTITIONS, self.workers))
+            thread = threading.Thread(target=self._run, args=(partitions,), name=f"webhook-worker-{index}",
+                                      daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=10):
+        self._stop.set()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0, deadline - time.monotonic()))
+        self._threads = []
+
+
+def start_webhook_workers(app):
+    """Start a WebhookWorkerPool sized by the WEBHOOK_WORKERS setting and return it."""
+    pool = WebhookWorkerPool(app, workers=app.config.get('WEBHOOK_WORKERS', 4))
+    pool.start()
+    return pool
@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta  # Importing datetime for date handling
-from billing import calculate_proration_amount
+from services.proration import calculate_proration_amount
 from payment import create_stripe_payment_intent
 
 """
@@ -66,35 +66,6 @@ class CartState:
         self.total_price = 0.0
 
 
-"""
-SubscriptionUpgradeState - Manages the process of a user upgrading or downgrading their subscription.
-
-This class temporarily holds information about the user's current plan, the new plan they want to switch to, 
-and any necessary proration calculations (adjustments for switching plans mid-cycle).
-"""
-
-class SubscriptionUpgradeState:
-    def __init__(self, current_plan):
-        # The user's current subscription plan. This is typically an object or identifier representing the plan.
-        self.current_plan = current_plan
-        
-        # The plan the user wants to switch to. Initially set to None until the user selects a new plan.
-        self.new_plan = None  
-        
-        # The calculated prorated amount, which adjusts the cost based on how much of the current billing cycle has elapsed.
-        self.prorated_amount = 0.0   
-    
-    # Updates the new plan and recalculates the proration
-    def select_new_plan(self, new_plan):
-        self.new_plan = new_plan
-        self.calculate_proration()
-        
-        
-    # Calculates the prorated amount when switching plans mid-cycle 
-    def calculate_proration(self):
-        self.prorated_amount = calculate_proration_amount(self.current_plan, self.new_plan)
-
-
 """
 PaymentProcessingState - Manages the state during a payment process.
 
@@ -236,7 +207,7 @@ class SubscriptionUpgradeState:
         self.calculate_proration()
         
     def calculate_proration(self):
-        """Calculate the prorated amount for the subscription change."""
+        """Calculate the prorated amount for the subscription change (see services.proration)."""
         days_used = (datetime.utcnow() - self.current_plan.start_date).days
         self.prorated_amount = calculate_proration_amount(self.current_plan, self.new_plan, days_used)
 
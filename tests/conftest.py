@@ -0,0 +1,58 @@
+# tests/conftest.py
+
+from contextlib import contextmanager
+import pytest
+from app import create_app, db
+from models import User, Role
+from services.subscription_service import plan_catalog
+
+
+class TestConfig:
+    TESTING = True
+    SECRET_KEY = 'test'
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    MAIL_DEFAULT_SENDER = 'noreply@example.com'
+    LOGIN_WRITE_BEHIND = False
+
+
+@contextmanager
+def make_app(**config):
+    """An app on a fresh in-memory database, with TestConfig overridden by config, inside its app context."""
+    app = create_app(type('Config', (TestConfig,), config))
+    # The plan catalog is process-wide; each test starts from an empty database
+    plan_catalog.version = None
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def app():
+    with make_app() as app:
+        yield app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def user(app):
+    role = Role(name='user')
+    db.session.add(role)
+    db.session.flush()
+    user = User(username='vendor', email='vendor@example.com', password_hash='unused', role_id=role.id)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def login(client, user):
+    """Log a user into the test client's session without going through the login form."""
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+        session['_fresh'] = True
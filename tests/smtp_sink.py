@@ -0,0 +1,65 @@
+# tests/smtp_sink.py
+
+"""A minimal local SMTP sink that records the messages it receives."""
+
+import socketserver
+import threading
+import time
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        sink = self.server.sink
+        self.reply('220 sink ready')
+        for raw in self.rfile:
+            command = raw.decode(errors='replace').strip().upper()
+            if command.startswith('DATA'):
+                if sink.fail_with:
+                    self.reply(sink.fail_with)
+                    continue
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                for data in self.rfile:
+                    if data in (b'.\r\n', b'.\n'):
+                        break
+                    lines.append(data.decode(errors='replace'))
+                time.sleep(sink.delay)
+                sink.messages.append(''.join(lines))
+                self.reply('250 OK')
+            elif command.startswith('QUIT'):
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class SMTPSink:
+    """
+    Threaded SMTP server on a free local port.
+
+    Attributes:
+        messages (list): Raw message data of every accepted message.
+        fail_with (str): When set, the reply sent to DATA instead of accepting, e.g. '451 Try again later'.
+        delay (float): Seconds to wait before accepting each message.
+    """
+
+    def __init__(self):
+        self.messages = []
+        self.fail_with = None
+        self.delay = 0.0
+        self._server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _SMTPHandler)
+        self._server.daemon_threads = True
+        self._server.sink = self
+        self.port = self._server.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
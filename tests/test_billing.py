@@ -0,0 +1,49 @@
+# tests/test_billing.py
+
+from datetime import datetime, timedelta
+import pytest
+from models import db, Customer, Invoice, User
+from tests.conftest import login
+
+
+@pytest.fixture
+def invoice(user):
+    customer = Customer(name='Ada Customer', email='ada@example.com')
+    db.session.add(customer)
+    db.session.flush()
+    invoice = Invoice(invoice_number='INV-1', amount=120.0, status='Pending', customer_id=customer.id,
+                      user_id=user.id, due_date=datetime.utcnow() + timedelta(days=30))
+    db.session.add(invoice)
+    db.session.commit()
+    return invoice
+
+
+def test_manage_invoices_lists_invoices_with_pay_button(client, user, invoice):
+    login(client, user)
+
+    response = client.get('/invoices/manage')
+
+    assert response.status_code == 200
+    assert b'INV-1' in response.data
+    assert f'/invoices/pay/{invoice.id}'.encode() in response.data
+
+
+def test_pay_invoice_pays_pending_invoice(client, user, invoice):
+    login(client, user)
+
+    response = client.post(f'/invoices/pay/{invoice.id}')
+
+    assert response.status_code == 302
+    assert db.session.get(Invoice, invoice.id).status == 'Paid'
+
+
+def test_customer_portal_lists_the_customers_invoices(client, invoice):
+    portal_user = User(username='ada', email='ada@example.com', password_hash='unused')
+    db.session.add(portal_user)
+    db.session.commit()
+    login(client, portal_user)
+
+    response = client.get('/my-invoices')
+
+    assert response.status_code == 200
+    assert [row['invoice_number'] for row in response.get_json()] == ['INV-1']
@@ -0,0 +1,98 @@
+# tests/test_email_outbox.py
+
+from datetime import datetime, timedelta
+import pytest
+from app import mail
+from models import db, OutboxEmail
+from services.email_service import (
+    OUTBOX_CLAIM_TIMEOUT, OUTBOX_MAX_ATTEMPTS, claim_email, deliver_email, drain_outbox, enqueue_email
+)
+from tests.conftest import make_app
+from tests.smtp_sink import SMTPSink
+
+
+@pytest.fixture
+def sink():
+    sink = SMTPSink().start()
+    yield sink
+    sink.stop()
+
+
+@pytest.fixture
+def app(sink):
+    with make_app(MAIL_SERVER='127.0.0.1', MAIL_PORT=sink.port, MAIL_USE_TLS=False, MAIL_USE_SSL=False,
+                  MAIL_SUPPRESS_SEND=False) as app:
+        yield app
+
+
+def queue_email(subject='Invoice ready'):
+    email = enqueue_email(subject, ['customer@example.com'], 'Your invoice is attached.')
+    db.session.commit()
+    return email.id
+
+
+def test_drain_delivers_to_smtp_sink(app, sink):
+    email_id = queue_email()
+
+    assert drain_outbox() == {'sent': 1, 'pending': 0, 'dead': 0, 'lost': 0}
+
+    email = db.session.get(OutboxEmail, email_id)
+    assert (email.status, email.attempts, email.claimed_at) == ('sent', 1, None)
+    assert len(sink.messages) == 1 and 'Subject: Invoice ready' in sink.messages[0]
+    assert drain_outbox()['sent'] == 0
+
+
+def test_failed_delivery_is_retried_with_backoff(app, sink):
+    sink.fail_with = '451 Try again later'
+    email_id = queue_email()
+
+    assert drain_outbox()['pending'] == 1
+
+    email = db.session.get(OutboxEmail, email_id)
+    assert email.attempts == 1
+    assert email.next_attempt_at > datetime.utcnow()
+    assert '451' in email.last_error
+
+
+def test_expired_claim_is_not_recorded_twice(app, sink):
+    email_id = queue_email()
+    first_claim = claim_email(email_id)
+    # The first worker outlives the claim timeout and another worker takes the message over
+    second_claim = claim_email(email_id, now=datetime.utcnow() + timedelta(seconds=OUTBOX_CLAIM_TIMEOUT + 1))
+    assert second_claim is not None
+
+    assert deliver_email(email_id, first_claim) == 'lost'
+    email = db.session.get(OutboxEmail, email_id)
+    assert (email.status, email.claimed_at) == ('sending', second_claim)
+
+    assert deliver_email(email_id, second_claim) == 'sent'
+
+
+def test_message_that_keeps_crashing_its_worker_is_dead_lettered(app, sink):
+    email_id = queue_email()
+    email = db.session.get(OutboxEmail, email_id)
+    # Every previous attempt was claimed and then lost with its worker
+    email.status, email.attempts = 'sending', OUTBOX_MAX_ATTEMPTS
+    email.claimed_at = datetime.utcnow() - timedelta(seconds=OUTBOX_CLAIM_TIMEOUT + 1)
+    db.session.commit()
+
+    assert drain_outbox()['dead'] == 1
+    assert db.session.get(OutboxEmail, email_id).status == 'dead'
+    assert sink.messages == []
+
+
+def test_claims_are_taken_per_message(app, sink, monkeypatch):
+    first, second = queue_email('First'), queue_email('Second')
+    statuses_seen_while_sending = []
+    send = mail.send
+
+    def recording_send(message):
+        statuses_seen_while_sending.append(db.session.get(OutboxEmail, second).status)
+        return send(message)
+
+    monkeypatch.setattr(mail, 'send', recording_send)
+    drain_outbox()
+
+    # The second message was still unclaimed while the first one was being sent
+    assert statuses_seen_while_sending == ['pending', 'sending']
+    assert {db.session.get(OutboxEmail, email_id).status for email_id in (first, second)} == {'sent'}
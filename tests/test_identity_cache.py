@@ -0,0 +1,36 @@
+# tests/test_identity_cache.py
+
+from flask import current_app
+from models import db, Role, User
+from services.user_service import load_user_cached
+from tests.conftest import make_app
+
+
+def session_listener_counts():
+    dispatch = db.session().dispatch
+    return len(dispatch.before_flush), len(dispatch.after_commit), len(dispatch.after_soft_rollback)
+
+
+def test_identity_listeners_are_registered_once_across_apps():
+    with make_app():
+        counts = session_listener_counts()
+    with make_app():
+        assert session_listener_counts() == counts
+
+
+def test_promoting_and_demoting_evict_the_cached_identity(app, user):
+    db.session.add(Role(name='admin'))
+    db.session.commit()
+    cache = current_app.extensions['identity_cache']
+    load_user_cached(cache, user.id)
+    assert cache.get(user.id).role.name == 'user'
+
+    db.session.get(User, user.id).promote_to_admin()
+
+    assert cache.get(user.id) is None
+    assert load_user_cached(cache, user.id).is_admin()
+
+    db.session.get(User, user.id).demote_to_user()
+
+    assert cache.get(user.id) is None
+    assert not load_user_cached(cache, user.id).is_admin()
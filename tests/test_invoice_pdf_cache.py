@@ -0,0 +1,37 @@
+# tests/test_invoice_pdf_cache.py
+
+from datetime import datetime, timedelta
+import os
+from sqlalchemy import inspect
+from models import db, Customer, Invoice, User
+from services.invoice_pdf_cache import get_pdf_cache
+from tests.conftest import make_app
+
+
+def invoice_listener_counts():
+    dispatch = inspect(Invoice).dispatch
+    return len(dispatch.after_update), len(dispatch.after_delete)
+
+
+def test_invoice_update_drops_cached_pdfs_without_stacking_listeners(tmp_path):
+    with make_app(PDF_CACHE_DIR=str(tmp_path / 'first')):
+        counts = invoice_listener_counts()
+    with make_app(PDF_CACHE_DIR=str(tmp_path / 'second')):
+        assert invoice_listener_counts() == counts
+
+        vendor = User(username='vendor', email='vendor@example.com', password_hash='unused')
+        customer = Customer(name='Ada Customer', email='ada@example.com')
+        db.session.add_all([vendor, customer])
+        db.session.flush()
+        invoice = Invoice(invoice_number='INV-1', amount=120.0, status='Pending', customer_id=customer.id,
+                          user_id=vendor.id, due_date=datetime.utcnow() + timedelta(days=30))
+        db.session.add(invoice)
+        db.session.commit()
+        cached = get_pdf_cache().path_for(invoice.id, 'stale')
+        with open(cached, 'wb') as file:
+            file.write(b'%PDF-')
+
+        invoice.status = 'Paid'
+        db.session.commit()
+
+        assert not os.path.exists(cached)
@@ -0,0 +1,61 @@
+# tests/test_invoice_reminders.py
+
+from datetime import datetime, timedelta
+import pytest
+from models import db, Customer, Invoice, JobCheckpoint, OutboxEmail
+from services import invoice_reminder_service
+from services.invoice_reminder_service import REMINDER_CHECKPOINT, send_reminders_for_unpaid_invoices
+
+
+@pytest.fixture
+def invoices(user):
+    ada = Customer(name='Ada Customer', email='ada@example.com')
+    bob = Customer(name='Bob Customer', email='bob@example.com')
+    db.session.add_all([ada, bob])
+    db.session.flush()
+    due = datetime(2026, 1, 1)
+    for number, (customer, status) in enumerate([(ada, 'Pending'), (ada, 'Overdue'), (ada, 'Pending'),
+                                                 (ada, 'Paid'), (bob, 'Pending'), (bob, 'Overdue')]):
+        db.session.add(Invoice(invoice_number=f"INV-{number}", amount=10.0, status=status, customer_id=customer.id,
+                               user_id=user.id, due_date=due + timedelta(days=number)))
+    db.session.commit()
+
+
+def queued_reminders():
+    return {tuple(email.recipients): email.body for email in OutboxEmail.query.order_by(OutboxEmail.id)}
+
+
+def test_reminders_are_queued_once_per_customer_chunk_by_chunk(app, invoices):
+    stats = send_reminders_for_unpaid_invoices(chunk_size=2)
+
+    reminders = queued_reminders()
+    assert list(reminders) == [('ada@example.com',), ('bob@example.com',)]
+    assert all(f"INV-{number}" in reminders[('ada@example.com',)] for number in (0, 1, 2))
+    assert 'INV-3' not in reminders[('ada@example.com',)]
+    assert (stats.rows_scanned, stats.customers_reminded) == (5, 2)
+    assert [chunk['rows'] for chunk in stats.chunks] == [2, 2, 1]
+    # A constant number of statements per chunk, however many rows it holds
+    assert all(chunk['queries'] <= 5 for chunk in stats.chunks)
+    assert stats.queries >= sum(chunk['queries'] for chunk in stats.chunks)
+    assert JobCheckpoint.query.filter_by(name=REMINDER_CHECKPOINT).count() == 0
+
+
+def test_interrupted_run_resumes_without_resending(app, invoices, monkeypatch):
+    real_message = invoice_reminder_service.reminder_message
+
+    def fail_for_bob(customer, invoices):
+        if customer.name == 'Bob Customer':
+            raise RuntimeError('worker killed')
+        return real_message(customer, invoices)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(invoice_reminder_service, 'reminder_message', fail_for_bob)
+        with pytest.raises(RuntimeError):
+            send_reminders_for_unpaid_invoices(chunk_size=2)
+    db.session.rollback()
+    assert list(queued_reminders()) == [('ada@example.com',)]
+
+    stats = send_reminders_for_unpaid_invoices(chunk_size=2)
+
+    assert list(queued_reminders()) == [('ada@example.com',), ('bob@example.com',)]
+    assert stats.customers_reminded == 2
@@ -0,0 +1,26 @@
+# tests/test_login_buffer.py
+
+from datetime import datetime, timedelta
+from models import db, User
+from services.user_service import LoginTimestampBuffer
+
+
+def test_failed_flush_requeues_without_counting_logins_again(app, user, monkeypatch):
+    buffer = LoginTimestampBuffer(app)
+    logged_in = datetime.utcnow()
+    buffer.record(user.id, logged_in)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError('database unavailable')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(db.session, 'execute', fail)
+        assert buffer.flush() == 0
+    assert buffer.metrics() == {'recorded': 1, 'pending': 1, 'flushes': 0, 'rows_written': 0, 'commits_saved': 0}
+
+    buffer.record(user.id, logged_in + timedelta(seconds=1))
+    assert buffer.flush() == 1
+
+    assert buffer.metrics() == {'recorded': 2, 'pending': 0, 'flushes': 1, 'rows_written': 1, 'commits_saved': 1}
+    db.session.expire_all()  # The flush wrote through its own app context and session
+    assert db.session.get(User, user.id).last_login == logged_in + timedelta(seconds=1)
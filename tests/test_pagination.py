@@ -0,0 +1,90 @@
+# tests/test_pagination.py
+
+import html
+import re
+from datetime import datetime, timedelta
+import pytest
+from models import db, Customer, Invoice
+from services.invoice_service import get_invoice_page
+from tests.conftest import login
+
+
+@pytest.fixture
+def invoices(user):
+    customer = Customer(name='Ada Customer', email='ada@example.com')
+    db.session.add(customer)
+    db.session.flush()
+    due = datetime(2026, 1, 1)
+    rows = [Invoice(invoice_number=f"INV-{number}", amount=10.0, customer_id=customer.id, user_id=user.id,
+                    status='Pending' if number % 2 else 'Paid',
+                    billing_method='subscription' if number < 3 else 'one-time',
+                    due_date=due + timedelta(days=number))
+            for number in range(6)]
+    db.session.add_all(rows)
+    db.session.commit()
+    return rows
+
+
+def numbers(page):
+    return [invoice.invoice_number for invoice in page]
+
+
+def page_link(response, label):
+    match = re.search(rf'<a href="([^"]+)">{label}</a>', response.get_data(as_text=True))
+    return html.unescape(match.group(1)) if match else None
+
+
+def test_pages_walk_forward_and_back(user, invoices):
+    first = get_invoice_page(user.id, page_size=2)
+    assert numbers(first) == ['INV-0', 'INV-1']
+    assert first.has_next and not first.has_prev
+
+    middle = get_invoice_page(user.id, cursor=first.next_cursor, page_size=2)
+    assert numbers(middle) == ['INV-2', 'INV-3']
+    assert middle.has_next and middle.has_prev
+
+    last = get_invoice_page(user.id, cursor=middle.next_cursor, page_size=2)
+    assert numbers(last) == ['INV-4', 'INV-5']
+    assert last.has_prev and not last.has_next
+
+    back = get_invoice_page(user.id, cursor=last.prev_cursor, page_size=2)
+    assert numbers(back) == ['INV-2', 'INV-3']
+    assert back.has_next and back.has_prev
+
+    start = get_invoice_page(user.id, cursor=back.prev_cursor, page_size=2)
+    assert numbers(start) == ['INV-0', 'INV-1']
+    assert start.has_next and not start.has_prev
+
+
+def test_tampered_cursor_is_rejected(client, user, invoices):
+    login(client, user)
+
+    assert client.get('/invoices/manage?cursor=not-a-cursor').status_code == 400
+    assert client.get('/invoices/manage?cursor=eyJkIjoic2lkZXdheXMiLCJrIjpbXX0').status_code == 400
+
+
+def test_page_links_keep_the_filters(client, user, invoices):
+    login(client, user)
+
+    response = client.get('/invoices/manage?status=Pending&due_from=2026-01-02&page_size=1')
+    seen = re.findall(r'INV-\d', response.get_data(as_text=True))
+    link = page_link(response, 'Next')
+    while link:
+        assert 'status=Pending' in link and 'due_from=2026-01-02' in link
+        response = client.get(link)
+        seen += re.findall(r'INV-\d', response.get_data(as_text=True))
+        link = page_link(response, 'Next')
+
+    assert seen == ['INV-1', 'INV-3', 'INV-5']
+    assert 'status=Pending' in page_link(response, 'Previous')
+
+
+def test_subscription_listing_pages_subscription_invoices(client, user, invoices):
+    login(client, user)
+
+    response = client.get('/subscriptions/manage?page_size=2')
+
+    assert response.status_code == 200
+    assert re.findall(r'INV-\d', response.get_data(as_text=True)) == ['INV-0', 'INV-1']
+    response = client.get(page_link(response, 'Next'))
+    assert re.findall(r'INV-\d', response.get_data(as_text=True)) == ['INV-2']
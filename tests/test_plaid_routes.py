@@ -0,0 +1,50 @@
+# tests/test_plaid_routes.py
+
+import pytest
+from models import db, Customer
+from scripts.fake_plaid_server import start_fake_plaid
+from tests.conftest import login, make_app
+
+
+@pytest.fixture
+def plaid_server():
+    server, base_url = start_fake_plaid()
+    yield server, base_url
+    server.shutdown()
+
+
+@pytest.fixture
+def app(plaid_server):
+    with make_app(PLAID_CLIENT_ID='client_test', PLAID_SECRET='secret_test', PLAID_BASE_URL=plaid_server[1]) as app:
+        yield app
+
+
+def test_plaid_routes_are_registered_once(app):
+    rules = [rule.rule for rule in app.url_map.iter_rules()]
+
+    assert rules.count('/create-link-token') == 1
+    assert rules.count('/exchange-public-token') == 1
+
+
+def test_create_link_token_for_the_logged_in_user(client, user):
+    login(client, user)
+
+    response = client.post('/create-link-token')
+
+    assert response.status_code == 200
+    assert response.get_json()['link_token'].startswith('link-sandbox-')
+
+
+def test_exchange_public_token_saves_the_bank_account(client, user):
+    customer = Customer(name='Ada Customer', email='ada@example.com')
+    db.session.add(customer)
+    db.session.commit()
+
+    response = client.post('/exchange-public-token', json={'public_token': 'public-abc12345',
+                                                           'customer_id': customer.id})
+
+    assert response.status_code == 200
+    assert response.get_json() == {'message': 'Bank account information saved', 'bank_account_last4': '0000',
+                                   'bank_account_name': 'Plaid Checking'}
+    db.session.expire_all()
+    assert db.session.get(Customer, customer.id).plaid_access_token == 'access-abc12345'
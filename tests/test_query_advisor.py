@@ -0,0 +1,50 @@
+# tests/test_query_advisor.py
+
+import pytest
+from sqlalchemy import inspect, text
+from models import db
+from query_advisor import IndexRecommendation, render_migration, render_sql
+from tests.conftest import make_app
+
+
+@pytest.fixture
+def app(tmp_path):
+    with make_app(QUERY_RECORDER_ENABLED=True, QUERY_RECORDER_SNAPSHOT_PATH=str(tmp_path / 'shapes.json'),
+                  QUERY_ADVISOR_TOP_SHAPES=1000,  # Schema creation outweighs the test's own queries
+                  QUERY_ADVISOR_MIGRATIONS_DIR=str(tmp_path / 'no-alembic'),
+                  QUERY_ADVISOR_SQL_PATH=str(tmp_path / 'advisor' / 'indexes.sql'),
+                  QUERY_ADVISOR_REPORT_PATH=str(tmp_path / 'advisor' / 'report.txt')) as app:
+        yield app
+
+
+def test_sql_script_applies_as_written(app):
+    recommendation = IndexRecommendation('invoices', ['status', 'amount'], [])
+
+    script = render_sql([recommendation], db.engine.dialect)
+
+    assert 'TODO' not in script
+    with db.engine.begin() as connection:
+        for statement in script.split(';'):
+            connection.execute(text(statement))
+    assert 'ix_invoices_status_amount' in {index['name'] for index in inspect(db.engine).get_indexes('invoices')}
+
+
+def test_migration_revises_the_given_head():
+    migration = render_migration([IndexRecommendation('invoices', ['status', 'amount'], [])], 'abc123')
+
+    assert "down_revision = 'abc123'" in migration
+    assert "op.create_index('ix_invoices_status_amount', 'invoices', ['status', 'amount'])" in migration
+
+
+def test_advise_indexes_writes_sql_without_an_alembic_environment(app, tmp_path):
+    recorder = app.extensions['query_recorder']
+    for _ in range(3):
+        db.session.execute(text("SELECT invoices.id FROM invoices WHERE invoices.amount = :amount"), {'amount': 5})
+    recorder.save(str(tmp_path / 'shapes.json'))
+
+    result = app.test_cli_runner().invoke(args=['advise-indexes'])
+
+    assert result.exit_code == 0, result.output
+    assert 'SQL:' in result.output
+    script = (tmp_path / 'advisor' / 'indexes.sql').read_text()
+    assert 'CREATE INDEX ix_invoices_amount ON invoices (amount);' in script
@@ -0,0 +1,45 @@
+# tests/test_revenue.py
+
+from datetime import datetime, timedelta
+import pytest
+from models import db, Customer, Invoice, VendorRevenueMonthly
+from services.revenue_service import backfill_revenue_rollups, get_vendor_kpis
+from tests.conftest import login
+
+
+@pytest.fixture
+def invoices(user):
+    customer = Customer(name='Ada Customer', email='ada@example.com')
+    db.session.add(customer)
+    db.session.flush()
+    # 0.125 and 0.375 are exact half cents, where round-half-to-even and SQL round() disagree
+    for number, (amount, status) in enumerate([(120.0, 'Pending'), (0.125, 'Paid'), (0.375, 'Paid')]):
+        db.session.add(Invoice(invoice_number=f"INV-{number}", amount=amount, status=status,
+                               customer_id=customer.id, user_id=user.id, issue_date=datetime.utcnow(),
+                               due_date=datetime.utcnow() + timedelta(days=30)))
+    db.session.commit()
+
+
+def monthly_rows():
+    return [(row.user_id, row.month, row.billed_cents, row.paid_cents, row.outstanding_cents)
+            for row in VendorRevenueMonthly.query.order_by(VendorRevenueMonthly.user_id)]
+
+
+def test_backfill_rebuilds_the_rollups_the_listeners_maintain(app, user, invoices):
+    maintained = monthly_rows()
+
+    backfill_revenue_rollups(app, workers=1)
+    db.session.expire_all()
+
+    assert monthly_rows() == maintained
+    assert get_vendor_kpis(user.id) == {'billed': 120.51, 'paid': 0.51, 'outstanding': 120.0, 'mrr': 0, 'arr': 0}
+
+
+def test_dashboard_shows_this_months_revenue_kpis(client, user, invoices):
+    login(client, user)
+
+    response = client.get('/dashboard')
+
+    assert response.status_code == 200
+    assert b'Revenue This Month' in response.data
+    assert b'$120.51' in response.data
@@ -0,0 +1,58 @@
+# tests/test_stripe_provisioning.py
+
+import pytest
+from models import db, Customer
+from services.gateway import GatewayError
+from services.stripe_provisioning import provision_stripe_customers
+from services.stripe_service import create_stripe_customer, create_stripe_customer_for
+from scripts.fake_stripe_server import start_fake_stripe
+from tests.conftest import make_app
+
+
+@pytest.fixture
+def stripe_server():
+    server, base_url = start_fake_stripe()
+    yield server, base_url
+    server.shutdown()
+
+
+@pytest.fixture
+def app(stripe_server):
+    with make_app(STRIPE_SECRET_KEY='sk_test_fake', STRIPE_API_BASE=stripe_server[1]) as app:
+        yield app
+
+
+def add_customers(count):
+    customers = [Customer(name=f"Customer {index}", email=f"customer{index}@example.com") for index in range(count)]
+    db.session.add_all(customers)
+    db.session.commit()
+    return customers
+
+
+def test_provisioning_creates_and_stores_stripe_customers(app, stripe_server):
+    add_customers(25)
+
+    stats = provision_stripe_customers(app, workers=4, batch_size=10)
+
+    assert (stats.created, stats.failed, stats.batches) == (25, 0, 3)
+    assert Customer.query.filter(Customer.stripe_customer_id.is_(None)).count() == 0
+    assert stripe_server[0].customers == 25
+
+
+def test_route_and_batch_paths_share_one_stripe_customer(app, stripe_server):
+    customer = add_customers(1)[0]
+    # As /create-stripe-customer does, without storing the id (e.g. its commit failed)
+    created_by_route = create_stripe_customer_for(customer)
+
+    provision_stripe_customers(app, workers=2)
+
+    assert db.session.get(Customer, customer.id).stripe_customer_id == created_by_route['id']
+    assert (stripe_server[0].customers, stripe_server[0].replays) == (1, 1)
+
+
+def test_reused_key_with_different_parameters_is_rejected(app, stripe_server):
+    customer = add_customers(1)[0]
+    create_stripe_customer_for(customer)
+
+    with pytest.raises(GatewayError, match='same parameters'):
+        create_stripe_customer(customer.email, customer.name, idempotency_key=f"customer-create-{customer.id}")
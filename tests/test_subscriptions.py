@@ -0,0 +1,34 @@
+# tests/test_subscriptions.py
+
+from models import Subscription
+from services.subscription_service import create_subscription_plan
+from tests.conftest import login
+
+
+def test_plan_page_renders_with_plans(client):
+    plan = create_subscription_plan('Pro', 29.0, 'monthly', description='For growing teams')
+
+    response = client.get('/subscriptions')
+
+    assert response.status_code == 200
+    assert b'Pro' in response.data
+    assert f'/subscriptions/{plan.id}/subscribe'.encode() in response.data
+
+
+def test_subscribe_replaces_active_subscription(client, user):
+    basic = create_subscription_plan('Basic', 9.0, 'monthly')
+    pro = create_subscription_plan('Pro', 29.0, 'monthly')
+    login(client, user)
+
+    client.post(f'/subscriptions/{basic.id}/subscribe')
+    response = client.post(f'/subscriptions/{pro.id}/subscribe')
+
+    assert response.status_code == 302
+    active = Subscription.query.filter_by(user_id=user.id, status='active').all()
+    assert [subscription.plan_id for subscription in active] == [pro.id]
+
+
+def test_subscribe_to_unknown_plan_is_404(client, user):
+    login(client, user)
+
+    assert client.post('/subscriptions/999/subscribe').status_code == 404
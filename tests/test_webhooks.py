@@ -0,0 +1,97 @@
+# tests/test_webhooks.py
+
+import hashlib
+import hmac
+import json
+import time
+import pytest
+from models import db, Role, User, WebhookEvent
+from tests.conftest import login, make_app
+
+WEBHOOK_SECRET = 'whsec_test'
+
+
+@pytest.fixture
+def app():
+    with make_app(STRIPE_WEBHOOK_SECRET=WEBHOOK_SECRET) as app:
+        yield app
+
+
+def signed(payload, secret=WEBHOOK_SECRET):
+    """Stripe-Signature header for a payload, as Stripe computes it."""
+    timestamp = int(time.time())
+    signature = hmac.new(secret.encode('utf-8'), f"{timestamp}.{payload}".encode('utf-8'), hashlib.sha256)
+    return {'Stripe-Signature': f"t={timestamp},v1={signature.hexdigest()}", 'Content-Type': 'application/json'}
+
+
+def event_payload(event_id='evt_1'):
+    return json.dumps({
+        'id': event_id, 'object': 'event', 'type': 'payment_intent.succeeded', 'created': 1700000000,
+        'data': {'object': {'id': 'pi_1', 'object': 'payment_intent', 'metadata': {'invoice_id': '1'}}},
+    })
+
+
+def test_signed_event_is_stored_in_the_inbox(client):
+    payload = event_payload()
+
+    response = client.post('/stripe-webhook', data=payload, headers=signed(payload))
+
+    assert response.status_code == 200
+    assert response.get_json() == {'status': 'success'}
+    event = db.session.get(WebhookEvent, 'evt_1')
+    assert (event.type, event.object_id, event.status, event.payload) == (
+        'payment_intent.succeeded', 'pi_1', 'pending', payload)
+
+
+def test_redelivered_event_is_acknowledged_as_duplicate(client):
+    payload = event_payload()
+    client.post('/stripe-webhook', data=payload, headers=signed(payload))
+
+    response = client.post('/stripe-webhook', data=payload, headers=signed(payload))
+
+    assert response.status_code == 200
+    assert response.get_json() == {'status': 'duplicate'}
+    assert WebhookEvent.query.count() == 1
+
+
+def test_event_with_bad_signature_is_rejected(client):
+    payload = event_payload()
+
+    response = client.post('/stripe-webhook', data=payload, headers=signed(payload, secret='whsec_other'))
+
+    assert response.status_code == 400
+    assert WebhookEvent.query.count() == 0
+
+
+
+@pytest.fixture
+def admin(user):
+    admin_role = Role(name='admin')
+    db.session.add(admin_role)
+    db.session.flush()
+    admin = User(username='admin', email='admin@example.com', password_hash='unused', role_id=admin_role.id)
+    db.session.add(admin)
+    db.session.commit()
+    return admin
+
+
+def test_inbox_and_gateway_metrics_are_served_by_the_payment_blueprint(app, client, admin):
+    payload = event_payload()
+    client.post('/stripe-webhook', data=payload, headers=signed(payload))
+    login(client, admin)
+
+    response = client.get('/admin/webhook-metrics')
+
+    assert response.status_code == 200
+    assert response.get_json()['pending'] == 1
+    assert client.get('/admin/gateway-metrics').status_code == 200
+    endpoints = {rule.rule: rule.endpoint for rule in app.url_map.iter_rules()}
+    assert endpoints['/admin/webhook-metrics'] == 'payment.webhook_metrics'
+    assert endpoints['/admin/gateway-metrics'] == 'payment.payment_gateway_metrics'
+
+
+def test_metrics_are_admin_only(client, user):
+    login(client, user)
+
+    assert client.get('/admin/webhook-metrics').status_code == 403
+    assert client.get('/admin/gateway-metrics').status_code == 403